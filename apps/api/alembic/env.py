@@ -1,15 +1,8 @@
 from logging.config import fileConfig
-import os
 
-from sqlalchemy import engine_from_config, pool
 from alembic import context
 
-from dotenv import load_dotenv
-
-# -------------------------------------------------------------------
-# Load environment variables (.env in apps/api/)
-# -------------------------------------------------------------------
-load_dotenv()
+from app.core.engine import get_database_url, make_engine
 
 # -------------------------------------------------------------------
 # Alembic Config object
@@ -17,14 +10,10 @@ load_dotenv()
 config = context.config
 
 # -------------------------------------------------------------------
-# Override sqlalchemy.url from DATABASE_URL
+# Override sqlalchemy.url from DATABASE_URL (.env parsed once + cached)
 # (avoids alembic.ini interpolation issues)
 # -------------------------------------------------------------------
-db_url = os.getenv("DATABASE_URL")
-if not db_url:
-    raise RuntimeError(
-        "DATABASE_URL is not set. Check apps/api/.env"
-    )
+db_url = get_database_url()
 
 config.set_main_option("sqlalchemy.url", db_url)
 
@@ -35,20 +24,14 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # -------------------------------------------------------------------
-# Import models & metadata for autogenerate
+# Models & metadata for autogenerate
+# (imported lazily so commands that never touch metadata skip the ORM import cost)
 # -------------------------------------------------------------------
-from app.core.database import Base
-from app.models.company import Company 
-from app.models.company import Company  # noqa: F401
-from app.models.employee import Employee  # noqa: F401
-from app.models.role import Role  # noqa: F401
-from app.models.employee_role import EmployeeRole  # noqa: F401 # noqa: F401
-from app.models.availability import EmployeeAvailability  # noqa: F401
-from app.models.unavailability import EmployeeUnavailability  # noqa: F401
-from app.models.time_off import EmployeeTimeOff  # noqa: F401
-from app.models.rules import EmployeeRule  # noqa: F401
+def get_target_metadata():
+    import app.models.registry  # noqa: F401  (registers every table)
+    from app.core.database import Base
 
-target_metadata = Base.metadata
+    return Base.metadata
 
 # -------------------------------------------------------------------
 # Offline migrations
@@ -59,7 +42,7 @@ def run_migrations_offline() -> None:
 
     context.configure(
         url=url,
-        target_metadata=target_metadata,
+        target_metadata=get_target_metadata(),
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -72,16 +55,17 @@ def run_migrations_offline() -> None:
 # -------------------------------------------------------------------
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
+    # NullPool + no statement_timeout; same DSN handling as the app engine
+    connectable = make_engine(for_migrations=True)
 
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
-            target_metadata=target_metadata,
+            target_metadata=get_target_metadata(),
+            # one short transaction per revision instead of a single long one
+            transaction_per_migration=True,
+            compare_type=True,
+            compare_server_default=True,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,62 @@
+"""lowercase existing employee emails
+
+Revision ID: 0d6b3e8f4c27
+Revises: 7f2c4a9e1b53
+Create Date: 2026-10-15 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d6b3e8f4c27'
+down_revision: Union[str, Sequence[str], None] = '7f2c4a9e1b53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Login matches employees.email = lower(:email) against ix_employees_email_hash,
+    # so rows stored mixed-case (older create_employee paths) could never log in.
+    # Nothing enforces per-company uniqueness since c0c4dcc27def dropped
+    # uq_employees_company_email, so lowercasing could leave two employees with
+    # the same login email (and login would pick one arbitrarily). Refuse to run
+    # until those are resolved by hand.
+    duplicates = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT company_id, lower(email) AS email, count(*) AS n
+            FROM employees
+            GROUP BY company_id, lower(email)
+            HAVING count(*) > 1
+            ORDER BY company_id, lower(email)
+            """
+        )
+    ).all()
+    if duplicates:
+        listed = "\n".join(f"  company {d.company_id}: {d.email} ({d.n} rows)" for d in duplicates)
+        raise RuntimeError(
+            "employees has emails that differ only by case within a company; "
+            f"merge or rename them before lowercasing:\n{listed}"
+        )
+
+    op.execute("UPDATE employees SET email = lower(email) WHERE email <> lower(email)")
+
+    # Same transaction as the check above, so no case-duplicate can slip in
+    # before the index exists.
+    op.create_index(
+        'uq_employees_company_email',
+        'employees',
+        ['company_id', sa.text('lower(email)')],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_employees_company_email', table_name='employees')
+    # original casing is not recoverable (and not needed)
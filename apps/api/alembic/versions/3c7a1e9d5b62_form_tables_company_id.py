@@ -0,0 +1,62 @@
+"""form tables company_id
+
+Revision ID: 3c7a1e9d5b62
+Revises: 0d6b3e8f4c27
+Create Date: 2026-10-15 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7a1e9d5b62'
+down_revision: Union[str, Sequence[str], None] = '0d6b3e8f4c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# employee_availability_submissions already carries company_id
+TABLES = ['employee_availability', 'employee_unavailability', 'employee_time_off', 'employee_pto']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Denormalized so the admin "clear forms" DELETEs can filter on company_id
+    # directly instead of going through employees.
+    for t in TABLES:
+        op.add_column(t, sa.Column('company_id', postgresql.UUID(as_uuid=True), nullable=True))
+        op.create_foreign_key(
+            f'{t}_company_id_fkey', t, 'companies', ['company_id'], ['company_id'], ondelete='CASCADE'
+        )
+        op.execute(
+            f"""
+            UPDATE {t} AS t
+            SET company_id = e.company_id
+            FROM employees AS e
+            WHERE t.employee_id = e.employee_id
+            """
+        )
+
+    with op.get_context().autocommit_block():
+        for t in TABLES:
+            op.create_index(
+                f'ix_{t}_company_id',
+                t,
+                ['company_id'],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for t in TABLES:
+            op.drop_index(f'ix_{t}_company_id', table_name=t, postgresql_concurrently=True, if_exists=True)
+
+    for t in TABLES:
+        op.drop_constraint(f'{t}_company_id_fkey', t, type_='foreignkey')
+        op.drop_column(t, 'company_id')
@@ -0,0 +1,45 @@
+"""server-side uuid defaults
+
+Revision ID: 4b7e2c9a1f30
+Revises: add_managers_admins
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c9a1f30'
+down_revision: Union[str, Sequence[str], None] = 'add_managers_admins'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, primary key column) that previously relied on Python-side uuid.uuid4
+UUID_PK_COLUMNS = [
+    ('companies', 'company_id'),
+    ('employees', 'employee_id'),
+    ('roles', 'role_id'),
+    ('employee_availability', 'availability_id'),
+    ('employee_unavailability', 'unavailability_id'),
+    ('employee_time_off', 'time_off_id'),
+    ('employee_rules', 'rule_id'),
+    ('managers', 'manager_id'),
+    ('system_admins', 'admin_id'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # gen_random_uuid() is built in on PG13+; pgcrypto provides it on older servers
+    op.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto")
+    for table, column in UUID_PK_COLUMNS:
+        op.alter_column(table, column, server_default=sa.text('gen_random_uuid()'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in UUID_PK_COLUMNS:
+        op.alter_column(table, column, server_default=None)
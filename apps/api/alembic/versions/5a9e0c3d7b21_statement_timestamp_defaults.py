@@ -0,0 +1,33 @@
+"""statement_timestamp defaults on scheduler tables
+
+Revision ID: 5a9e0c3d7b21
+Revises: e3f8a2b6c915
+Create Date: 2026-10-15 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9e0c3d7b21'
+down_revision: Union[str, Sequence[str], None] = 'e3f8a2b6c915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# high-volume tables written by the schedule generator
+TABLES = ['scheduled_shifts', 'shift_instances', 'schedule_audit_candidate']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.alter_column(table, 'created_at', server_default=sa.text('statement_timestamp()'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.alter_column(table, 'created_at', server_default=sa.text('now()'))
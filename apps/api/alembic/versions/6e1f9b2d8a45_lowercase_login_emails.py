@@ -0,0 +1,66 @@
+"""lowercase manager/system admin emails and enforce lowercase login emails
+
+Revision ID: 6e1f9b2d8a45
+Revises: 3c7a1e9d5b62
+Create Date: 2026-10-15 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1f9b2d8a45'
+down_revision: Union[str, Sequence[str], None] = '3c7a1e9d5b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['employees', 'managers', 'system_admins']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Login looks up `email = lower(:email)` through the plain email indexes, so
+    # the stored value has to be lowercase already (employees: 0d6b3e8f4c27).
+    # A CHECK keeps it that way instead of a second, lower(email) index.
+    # Their email indexes are unique on the raw value, so case variants of one
+    # address would make the UPDATEs fail halfway; list them and refuse to run
+    # until they are resolved by hand (as 0d6b3e8f4c27 does for employees).
+    conn = op.get_bind()
+    duplicates = [
+        f"  {t}: {d.email} ({d.n} rows)"
+        for t in ('managers', 'system_admins')
+        for d in conn.execute(
+            sa.text(
+                f"""
+                SELECT lower(email) AS email, count(*) AS n
+                FROM {t}
+                GROUP BY lower(email)
+                HAVING count(*) > 1
+                ORDER BY lower(email)
+                """
+            )
+        )
+    ]
+    if duplicates:
+        listed = "\n".join(duplicates)
+        raise RuntimeError(
+            "managers/system_admins have emails that differ only by case; "
+            f"merge or rename them before lowercasing:\n{listed}"
+        )
+
+    op.execute("UPDATE managers SET email = lower(email) WHERE email <> lower(email)")
+    op.execute("UPDATE system_admins SET email = lower(email) WHERE email <> lower(email)")
+
+    for t in TABLES:
+        # NOT VALID + VALIDATE: the scan runs without blocking writes
+        op.execute(f"ALTER TABLE {t} ADD CONSTRAINT ck_{t}_email_lower CHECK (email = lower(email)) NOT VALID")
+        op.execute(f"ALTER TABLE {t} VALIDATE CONSTRAINT ck_{t}_email_lower")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for t in TABLES:
+        op.drop_constraint(f'ck_{t}_email_lower', t, type_='check')
@@ -0,0 +1,57 @@
+"""employee_unavailability (employee_id, day_of_week) index
+
+Revision ID: 7f2c4a9e1b53
+Revises: b8d4f1e6a3c0
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f2c4a9e1b53'
+down_revision: Union[str, Sequence[str], None] = 'b8d4f1e6a3c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The generator reads unavailability per employee and weekday. The composite
+    # index also serves plain employee_id lookups, so the old single-column one
+    # is dropped rather than maintained twice.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_employee_unavailability_employee_day',
+            'employee_unavailability',
+            ['employee_id', 'day_of_week'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_employee_unavailability_employee_id',
+            table_name='employee_unavailability',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_employee_unavailability_employee_id',
+            'employee_unavailability',
+            ['employee_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_employee_unavailability_employee_day',
+            table_name='employee_unavailability',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,47 @@
+"""scheduler covering indexes
+
+Revision ID: 9c1d5e7f2a48
+Revises: 4b7e2c9a1f30
+Create Date: 2026-10-15 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1d5e7f2a48'
+down_revision: Union[str, Sequence[str], None] = '4b7e2c9a1f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY can't run inside BEGIN/COMMIT
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_scheduled_shifts_run_date',
+            'scheduled_shifts',
+            ['schedule_run_id', 'shift_date'],
+            postgresql_include=['employee_id', 'label', 'start_time', 'end_time'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_shift_instances_studio_date_dow',
+            'shift_instances',
+            ['studio_id', 'shift_date', 'day_of_week'],
+            postgresql_include=['label', 'start_time', 'end_time', 'required_count'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_shift_instances_studio_date_dow', table_name='shift_instances', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_scheduled_shifts_run_date', table_name='scheduled_shifts', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,42 @@
+"""schedule_runs (company_id, created_at) index
+
+Revision ID: a4e8c2f7d913
+Revises: 6e1f9b2d8a45
+Create Date: 2026-10-15 23:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e8c2f7d913'
+down_revision: Union[str, Sequence[str], None] = '6e1f9b2d8a45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Serves the per-company "latest run" lookups and the max(created_at)
+    # version stamp the schedule response cache keys on.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_schedule_runs_company_created',
+            'schedule_runs',
+            ['company_id', 'created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_schedule_runs_company_created',
+            table_name='schedule_runs',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -35,8 +35,6 @@ def upgrade() -> None:
         sa.PrimaryKeyConstraint('manager_id'),
         sa.UniqueConstraint('email')
     )
-    op.create_index(op.f('ix_managers_company_id'), 'managers', ['company_id'], unique=False)
-    op.create_index(op.f('ix_managers_email'), 'managers', ['email'], unique=True)
 
     # Create system_admins table
     op.create_table(
@@ -50,14 +48,21 @@ def upgrade() -> None:
         sa.PrimaryKeyConstraint('admin_id'),
         sa.UniqueConstraint('email')
     )
-    op.create_index(op.f('ix_system_admins_email'), 'system_admins', ['email'], unique=True)
+
+    # Build indexes outside the migration transaction so writes aren't blocked
+    # (CREATE INDEX CONCURRENTLY can't run inside BEGIN/COMMIT)
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_managers_company_id'), 'managers', ['company_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_managers_email'), 'managers', ['email'], unique=True, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_system_admins_email'), 'system_admins', ['email'], unique=True, postgresql_concurrently=True, if_not_exists=True)
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    op.drop_index(op.f('ix_system_admins_email'), table_name='system_admins')
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_system_admins_email'), table_name='system_admins', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_managers_email'), table_name='managers', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_managers_company_id'), table_name='managers', postgresql_concurrently=True, if_exists=True)
     op.drop_table('system_admins')
-    op.drop_index(op.f('ix_managers_email'), table_name='managers')
-    op.drop_index(op.f('ix_managers_company_id'), table_name='managers')
     op.drop_table('managers')
 
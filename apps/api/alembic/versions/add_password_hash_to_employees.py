@@ -17,6 +17,57 @@ down_revision: Union[str, Sequence[str], None] = 'c0c4dcc27def'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _backfill_password_hash(password_hash: str, batch_size: int = BACKFILL_BATCH_SIZE) -> None:
+    """
+    Keyset-paginated backfill of employees.password_hash.
+
+    Not called by upgrade() (NULL means "no login yet"), but any future
+    backfill should go through this instead of a single table-wide UPDATE:
+    each batch commits on its own so locks are short-lived.
+    """
+    conn = op.get_bind()
+    last_id = None
+
+    with op.get_context().autocommit_block():
+        while True:
+            if last_id is None:
+                rows = conn.execute(
+                    sa.text(
+                        """
+                        SELECT employee_id FROM employees
+                        WHERE password_hash IS NULL
+                        ORDER BY employee_id
+                        LIMIT :limit
+                        """
+                    ),
+                    {"limit": batch_size},
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    sa.text(
+                        """
+                        SELECT employee_id FROM employees
+                        WHERE password_hash IS NULL AND employee_id > :last_id
+                        ORDER BY employee_id
+                        LIMIT :limit
+                        """
+                    ),
+                    {"last_id": last_id, "limit": batch_size},
+                ).fetchall()
+
+            if not rows:
+                break
+
+            ids = [r[0] for r in rows]
+            conn.execute(
+                sa.text("UPDATE employees SET password_hash = :h WHERE employee_id = ANY(:ids)"),
+                {"h": password_hash, "ids": ids},
+            )
+            last_id = ids[-1]
+
 
 def upgrade() -> None:
     """Upgrade schema."""
@@ -0,0 +1,124 @@
+"""partition scheduled_shifts by month
+
+Revision ID: b8d4f1e6a3c0
+Revises: 5a9e0c3d7b21
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d4f1e6a3c0'
+down_revision: Union[str, Sequence[str], None] = '5a9e0c3d7b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# how far past the current month to pre-create monthly partitions (later ones
+# are created by the app as shifts are written)
+MONTHS_AHEAD = 12
+
+COLUMNS = """
+    scheduled_shift_id uuid DEFAULT gen_random_uuid() NOT NULL,
+    schedule_run_id uuid NOT NULL,
+    employee_id uuid NOT NULL,
+    shift_date date NOT NULL,
+    day_of_week integer NOT NULL,
+    label text NOT NULL,
+    start_time time without time zone NOT NULL,
+    end_time time without time zone NOT NULL,
+    created_at timestamp with time zone DEFAULT statement_timestamp() NOT NULL,
+    studio_id uuid NOT NULL
+"""
+
+COLUMN_NAMES = (
+    "scheduled_shift_id, schedule_run_id, employee_id, shift_date, day_of_week, "
+    "label, start_time, end_time, created_at, studio_id"
+)
+
+
+def _add_month(d: date) -> date:
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+
+
+def _month_starts(first: date, last: date):
+    cur = date(first.year, first.month, 1)
+    while cur <= last:
+        yield cur
+        cur = _add_month(cur)
+
+
+def _create_constraints_and_indexes(pk_columns: str) -> None:
+    op.execute(f"ALTER TABLE scheduled_shifts ADD CONSTRAINT scheduled_shifts_pkey PRIMARY KEY ({pk_columns})")
+    op.execute("ALTER TABLE scheduled_shifts ADD CONSTRAINT scheduled_shifts_employee_id_shift_date_key UNIQUE (employee_id, shift_date)")
+    op.execute("ALTER TABLE scheduled_shifts ADD CONSTRAINT scheduled_shifts_day_of_week_check CHECK (day_of_week >= 0 AND day_of_week <= 6)")
+    op.execute(
+        "ALTER TABLE scheduled_shifts ADD CONSTRAINT scheduled_shifts_employee_id_fkey "
+        "FOREIGN KEY (employee_id) REFERENCES employees(employee_id) ON DELETE CASCADE"
+    )
+    op.execute(
+        "ALTER TABLE scheduled_shifts ADD CONSTRAINT scheduled_shifts_schedule_run_id_fkey "
+        "FOREIGN KEY (schedule_run_id) REFERENCES schedule_runs(schedule_run_id) ON DELETE CASCADE"
+    )
+    op.create_index('ix_scheduled_shifts_company_studio_date', 'scheduled_shifts', ['studio_id', 'shift_date'])
+    op.create_index('ix_scheduled_shifts_employee_date', 'scheduled_shifts', ['employee_id', 'shift_date'])
+    op.create_index('ix_scheduled_shifts_run_id', 'scheduled_shifts', ['schedule_run_id'])
+    op.create_index(
+        'ix_scheduled_shifts_run_date',
+        'scheduled_shifts',
+        ['schedule_run_id', 'shift_date'],
+        postgresql_include=['employee_id', 'label', 'start_time', 'end_time'],
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+
+    # Partitioned tables need the partition key in the PK, so the table is
+    # rebuilt: new partitioned parent -> copy rows -> swap names.
+    op.execute(f"CREATE TABLE scheduled_shifts_partitioned ({COLUMNS}) PARTITION BY RANGE (shift_date)")
+
+    bounds = conn.execute(sa.text("SELECT MIN(shift_date), MAX(shift_date) FROM scheduled_shifts")).first()
+    today = date.today()
+    first = min(bounds[0] or today, today)
+    last = max(bounds[1] or today, today)
+    for _ in range(MONTHS_AHEAD):
+        last = _add_month(last)
+
+    for m in _month_starts(first, last):
+        op.execute(
+            f"CREATE TABLE scheduled_shifts_{m:%Y_%m} PARTITION OF scheduled_shifts_partitioned "
+            f"FOR VALUES FROM ('{m.isoformat()}') TO ('{_add_month(m).isoformat()}')"
+        )
+    # No DEFAULT partition: later months are created on demand by
+    # app.services.shift_partitions.ensure_partitions, which a DEFAULT partition
+    # holding rows for that month would make fail.
+
+    op.execute(
+        f"INSERT INTO scheduled_shifts_partitioned ({COLUMN_NAMES}) "
+        f"SELECT {COLUMN_NAMES} FROM scheduled_shifts"
+    )
+    op.execute("DROP TABLE scheduled_shifts")
+    op.execute("ALTER TABLE scheduled_shifts_partitioned RENAME TO scheduled_shifts")
+
+    # partition key must be part of the primary key
+    _create_constraints_and_indexes("scheduled_shift_id, shift_date")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f"CREATE TABLE scheduled_shifts_plain ({COLUMNS})")
+    op.execute(
+        f"INSERT INTO scheduled_shifts_plain ({COLUMN_NAMES}) "
+        f"SELECT {COLUMN_NAMES} FROM scheduled_shifts"
+    )
+    # dropping the parent drops every partition with it
+    op.execute("DROP TABLE scheduled_shifts")
+    op.execute("ALTER TABLE scheduled_shifts_plain RENAME TO scheduled_shifts")
+
+    _create_constraints_and_indexes("scheduled_shift_id")
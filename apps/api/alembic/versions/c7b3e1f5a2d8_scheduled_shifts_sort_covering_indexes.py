@@ -0,0 +1,86 @@
+"""scheduled_shifts covering indexes in ORDER BY order
+
+Revision ID: c7b3e1f5a2d8
+Revises: a4e8c2f7d913
+Create Date: 2026-10-15 23:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7b3e1f5a2d8'
+down_revision: Union[str, Sequence[str], None] = 'a4e8c2f7d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name -> (per-partition suffix, key columns, included columns)
+INDEXES = {
+    # get_my_schedule / get_schedule_for_employee:
+    # employee_id (+ run) filter, ORDER BY shift_date, start_time
+    'ix_scheduled_shifts_emp_date_start': (
+        'emp_date_start',
+        'employee_id, shift_date, start_time',
+        'label, end_time, scheduled_shift_id, schedule_run_id',
+    ),
+    # get_schedule / team schedule: schedule_run_id filter, same ORDER BY
+    'ix_scheduled_shifts_run_date_start': (
+        'run_date_start',
+        'schedule_run_id, shift_date, start_time',
+        'employee_id, label, end_time',
+    ),
+}
+
+
+def _partitions() -> list[str]:
+    return list(
+        op.get_bind().execute(
+            sa.text(
+                """
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'scheduled_shifts'::regclass
+                ORDER BY c.relname
+                """
+            )
+        ).scalars()
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    partitions = _partitions()
+    # A partitioned table can't be indexed CONCURRENTLY, so: create the parent
+    # index ON ONLY (catalog-only, stays invalid), build each partition's index
+    # concurrently, then attach it. The parent turns valid once all are attached.
+    with op.get_context().autocommit_block():
+        for name, (suffix, columns, include) in INDEXES.items():
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY scheduled_shifts ({columns}) INCLUDE ({include})")
+            for part in partitions:
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {part}_{suffix} ON {part} ({columns}) INCLUDE ({include})"
+                )
+                op.execute(f"ALTER INDEX {name} ATTACH PARTITION {part}_{suffix}")
+
+    # superseded: (employee_id, shift_date) duplicates the unique constraint's
+    # index, and run_date is run_date_start without start_time in the key
+    op.drop_index('ix_scheduled_shifts_employee_date', table_name='scheduled_shifts', if_exists=True)
+    op.drop_index('ix_scheduled_shifts_run_date', table_name='scheduled_shifts', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_scheduled_shifts_employee_date', 'scheduled_shifts', ['employee_id', 'shift_date'])
+    op.create_index(
+        'ix_scheduled_shifts_run_date',
+        'scheduled_shifts',
+        ['schedule_run_id', 'shift_date'],
+        postgresql_include=['employee_id', 'label', 'start_time', 'end_time'],
+    )
+    # dropping a partitioned index drops the attached partition indexes too
+    for name in INDEXES:
+        op.drop_index(name, table_name='scheduled_shifts', if_exists=True)
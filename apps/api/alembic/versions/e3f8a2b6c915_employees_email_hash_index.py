@@ -0,0 +1,39 @@
+"""employees email hash index
+
+Revision ID: e3f8a2b6c915
+Revises: 9c1d5e7f2a48
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f8a2b6c915'
+down_revision: Union[str, Sequence[str], None] = '9c1d5e7f2a48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # employees.email had no index at all; login only ever does equality lookups.
+    # (managers/system_admins already have unique b-tree email indexes.)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_employees_email_hash',
+            'employees',
+            ['email'],
+            postgresql_using='hash',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_employees_email_hash', table_name='employees', postgresql_concurrently=True, if_exists=True)
@@ -1,10 +1,52 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from app.core.env import get_env
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(frozen=True)
+
     database_url: str
     jwt_secret_key: str = "your-secret-key-change-in-production"  # Default for development
 
-    class Config:
-        env_file = ".env"
+    # Connection pools, one per engine. Most routes run on the async engine;
+    # the sync one only serves the remaining sync handlers (generation, some
+    # schedule/company/form routes) and partition creation. Each worker
+    # process can open up to db_pool_size + db_max_overflow +
+    # db_async_pool_size + db_async_max_overflow
+    # connections (45 with these defaults): keep that times the worker count
+    # under Postgres' max_connections (100 by default).
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_async_pool_size: int = 10
+    db_async_max_overflow: int = 20
+    db_pool_recycle: int = 1800  # seconds
+    db_pool_timeout: int = 30  # seconds
+    # psycopg prepares a statement server-side once a connection has run it
+    # this many times (driver default 5); pooled connections keep the plans
+    db_prepare_threshold: int = 2
+
+    # Password hashing cost. Defaults are the OWASP argon2id minimum; dev/test
+    # can lower them (e.g. PASSWORD_HASH_TIME_COST=1, PASSWORD_HASH_MEMORY_COST=1024).
+    # Changing them rehashes each user on their next successful login.
+    password_hash_time_cost: int = 2
+    password_hash_memory_cost: int = 19456  # KiB
+
+    # Peers whose X-Forwarded-For / X-Forwarded-Proto are trusted (comma-separated
+    # IPs/CIDRs, or "*"). Same meaning as uvicorn's --forwarded-allow-ips. On
+    # Render the service is only reachable through its proxy, whose address
+    # isn't fixed, so set FORWARDED_ALLOW_IPS=* there; otherwise every client
+    # shares the proxy's IP (and its login rate limit bucket).
+    forwarded_allow_ips: str = "127.0.0.1"
+
+    @classmethod
+    def settings_customise_sources(cls, settings_cls, init_settings, env_settings, dotenv_settings, file_secret_settings):
+        # .env is parsed (and cached) by get_env(); skip pydantic's own dotenv pass
+        return (init_settings, env_settings, file_secret_settings)
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Validated once per process; the frozen instance is shared by all callers."""
+    get_env()  # load .env into os.environ before pydantic reads it
+    return Settings()
@@ -1,40 +1,63 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
-# Load environment variables once, at import time
-load_dotenv()
+from app.core.engine import get_database_url, make_async_engine, make_engine
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set. Check your .env file.")
+DATABASE_URL = get_database_url()
 
-# ✅ Force SQLAlchemy to use psycopg v3 (required on Render)
-if DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace(
-        "postgresql://",
-        "postgresql+psycopg://",
-        1,
-    )
-
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-)
+engine = make_engine()
+async_engine = make_async_engine()
 
+# expire_on_commit=False: don't reload every attribute with a SELECT after commit.
+# Routes that need server-generated values (ids, created_at, defaults) after a
+# commit must call db.refresh(obj) explicitly.
 SessionLocal = sessionmaker(
     bind=engine,
     autoflush=False,
     autocommit=False,
+    expire_on_commit=False,
+)
+
+# async twin for `async def` routes (auth, admin); lazy loads are not allowed
+# on AsyncSession, so query what you need explicitly
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
 )
 
+# Deterministic constraint/index names so autogenerate diffs stay stable
+NAMING_CONVENTION = {
+    "ix": "ix_%(column_0_label)s",
+    "uq": "uq_%(table_name)s_%(column_0_name)s",
+    "fk": "fk_%(table_name)s_%(referred_table_name)s_%(column_0_name)s",
+    "pk": "pk_%(table_name)s",
+}
+
 class Base(DeclarativeBase):
-    pass
+    metadata = MetaData(naming_convention=NAMING_CONVENTION)
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def bulk_insert(db, model, rows: list[dict]) -> None:
+    """
+    Insert many rows for `model` in one Core executemany.
+
+    With psycopg v3, SQLAlchemy batches this into multi-row INSERTs
+    ("insertmanyvalues"), so N rows cost ~N/1000 round trips instead of N
+    ORM flushes. No-op for an empty list.
+    """
+    if not rows:
+        return
+    db.execute(insert(model), rows)
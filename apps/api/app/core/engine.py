@@ -0,0 +1,71 @@
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import get_settings
+from app.core.env import get_env
+
+
+def get_database_url() -> str:
+    """DATABASE_URL from the cached env, normalized to the psycopg v3 driver."""
+    url = get_env().get("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL is not set. Check apps/api/.env")
+
+    # ✅ Force SQLAlchemy to use psycopg v3 (required on Render)
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return url
+
+
+def make_engine(for_migrations: bool = False) -> Engine:
+    """
+    Single engine factory for the app and Alembic.
+
+    - app: QueuePool sized from Settings (DB_POOL_SIZE, DB_MAX_OVERFLOW)
+    - migrations: NullPool (one-shot) with no statement_timeout so long
+      ALTER TABLEs / backfills don't get killed mid-run
+    """
+    url = get_database_url()
+
+    if for_migrations:
+        return create_engine(
+            url,
+            poolclass=NullPool,
+            pool_pre_ping=True,
+            connect_args={"connect_timeout": 10, "options": "-c statement_timeout=0"},
+        )
+
+    settings = get_settings()
+    return create_engine(
+        url, poolclass=QueuePool, **_pool_kwargs(settings.db_pool_size, settings.db_max_overflow)
+    )
+
+
+def make_async_engine() -> AsyncEngine:
+    """
+    Async engine for `async def` routes.
+
+    Same URL as make_engine(), with its own pool sizing (DB_ASYNC_POOL_SIZE,
+    DB_ASYNC_MAX_OVERFLOW); psycopg v3 ships a native asyncio driver, so
+    SQLAlchemy picks psycopg_async from the same postgresql+psycopg:// URL.
+    """
+    settings = get_settings()
+    return create_async_engine(
+        get_database_url(),
+        poolclass=AsyncAdaptedQueuePool,
+        **_pool_kwargs(settings.db_async_pool_size, settings.db_async_max_overflow),
+    )
+
+
+def _pool_kwargs(pool_size: int, max_overflow: int) -> dict:
+    settings = get_settings()
+    return dict(
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+        pool_timeout=settings.db_pool_timeout,
+        connect_args={"connect_timeout": 10, "prepare_threshold": settings.db_prepare_threshold},
+    )
@@ -0,0 +1,18 @@
+import os
+import types
+from functools import lru_cache
+from typing import Mapping
+
+from dotenv import load_dotenv
+
+
+@lru_cache(maxsize=1)
+def get_env() -> Mapping[str, str]:
+    """
+    Parse .env once per process and return a read-only snapshot of the environment.
+
+    Shared by app startup (database.py, config.py) and alembic/env.py so the
+    same file isn't re-read/re-parsed by every consumer.
+    """
+    load_dotenv()
+    return types.MappingProxyType(dict(os.environ))
@@ -1,43 +1,75 @@
+import importlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from app.core.config import get_settings
 
-from app.routers.employee_form import router as employee_form_router
-from app.routers.companies import router as companies_router
-from app.routers.admin import router as admin_router
-from app.routers.schedule import router as schedule_router
-from app.routers.auth import router as auth_router
-from app.routers.employee_schedule import router as employee_schedule_router
-from app.routers.system_admin import router as system_admin_router
+# (module_path, prefix, tags) — imported lazily at startup so /health and
+# cold starts don't pay for every router's models/schemas/bcrypt up front.
+ROUTERS = [
+    ("app.routers.employee_form", "/employees", ["employee-form"]),
+    ("app.routers.companies", "/companies", ["companies"]),
+    ("app.routers.admin", "/admin", ["admin"]),
+    ("app.routers.schedule", "/schedules", ["schedules"]),
+    ("app.routers.auth", "/auth", ["auth"]),
+    ("app.routers.employee_schedule", "/employee", ["employee-schedule"]),
+    ("app.routers.system_admin", "/system-admin", ["system-admin"]),
+]
 
-app = FastAPI(title="Scheduler API")
 
-ALLOWED_ORIGINS = [
-    # local dev
-    "http://localhost:8081",
-    "http://127.0.0.1:8081",
-    "http://localhost:19006",
-    "http://127.0.0.1:19006",
+def include_routers(app: FastAPI) -> None:
+    # lifespan can run more than once per app (e.g. repeated TestClient use)
+    if getattr(app.state, "routers_included", False):
+        return
+    for module_path, prefix, tags in ROUTERS:
+        mod = importlib.import_module(module_path)
+        app.include_router(mod.router, prefix=prefix, tags=tags)
+    app.state.routers_included = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.services.logos import make_http_client
+
+    include_routers(app)
+    app.state.http = make_http_client()
+    yield
+    # close pooled asyncio connections while the event loop is still running
+    from app.core.database import async_engine
 
+    await app.state.http.aclose()
+    await async_engine.dispose()
+
+
+app = FastAPI(title="Scheduler API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# Compiled once by Starlette; one fullmatch per request instead of a list scan
+ALLOWED_ORIGIN_REGEX = (
+    # local dev
+    r"^http://(localhost|127\.0\.0\.1):(8081|19006)$"
     # Render deployments (yours)
-    "https://otf-scheduler-mobile.onrender.com",
-    "https://otf-scheduler-web.onrender.com",
-]
+    r"|^https://otf-scheduler-(mobile|web)\.onrender\.com$"
+)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=ALLOWED_ORIGINS,
+    allow_origin_regex=ALLOWED_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],  # includes ngrok-skip-browser-warning
 )
 
-app.include_router(employee_form_router, prefix="/employees", tags=["employee-form"])
-app.include_router(companies_router, prefix="/companies", tags=["companies"])
-app.include_router(admin_router, prefix="/admin", tags=["admin"])
-app.include_router(schedule_router, prefix="/schedules", tags=["schedules"])
-app.include_router(auth_router, prefix="/auth", tags=["auth"])
-app.include_router(employee_schedule_router, prefix="/employee", tags=["employee-schedule"])
-app.include_router(system_admin_router, prefix="/system-admin", tags=["system-admin"])
+# Schedule/employee payloads are large, key-repetitive JSON
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Outermost: request.client becomes the real client behind a trusted proxy
+# (the login rate limit keys on it), whatever server options the app runs with
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=get_settings().forwarded_allow_ips)
 
 @app.get("/health")
 def health():
@@ -1,6 +1,6 @@
-import uuid
 from sqlalchemy import Column, Time, SmallInteger, Enum, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
 import enum
 
 from app.core.database import Base
@@ -12,7 +12,7 @@ class AvailabilityType(str, enum.Enum):
 class EmployeeAvailability(Base):
     __tablename__ = "employee_availability"
 
-    availability_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    availability_id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
 
     employee_id = Column(
         UUID(as_uuid=True),
@@ -21,6 +21,14 @@ class EmployeeAvailability(Base):
         index=True,
     )
 
+    # denormalized from employees so company-wide cleanup skips the join
+    company_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("companies.company_id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+
     day_of_week = Column(SmallInteger, nullable=False)  # 0=Sun ... 6=Sat
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
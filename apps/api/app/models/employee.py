@@ -1,14 +1,14 @@
-import uuid
-from sqlalchemy import Column, String, Date, Boolean, DateTime, ForeignKey
+from sqlalchemy import CheckConstraint, Column, String, Date, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
 from app.core.database import Base
+from app.models.principal import PrincipalMixin
 
-class Employee(Base):
+class Employee(PrincipalMixin, Base):
     __tablename__ = "employees"
 
-    employee_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    employee_id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
 
     company_id = Column(
         UUID(as_uuid=True),
@@ -17,12 +17,16 @@ class Employee(Base):
         index=True,
     )
 
-    name = Column(String, nullable=False)
     phone = Column(String, nullable=True)
     email = Column(String, nullable=False)
-    password_hash = Column(String, nullable=True)  # NULL for employees without login yet
 
     hire_date = Column(Date, nullable=True)
-    is_active = Column(Boolean, nullable=False, default=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    __table_args__ = (
+        # login looks employees up by email equality only -> hash index
+        Index("ix_employees_email_hash", "email", postgresql_using="hash"),
+        # one login per email within a company
+        Index("uq_employees_company_email", company_id, func.lower(email), unique=True),
+        # emails are normalized on write, so login can match them exactly
+        CheckConstraint("email = lower(email)", name="ck_employees_email_lower"),
+    )
@@ -1,14 +1,14 @@
-import uuid
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import CheckConstraint, Column, String, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
 from app.core.database import Base
+from app.models.principal import PrincipalMixin
 
-class Manager(Base):
+class Manager(PrincipalMixin, Base):
     __tablename__ = "managers"
 
-    manager_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    manager_id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
 
     company_id = Column(
         UUID(as_uuid=True),
@@ -17,11 +17,9 @@ class Manager(Base):
         index=True,
     )
 
-    name = Column(String, nullable=False)
     email = Column(String, nullable=False, unique=True, index=True)
-    password_hash = Column(String, nullable=True)  # NULL for managers without login yet
-
-    is_active = Column(Boolean, nullable=False, default=True)
-
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    __table_args__ = (
+        # emails are normalized on write, so login can match them exactly
+        CheckConstraint("email = lower(email)", name="ck_managers_email_lower"),
+    )
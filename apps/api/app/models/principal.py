@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy.sql import func
+
+
+class PrincipalMixin:
+    """
+    Columns shared by every login-capable model (Employee, Manager, SystemAdmin).
+
+    Each model keeps its own table and declares its own `email` (uniqueness
+    rules differ per role).
+    """
+
+    name = Column(String, nullable=False)
+    password_hash = Column(String, nullable=True)  # NULL until a login is set up
+
+    is_active = Column(Boolean, nullable=False, default=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -10,6 +10,14 @@ class EmployeePTO(Base):
     pto_id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
     employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.employee_id", ondelete="CASCADE"), nullable=False, index=True)
 
+    # denormalized from employees so company-wide cleanup skips the join
+    company_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("companies.company_id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
     note = Column(Text, nullable=True)
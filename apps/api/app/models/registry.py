@@ -0,0 +1,24 @@
+"""
+Single place that imports every model so Base.metadata is fully populated.
+
+Import this (for side effects) wherever the complete metadata is needed,
+e.g. alembic/env.py for autogenerate.
+"""
+from app.models.company import Company  # noqa: F401
+from app.models.studio import Studio  # noqa: F401
+from app.models.employee import Employee  # noqa: F401
+from app.models.role import Role  # noqa: F401
+from app.models.employee_role import EmployeeRole  # noqa: F401
+from app.models.manager import Manager  # noqa: F401
+from app.models.system_admin import SystemAdmin  # noqa: F401
+from app.models.availability import EmployeeAvailability  # noqa: F401
+from app.models.unavailability import EmployeeUnavailability  # noqa: F401
+from app.models.time_off import EmployeeTimeOff  # noqa: F401
+from app.models.pto import EmployeePTO  # noqa: F401
+from app.models.rules import EmployeeRule  # noqa: F401
+from app.models.shift_template import ShiftTemplate  # noqa: F401
+from app.models.shift_instances import ShiftInstance  # noqa: F401
+from app.models.schedule_runs import ScheduleRun  # noqa: F401
+from app.models.scheduled_shifts import ScheduledShift  # noqa: F401
+from app.models.schedule_audit_shift import ScheduleAuditShift  # noqa: F401
+from app.models.schedule_audit_canidate import ScheduleAuditCandidate  # noqa: F401
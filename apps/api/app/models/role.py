@@ -1,4 +1,3 @@
-import uuid
 from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
@@ -8,7 +7,7 @@ from app.core.database import Base
 class Role(Base):
     __tablename__ = "roles"
 
-    role_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    role_id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
 
     company_id = Column(
         UUID(as_uuid=True),
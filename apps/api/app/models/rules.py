@@ -1,4 +1,3 @@
-import uuid
 from sqlalchemy import Column, String, Date, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
@@ -8,7 +7,7 @@ from app.core.database import Base
 class EmployeeRule(Base):
     __tablename__ = "employee_rules"
 
-    rule_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    rule_id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
 
     employee_id = Column(
         UUID(as_uuid=True),
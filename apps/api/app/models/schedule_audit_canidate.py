@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, Time, Integer, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Date, Time, Integer, Text, ForeignKey, Boolean, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.types import DateTime
@@ -23,4 +23,4 @@ class ScheduleAuditCandidate(Base):
     rejection_reason = Column(Text, nullable=True)
     details = Column(JSONB, nullable=True)
 
-    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=text("statement_timestamp()"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, ForeignKey
+from sqlalchemy import Column, Date, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.sql.sqltypes import DateTime
@@ -21,3 +21,8 @@ class ScheduleRun(Base):
     month_end = Column(Date, nullable=False)
 
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # latest-run lookups and the schedule cache's max(created_at) stamp
+        Index("ix_schedule_runs_company_created", "company_id", "created_at"),
+    )
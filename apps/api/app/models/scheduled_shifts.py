@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, ForeignKey, Integer, Text, Time
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, Text, Time, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.sql.sqltypes import DateTime
@@ -19,11 +19,36 @@ class ScheduledShift(Base):
     employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.employee_id", ondelete="CASCADE"), nullable=False)
     studio_id = Column(UUID(as_uuid=True), ForeignKey("studios.studio_id", ondelete="CASCADE"), nullable=False)
 
-    shift_date = Column(Date, nullable=False)
+    # partition key; Postgres requires it in the primary key of a partitioned table
+    shift_date = Column(Date, primary_key=True, nullable=False)
     day_of_week = Column(Integer, nullable=False)
 
     label = Column(Text, nullable=False)
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
 
-    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=text("statement_timestamp()"))
+
+    __table_args__ = (
+        # covering indexes in ORDER BY shift_date, start_time order for
+        # "shifts in run X" and "employee's shifts" (index-only, no sort)
+        Index(
+            "ix_scheduled_shifts_run_date_start",
+            "schedule_run_id",
+            "shift_date",
+            "start_time",
+            postgresql_include=["employee_id", "label", "end_time"],
+        ),
+        Index(
+            "ix_scheduled_shifts_emp_date_start",
+            "employee_id",
+            "shift_date",
+            "start_time",
+            postgresql_include=["label", "end_time", "scheduled_shift_id", "schedule_run_id"],
+        ),
+        # monthly range partitions are created by migration b8d4f1e6a3c0
+        {"postgresql_partition_by": "RANGE (shift_date)"},
+    )
+
+    # scheduled_shift_id alone still identifies a row, so db.get() keeps working
+    __mapper_args__ = {"primary_key": [scheduled_shift_id]}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, ForeignKey, Integer, Text, Time
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, Text, Time, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.sql.sqltypes import DateTime
@@ -29,4 +29,15 @@ class ShiftInstance(Base):
     required_count = Column(Integer, nullable=False)
     status = Column(Text, nullable=False, server_default="draft")
 
-    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=text("statement_timestamp()"))
+
+    __table_args__ = (
+        # covering index for the generator's per-studio month demand scan
+        Index(
+            "ix_shift_instances_studio_date_dow",
+            "studio_id",
+            "shift_date",
+            "day_of_week",
+            postgresql_include=["label", "start_time", "end_time", "required_count"],
+        ),
+    )
@@ -1,20 +1,19 @@
-import uuid
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import CheckConstraint, Column, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
 from app.core.database import Base
+from app.models.principal import PrincipalMixin
 
-class SystemAdmin(Base):
+class SystemAdmin(PrincipalMixin, Base):
     __tablename__ = "system_admins"
 
-    admin_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    admin_id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
 
-    name = Column(String, nullable=False)
     email = Column(String, nullable=False, unique=True, index=True)
     password_hash = Column(String, nullable=False)  # Required for system admins
 
-    is_active = Column(Boolean, nullable=False, default=True)
-
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-
+    __table_args__ = (
+        # emails are normalized on write, so login can match them exactly
+        CheckConstraint("email = lower(email)", name="ck_system_admins_email_lower"),
+    )
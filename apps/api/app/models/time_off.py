@@ -1,4 +1,3 @@
-import uuid
 from sqlalchemy import Column, Date, String, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
@@ -8,7 +7,7 @@ from app.core.database import Base
 class EmployeeTimeOff(Base):
     __tablename__ = "employee_time_off"
 
-    time_off_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    time_off_id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
 
     employee_id = Column(
         UUID(as_uuid=True),
@@ -17,6 +16,14 @@ class EmployeeTimeOff(Base):
         index=True,
     )
 
+    # denormalized from employees so company-wide cleanup skips the join
+    company_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("companies.company_id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
 
@@ -1,18 +1,25 @@
-import uuid
-from sqlalchemy import Column, Time, SmallInteger, String, ForeignKey
+from sqlalchemy import Column, Time, SmallInteger, String, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
 
 from app.core.database import Base
 
 class EmployeeUnavailability(Base):
     __tablename__ = "employee_unavailability"
 
-    unavailability_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    unavailability_id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
 
     employee_id = Column(
         UUID(as_uuid=True),
         ForeignKey("employees.employee_id", ondelete="CASCADE"),
         nullable=False,
+    )
+
+    # denormalized from employees so company-wide cleanup skips the join
+    company_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("companies.company_id", ondelete="CASCADE"),
+        nullable=True,
         index=True,
     )
 
@@ -21,3 +28,8 @@ class EmployeeUnavailability(Base):
     end_time = Column(Time, nullable=False)
 
     reason = Column(String, nullable=True)
+
+    __table_args__ = (
+        # per-employee, per-weekday reads; also covers employee_id-only lookups
+        Index("ix_employee_unavailability_employee_day", "employee_id", "day_of_week"),
+    )
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import FileResponse, Response
-from sqlalchemy.orm import Session
-from sqlalchemy import select, delete, text
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from uuid import UUID
-from pathlib import Path
 
-from app.core.database import get_db
-from app.routers.auth import get_current_manager, get_current_system_admin
+from app.core.database import get_async_db
+from app.services.company_scope import company_fk_404, require_company
+from app.services.logos import company_logo_response
+from app.routers.auth import get_current_manager, get_current_system_admin, resolve_token
 from app.schemas.admin import (
     CompanyCreate,
     RoleCreate,
@@ -23,40 +25,28 @@ from app.models.employee_role import EmployeeRole
 from app.models.manager import Manager
 from app.models.system_admin import SystemAdmin
 
-from app.schemas.employees import EmployeeOut
-from sqlalchemy import text
+from app.schemas.employees import FORM_BASE_URL, EmployeeOut
 from typing import Union, Optional
 
 router = APIRouter()
 security = HTTPBearer()
 
-FORM_BASE_URL = "http://localhost:8081"
-
-# ✅ apps/api/app/routers/admin.py -> parents[3] == apps/
-# so this points to: apps/mobile/assets/logos
-LOGOS_DIR = (Path(__file__).resolve().parents[3] / "mobile" / "assets" / "logos").resolve()
-
 
 # Helper function to allow either manager or system admin
-def get_current_manager_or_admin(
+async def get_current_manager_or_admin(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> tuple[Union[Manager, SystemAdmin], Optional[UUID]]:
     """Get current user (manager or system admin) and their company_id if manager."""
-    from app.routers.auth import decode_token
-    
-    token = credentials.credentials
-    payload = decode_token(token)
-    role = payload.get("role")
-    user_id = payload.get("sub")
-    
+    role, principal = await resolve_token(credentials.credentials, db)
+
     if role == "manager":
-        manager = db.get(Manager, UUID(user_id))
+        manager = principal
         if not manager or not manager.is_active:
             raise HTTPException(status_code=401, detail="Manager not found or inactive")
         return (manager, manager.company_id)
     elif role == "system_admin":
-        admin = db.get(SystemAdmin, UUID(user_id))
+        admin = principal
         if not admin or not admin.is_active:
             raise HTTPException(status_code=401, detail="System admin not found or inactive")
         return (admin, None)
@@ -66,22 +56,22 @@ def get_current_manager_or_admin(
 
 # --- Companies ---
 @router.post("/companies")
-def create_company(
+async def create_company(
     payload: CompanyCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """Create a new company (system admin only)."""
     c = Company(name=payload.name, timezone=payload.timezone)
     db.add(c)
-    db.commit()
-    db.refresh(c)
+    await db.commit()
+    await db.refresh(c)
     return c
 
 
 @router.get("/companies")
-def list_companies(
-    db: Session = Depends(get_db),
+async def list_companies(
+    db: AsyncSession = Depends(get_async_db),
     user_and_company: tuple[Union[Manager, SystemAdmin], Optional[UUID]] = Depends(get_current_manager_or_admin),
 ):
     """List companies. Managers see only their company."""
@@ -89,149 +79,67 @@ def list_companies(
     
     # If manager, return only their company
     if company_id:
-        company = db.get(Company, company_id)
+        company = await db.get(Company, company_id)
         return [company] if company else []
     # System admin can see all (but this endpoint is for managers, so they'd use /system-admin/companies)
     return []
 
 
 @router.get("/companies/all")
-def list_all_companies(
-    db: Session = Depends(get_db),
+async def list_all_companies(
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """List all companies (system admin only)."""
-    return db.execute(select(Company)).scalars().all()
+    return (await db.execute(select(Company))).scalars().all()
 
 
 @router.get("/companies/{company_id}", response_model=CompanyOut)
-def get_company(company_id: UUID, db: Session = Depends(get_db)):
-    c = db.get(Company, company_id)
+async def get_company(company_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    c = await db.get(Company, company_id)
     if not c:
         raise HTTPException(status_code=404, detail="Company not found")
     return c
 
 
 @router.get("/companies/{company_id}/logo")
-def get_company_logo(company_id: UUID, db: Session = Depends(get_db)):
-    """
-    Returns the company's logo image.
-
-    Preferred DB value:
-      logo_url = "otf.png"   (a filename inside apps/mobile/assets/logos)
-
-    Optional:
-      logo_url = "https://..." (ONLY if it returns an image content-type)
-    """
-    company = db.get(Company, company_id)
+async def get_company_logo(company_id: UUID, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Returns the company's logo image (see services.logos for the logo_url forms)."""
+    company = await db.get(Company, company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
 
     if not company.logo_url:
         raise HTTPException(status_code=404, detail="Company logo not set")
 
-    val = company.logo_url.strip()
-
-    # --- Case A: Local filename in apps/mobile/assets/logos ---
-    if not val.startswith("http://") and not val.startswith("https://") and not val.startswith("/"):
-        # prevent path traversal: only allow filenames
-        if "/" in val or "\\" in val:
-            raise HTTPException(status_code=400, detail="Invalid logo filename")
-
-        logo_path = (LOGOS_DIR / val).resolve()
-
-        # ensure the resolved path is still under LOGOS_DIR
-        if not str(logo_path).startswith(str(LOGOS_DIR)):
-            raise HTTPException(status_code=400, detail="Invalid logo path")
-
-        if not logo_path.exists() or not logo_path.is_file():
-            raise HTTPException(status_code=404, detail=f"Logo file not found: {val}")
-
-        ext = logo_path.suffix.lower()
-        media = {
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".webp": "image/webp",
-        }.get(ext, "application/octet-stream")
-
-        return FileResponse(str(logo_path), media_type=media)
-
-    # --- Case B: Absolute local file path (works locally; not ideal long-term) ---
-    if val.startswith("/"):
-        logo_path = Path(val).resolve()
-        if not logo_path.exists() or not logo_path.is_file():
-            raise HTTPException(status_code=404, detail=f"Logo file not found: {logo_path}")
-
-        ext = logo_path.suffix.lower()
-        media = {
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".webp": "image/webp",
-        }.get(ext, "application/octet-stream")
-
-        return FileResponse(str(logo_path), media_type=media)
-
-    # --- Case C: Remote URL (only if it actually returns an image) ---
-    # We avoid adding a hard dependency on requests unless you truly need remote logos.
-    try:
-        import requests  # type: ignore
-    except Exception:
-        raise HTTPException(
-            status_code=500,
-            detail="Remote logo_url requires 'requests'. Prefer using a local filename like 'otf.png'.",
-        )
-
-    try:
-        r = requests.get(val, timeout=10, allow_redirects=True)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Failed to fetch logo: {e}")
-
-    if r.status_code != 200:
-        raise HTTPException(status_code=502, detail=f"Logo fetch failed with status {r.status_code}")
-
-    content_type = (r.headers.get("content-type") or "").lower()
-
-    # ✅ if we got HTML, that's not a logo — reject it
-    if "image/" not in content_type:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Remote logo_url did not return an image (content-type={content_type})",
-        )
-
-    return Response(content=r.content, media_type=content_type)
+    return await company_logo_response(request, company.logo_url)
 
 
 # --- Roles ---
 @router.post("/companies/{company_id}/roles")
-def create_role(company_id: UUID, payload: RoleCreate, db: Session = Depends(get_db)):
-    company = db.get(Company, company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-
+async def create_role(company_id: UUID, payload: RoleCreate, db: AsyncSession = Depends(get_async_db)):
     r = Role(company_id=company_id, name=payload.name)
-    db.add(r)
-    db.commit()
-    db.refresh(r)
+    async with company_fk_404(db):
+        db.add(r)
+        await db.commit()
+    await db.refresh(r)
     return r
 
 
 @router.get("/companies/{company_id}/roles")
-def list_roles(company_id: UUID, db: Session = Depends(get_db)):
-    company = db.get(Company, company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-
-    return db.execute(select(Role).where(Role.company_id == company_id)).scalars().all()
+async def list_roles(company_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    roles = (await db.execute(select(Role).where(Role.company_id == company_id))).scalars().all()
+    if not roles:
+        await require_company(db, company_id)
+    return roles
 
 
 # --- Employees ---
 @router.post("/companies/{company_id}/employees", response_model=EmployeeOut)
-def create_employee(
+async def create_employee(
     company_id: UUID,
     payload: EmployeeCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_and_company: tuple[Union[Manager, SystemAdmin], Optional[UUID]] = Depends(get_current_manager_or_admin),
 ):
     """Create employee. Managers can only add to their own company."""
@@ -240,39 +148,38 @@ def create_employee(
     # Managers can only add employees to their own company
     if user_company_id and user_company_id != company_id:
         raise HTTPException(status_code=403, detail="You can only add employees to your own company")
-    
-    company = db.get(Company, company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
 
-    e = Employee(
-        company_id=company_id,
-        name=payload.name,
-        email=str(payload.email),
-        phone=payload.phone,
-        hire_date=payload.hire_date,
-        is_active=True,
-    )
-    db.add(e)
-    db.commit()
-    db.refresh(e)
-
-    return EmployeeOut(
-        employee_id=str(e.employee_id),
-        company_id=str(e.company_id),
-        name=e.name,
-        email=e.email,
-        phone=e.phone,
-        hire_date=e.hire_date,
-        is_active=e.is_active,
-        form_url=f"{FORM_BASE_URL}/form/{e.employee_id}",
-    )
+    # INSERT ... RETURNING hands back the server-generated id/created_at in
+    # the same round trip (no refresh SELECT afterwards); a duplicate email in
+    # the company hits uq_employees_company_email and returns no row
+    async with company_fk_404(db):
+        e = (
+            await db.execute(
+                pg_insert(Employee)
+                .values(
+                    company_id=company_id,
+                    name=payload.name,
+                    email=payload.email,
+                    phone=payload.phone,
+                    hire_date=payload.hire_date,
+                    is_active=True,
+                )
+                .on_conflict_do_nothing(index_elements=[Employee.company_id, func.lower(Employee.email)])
+                .returning(Employee)
+            )
+        ).scalar_one_or_none()
+        if e is None:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Employee with this email already exists")
+        await db.commit()
+
+    return e
 
 
-@router.get("/companies/{company_id}/employees", response_model=list[EmployeeOut])
-def list_employees(
+@router.get("/companies/{company_id}/employees", response_model=None, responses={200: {"model": list[EmployeeOut]}})
+async def list_employees(
     company_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_and_company: tuple[Union[Manager, SystemAdmin], Optional[UUID]] = Depends(get_current_manager_or_admin),
 ):
     """List employees. Managers can only see their own company's employees."""
@@ -281,243 +188,186 @@ def list_employees(
     # Managers can only see their own company's employees
     if user_company_id and user_company_id != company_id:
         raise HTTPException(status_code=403, detail="You can only view employees from your own company")
-    
-    company = db.get(Company, company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
 
-    emps = db.execute(select(Employee).where(Employee.company_id == company_id)).scalars().all()
-
-    out: list[EmployeeOut] = []
-    for e in emps:
-        out.append(
-            EmployeeOut(
-                employee_id=str(e.employee_id),
-                company_id=str(e.company_id),
-                name=e.name,
-                email=e.email,
-                phone=e.phone,
-                hire_date=e.hire_date,
-                is_active=e.is_active,
-                form_url=f"{FORM_BASE_URL}/form/{e.employee_id}",
-            )
+    # Plain column rows (no ORM hydration), serialized by orjson without a
+    # per-row EmployeeOut validation; the EmployeeOut defaults are filled in here.
+    rows = (
+        await db.execute(
+            select(
+                Employee.employee_id,
+                Employee.company_id,
+                Employee.name,
+                Employee.email,
+                Employee.phone,
+                Employee.hire_date,
+                Employee.is_active,
+            ).where(Employee.company_id == company_id)
         )
-    return out
+    ).mappings().all()
+
+    if not rows:
+        await require_company(db, company_id)
+    return ORJSONResponse(
+        [
+            {
+                **r,
+                "last_availability_submit_at": None,
+                "availability_status": "missing",
+                "availability_status_reason": None,
+                "form_url": f"{FORM_BASE_URL}/form/{r['employee_id']}",
+            }
+            for r in rows
+        ]
+    )
 
 
 # --- Assign roles to an employee ---
 @router.put("/employees/{employee_id}/roles")
-def set_employee_roles(employee_id: UUID, payload: EmployeeRoleAssign, db: Session = Depends(get_db)):
-    emp = db.get(Employee, employee_id)
+async def set_employee_roles(employee_id: UUID, payload: EmployeeRoleAssign, db: AsyncSession = Depends(get_async_db)):
+    emp = await db.get(Employee, employee_id)
     if not emp:
         raise HTTPException(status_code=404, detail="Employee not found")
 
-    db.execute(delete(EmployeeRole).where(EmployeeRole.employee_id == employee_id))
+    await db.execute(delete(EmployeeRole).where(EmployeeRole.employee_id == employee_id))
 
-    for role_id in payload.role_ids:
-        db.add(EmployeeRole(employee_id=employee_id, role_id=role_id))
+    # one multi-row INSERT; repeated role_ids in the payload are ignored
+    # instead of tripping the (employee_id, role_id) primary key
+    role_ids = list(dict.fromkeys(payload.role_ids))
+    if role_ids:
+        await db.execute(
+            pg_insert(EmployeeRole)
+            .values([{"employee_id": employee_id, "role_id": role_id} for role_id in role_ids])
+            .on_conflict_do_nothing()
+        )
 
-    db.commit()
-    return {"status": "ok", "role_count": len(payload.role_ids)}
+    await db.commit()
+    return {"status": "ok", "role_count": len(role_ids)}
 
 
 # ============================================================
 # ✅ NEW: Clear ALL form submissions for a company (1 click)
 # ============================================================
 @router.post("/companies/{company_id}/forms/clear")
-def clear_company_form_submissions(company_id: UUID, db: Session = Depends(get_db)):
+async def clear_company_form_submissions(company_id: UUID, db: AsyncSession = Depends(get_async_db)):
     """
     Clears EVERYTHING employees submitted via the forms for a given company.
 
-    Deletes rows (for employees in company) from:
+    Deletes rows (for the company) from:
       - employee_availability
       - employee_unavailability
       - employee_time_off
       - employee_pto
       - employee_availability_submissions
     """
-    company = db.get(Company, company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-
-    deletes = {
-        "employee_availability": """
-            DELETE FROM employee_availability ea
-            USING employees e
-            WHERE ea.employee_id = e.employee_id
-              AND e.company_id = :company_id
-        """,
-        "employee_unavailability": """
-            DELETE FROM employee_unavailability eu
-            USING employees e
-            WHERE eu.employee_id = e.employee_id
-              AND e.company_id = :company_id
-        """,
-        "employee_time_off": """
-            DELETE FROM employee_time_off eto
-            USING employees e
-            WHERE eto.employee_id = e.employee_id
-              AND e.company_id = :company_id
-        """,
-        "employee_pto": """
-            DELETE FROM employee_pto ep
-            USING employees e
-            WHERE ep.employee_id = e.employee_id
-              AND e.company_id = :company_id
-        """,
-        "employee_availability_submissions": """
-            DELETE FROM employee_availability_submissions eas
-            USING employees e
-            WHERE eas.employee_id = e.employee_id
-              AND e.company_id = :company_id
-        """,
-    }
+    # One statement, one round trip: each DELETE is a data-modifying CTE and
+    # the final SELECT returns the company check plus every table's rowcount.
+    # An unknown company simply deletes nothing, so it's reported afterwards.
+    tables = [
+        "employee_availability",
+        "employee_unavailability",
+        "employee_time_off",
+        "employee_pto",
+        "employee_availability_submissions",
+    ]
+    ctes = ",\n".join(
+        f"""
+        d_{t} AS (
+            DELETE FROM {t}
+            WHERE company_id = :company_id
+            RETURNING 1
+        )"""
+        for t in tables
+    )
+    sql = f"""
+        WITH{ctes}
+        SELECT
+            EXISTS (SELECT 1 FROM companies WHERE company_id = :company_id),
+            {", ".join(f"(SELECT count(*) FROM d_{t})" for t in tables)}
+    """
 
-    counts: dict[str, int] = {}
     try:
-        for table_name, sql in deletes.items():
-            res = db.execute(text(sql), {"company_id": str(company_id)})
-            counts[table_name] = int(getattr(res, "rowcount", 0) or 0)
-
-        db.commit()
-        return {
-            "company_id": str(company_id),
-            "deleted": counts,
-            "total_deleted": sum(counts.values()),
-        }
+        company_exists, *deleted = (await db.execute(text(sql), {"company_id": str(company_id)})).one()
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to clear form submissions: {str(e)}")
 
+    if not company_exists:
+        raise HTTPException(status_code=404, detail="Company not found")
+
+    counts: dict[str, int] = dict(zip(tables, map(int, deleted)))
+    return {
+        "company_id": str(company_id),
+        "deleted": counts,
+        "total_deleted": sum(counts.values()),
+    }
+
 
 # ============================================================
 # ✅ NEW: Clear schedule artifacts (for faster testing)
 # ============================================================
 @router.post("/companies/{company_id}/schedule/clear")
-def clear_company_schedule_artifacts(company_id: UUID, db: Session = Depends(get_db)):
+async def clear_company_schedule_artifacts(company_id: UUID, db: AsyncSession = Depends(get_async_db)):
     """
     Clears all schedule runs + scheduled shifts + audits for a given company.
 
     This speeds up testing since you can regenerate clean runs quickly.
     """
-    company = db.get(Company, company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-
     try:
-        # Delete scheduled shifts for any run belonging to this company
-        res1 = db.execute(
-            text(
-                """
-                DELETE FROM scheduled_shifts ss
-                USING schedule_runs sr
-                WHERE ss.schedule_run_id = sr.schedule_run_id
-                  AND sr.company_id = :company_id
-                """
-            ),
-            {"company_id": str(company_id)},
-        )
-
-        # Delete audits for runs belonging to this company
-        res2 = db.execute(
-            text(
-                """
-                DELETE FROM schedule_audit_candidate sac
-                USING schedule_runs sr
-                WHERE sac.schedule_run_id = sr.schedule_run_id
-                  AND sr.company_id = :company_id
-                """
-            ),
-            {"company_id": str(company_id)},
-        )
-        res3 = db.execute(
-            text(
-                """
-                DELETE FROM schedule_audit_shift sas
-                USING schedule_runs sr
-                WHERE sas.schedule_run_id = sr.schedule_run_id
-                  AND sr.company_id = :company_id
-                """
-            ),
-            {"company_id": str(company_id)},
-        )
-
-        # Finally delete the runs
-        res4 = db.execute(
-            text("DELETE FROM schedule_runs WHERE company_id = :company_id"),
-            {"company_id": str(company_id)},
-        )
+        # Company check, shifts, audits and the runs themselves in a single statement
+        row = (
+            await db.execute(
+                text(
+                    """
+                    WITH runs AS (
+                        SELECT schedule_run_id FROM schedule_runs WHERE company_id = :company_id
+                    ),
+                    d_shifts AS (
+                        DELETE FROM scheduled_shifts
+                        WHERE schedule_run_id IN (SELECT schedule_run_id FROM runs)
+                        RETURNING 1
+                    ),
+                    d_candidate AS (
+                        DELETE FROM schedule_audit_candidate
+                        WHERE schedule_run_id IN (SELECT schedule_run_id FROM runs)
+                        RETURNING 1
+                    ),
+                    d_shift_audit AS (
+                        DELETE FROM schedule_audit_shift
+                        WHERE schedule_run_id IN (SELECT schedule_run_id FROM runs)
+                        RETURNING 1
+                    ),
+                    d_runs AS (
+                        DELETE FROM schedule_runs
+                        WHERE schedule_run_id IN (SELECT schedule_run_id FROM runs)
+                        RETURNING 1
+                    )
+                    SELECT
+                        EXISTS (SELECT 1 FROM companies WHERE company_id = :company_id),
+                        (SELECT count(*) FROM d_shifts),
+                        (SELECT count(*) FROM d_candidate),
+                        (SELECT count(*) FROM d_shift_audit),
+                        (SELECT count(*) FROM d_runs)
+                    """
+                ),
+                {"company_id": str(company_id)},
+            )
+        ).one()
 
-        db.commit()
-        return {
-            "company_id": str(company_id),
-            "deleted": {
-                "scheduled_shifts": int(getattr(res1, "rowcount", 0) or 0),
-                "schedule_audit_candidate": int(getattr(res2, "rowcount", 0) or 0),
-                "schedule_audit_shift": int(getattr(res3, "rowcount", 0) or 0),
-                "schedule_runs": int(getattr(res4, "rowcount", 0) or 0),
-            },
-        }
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to clear schedule artifacts: {str(e)}")
 
+    if not row[0]:
+        raise HTTPException(status_code=404, detail="Company not found")
 
-@router.post("/migrate/add-password-hash")
-def run_password_hash_migration(db: Session = Depends(get_db)):
-    """
-    Run migration to add password_hash column to employees table.
-    This endpoint can be called once to add the column.
-    Safe to call multiple times (uses IF NOT EXISTS).
-    """
-    try:
-        # Check if column already exists
-        check_result = db.execute(
-            text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'employees' AND column_name = 'password_hash'
-            """)
-        ).fetchone()
-
-        if check_result:
-            return {
-                "message": "Column 'password_hash' already exists",
-                "status": "skipped"
-            }
-
-        # Add the column
-        db.execute(text("ALTER TABLE employees ADD COLUMN password_hash VARCHAR"))
-        db.commit()
-
-        # Verify it was added
-        verify_result = db.execute(
-            text("""
-                SELECT column_name, data_type, is_nullable 
-                FROM information_schema.columns 
-                WHERE table_name = 'employees' AND column_name = 'password_hash'
-            """)
-        ).fetchone()
-
-        if verify_result:
-            return {
-                "message": "Migration successful",
-                "status": "completed",
-                "column": {
-                    "name": verify_result[0],
-                    "type": verify_result[1],
-                    "nullable": verify_result[2] == "YES"
-                }
-            }
-        else:
-            raise Exception("Column was not created")
-
-    except Exception as e:
-        db.rollback()
-        # If error is "column already exists", that's okay
-        if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-            return {
-                "message": "Column already exists",
-                "status": "skipped"
-            }
-        raise HTTPException(status_code=500, detail=f"Migration failed: {str(e)}")
+    return {
+        "company_id": str(company_id),
+        "deleted": {
+            "scheduled_shifts": int(row[1]),
+            "schedule_audit_candidate": int(row[2]),
+            "schedule_audit_shift": int(row[3]),
+            "schedule_runs": int(row[4]),
+        },
+    }
@@ -1,38 +1,210 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.engine import Row
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from argon2 import PasswordHasher, Type
+from argon2.exceptions import InvalidHashError, VerificationError
+import bcrypt
+from functools import lru_cache
 from typing import Optional
 
-from app.core.database import get_db
-from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.config import get_settings
 from app.models.employee import Employee
 from app.models.manager import Manager
 from app.models.system_admin import SystemAdmin
+from app.schemas.common import LowerEmailStr
 
 router = APIRouter()
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_settings = get_settings()
+# argon2id for new hashes; legacy bcrypt hashes still verify and are rehashed
+# to argon2 on the next successful login, as are argon2 hashes made with
+# different cost settings.
+_hasher = PasswordHasher(
+    time_cost=_settings.password_hash_time_cost,
+    memory_cost=_settings.password_hash_memory_cost,
+    parallelism=1,
+    type=Type.ID,
+)
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+# Hashing gets its own threads (argon2 and bcrypt release the GIL), sized to
+# the cores it can actually use, so a burst of logins queues here instead of
+# occupying the shared anyio threadpool that sync endpoints run on.
+_HASH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="pwhash")
+
+
+async def _run_hash(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_HASH_POOL, fn, *args)
 
 # JWT settings
-SECRET_KEY = settings.jwt_secret_key
+SECRET_KEY = _settings.jwt_secret_key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# raw token -> (expires_at, role, user UUID). Tokens live for days and
+# /auth/me is polled, so a hit skips jwt.decode.
+TOKEN_CACHE_TTL = 60  # seconds
+TOKEN_CACHE_MAX = 10_000
+_token_cache: dict[str, tuple[float, str, UUID]] = {}
+
+# (role, user UUID) -> (expires_at, principal). Shared by every token a user
+# holds, so a hit skips the principal SELECT even right after a fresh login.
+# Principals are plain column Rows (see PRINCIPAL_STMTS), never ORM instances:
+# a cached instance would stay attached to the session that loaded it and be
+# expired by that session's rollback. Per process: other workers may serve a
+# stale principal for up to the TTL after forget_principal().
+PRINCIPAL_CACHE_TTL = 30  # seconds
+PRINCIPAL_CACHE_MAX = 50_000
+_principal_cache: dict[tuple[str, UUID], tuple[float, Row]] = {}
+
+# (client host, lowercased email) -> (window_start, attempts). Every attempt,
+# hit or miss, costs a full hash, so cap attempts per source and account, and
+# (under the key (client host, None)) per source across all accounts, so one
+# host can't spray emails. The host is the real client address: main.py
+# resolves it from X-Forwarded-For for trusted proxies. Fixed window, per
+# process. Kept in window_start order, so expired windows are always at the
+# front and are the first to go when the table is full.
+LOGIN_RATE_LIMIT = 10
+LOGIN_HOST_RATE_LIMIT = 100  # roomy: a gym's staff may share one NAT address
+LOGIN_RATE_WINDOW = 60  # seconds
+LOGIN_RATE_MAX_KEYS = 50_000
+_login_attempts: OrderedDict[tuple[str, Optional[str]], tuple[float, int]] = OrderedDict()
+
+# What request handlers read off the current principal: its id, company, name,
+# email and active flag, as an immutable Row keyed like the model attributes.
+PRINCIPAL_STMTS = {
+    "employee": select(
+        Employee.employee_id,
+        Employee.company_id,
+        Employee.name,
+        Employee.email,
+        Employee.is_active,
+    ).where(Employee.employee_id == bindparam("user_id")),
+    "manager": select(
+        Manager.manager_id,
+        Manager.company_id,
+        Manager.name,
+        Manager.email,
+        Manager.is_active,
+    ).where(Manager.manager_id == bindparam("user_id")),
+    "system_admin": select(
+        SystemAdmin.admin_id,
+        SystemAdmin.name,
+        SystemAdmin.email,
+        SystemAdmin.is_active,
+    ).where(SystemAdmin.admin_id == bindparam("user_id")),
+}
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password.startswith("$argon2"):
+        try:
+            return _hasher.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
+    if hashed_password.startswith(BCRYPT_PREFIXES):
+        try:
+            return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+        except ValueError:
+            return False
+    return False
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    return _hasher.hash(password)
+
+
+async def hash_password(password: str) -> str:
+    """
+    get_password_hash on _HASH_POOL, so a burst of account creation hashes at
+    most one password per core and never on the event loop.
+    """
+    return await _run_hash(get_password_hash, password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """(ok, replacement hash or None) — bcrypt or stale argon2 params get a new hash."""
+    if not verify_password(password, hashed_password):
+        return False, None
+    if hashed_password.startswith("$argon2") and not _hasher.check_needs_rehash(hashed_password):
+        return True, None
+    return True, get_password_hash(password)
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    return get_password_hash("not-a-real-password")
+
+
+def _verify_dummy(password: str) -> None:
+    # runs in _HASH_POOL, so even the first call's hash stays off the event loop
+    verify_password(password, _dummy_hash())
+
+
+async def _verify_login_password(db: AsyncSession, pk, user_id: UUID, password_hash: str, password: str) -> bool:
+    """
+    Verify off the event loop (hashing is CPU-bound); on success, store an
+    upgraded hash if the current one is bcrypt or uses old argon2 parameters.
+    `pk` is the model's primary-key attribute, e.g. Employee.employee_id.
+    """
+    ok, new_hash = await _run_hash(_verify_and_update, password, password_hash)
+    if ok and new_hash:
+        await db.execute(update(pk.class_).where(pk == user_id).values(password_hash=new_hash))
+        await db.commit()
+    return ok
+
+
+def _check_login_rate(request: Request, email: str) -> None:
+    now = time.monotonic()
+    host = request.client.host if request.client else ""
+    # check both buckets before counting the attempt in either
+    windows = []
+    for key, limit in (((host, None), LOGIN_HOST_RATE_LIMIT), ((host, email), LOGIN_RATE_LIMIT)):
+        start, attempts = _login_attempts.get(key, (now, 0))
+        if now - start >= LOGIN_RATE_WINDOW:
+            start, attempts = now, 0
+            # re-added at the end below, keeping the window_start order
+            _login_attempts.pop(key, None)
+        if attempts >= limit:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts. Please try again later.",
+                headers={"Retry-After": str(int(start + LOGIN_RATE_WINDOW - now) + 1)},
+            )
+        windows.append((key, start, attempts))
+    for key, start, attempts in windows:
+        if key not in _login_attempts:
+            # evict expired windows, then (only if still full) the oldest live one;
+            # never the whole table, or spraying new emails would reset everyone
+            while _login_attempts:
+                oldest_start = next(iter(_login_attempts.values()))[0]
+                if now - oldest_start < LOGIN_RATE_WINDOW and len(_login_attempts) < LOGIN_RATE_MAX_KEYS:
+                    break
+                _login_attempts.popitem(last=False)
+        _login_attempts[key] = (start, attempts + 1)
+
+
+async def _reject_unknown_user(password: str) -> None:
+    # same hashing cost as a real check, so "no such email" isn't faster
+    await _run_hash(_verify_dummy, password)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid email or password",
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -59,101 +231,112 @@ def decode_token(token: str) -> dict:
         )
 
 
-def get_current_employee(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> Employee:
-    """Get the current authenticated employee from JWT token."""
-    token = credentials.credentials
+async def _load_principal(db: AsyncSession, role: str, user_id: UUID) -> Optional[Row]:
+    """The principal row for (role, user_id), or None when it's gone."""
+    now = time.monotonic()
+    hit = _principal_cache.get((role, user_id))
+    if hit is not None and hit[0] > now:
+        return hit[1]
+
+    principal = (await db.execute(PRINCIPAL_STMTS[role], {"user_id": user_id})).first()
+    if principal is not None:
+        if len(_principal_cache) >= PRINCIPAL_CACHE_MAX:
+            _principal_cache.clear()
+        _principal_cache[(role, user_id)] = (now + PRINCIPAL_CACHE_TTL, principal)
+    return principal
+
+
+async def resolve_token(token: str, db: AsyncSession) -> tuple[Optional[str], Optional[Row]]:
+    """
+    Return (role, principal) for a bearer token; principal is None when the
+    row is gone. Callers still check role and is_active themselves.
+    """
+    now = time.monotonic()
+    hit = _token_cache.get(token)
+    if hit is not None and hit[0] > now:
+        return hit[1], await _load_principal(db, hit[1], hit[2])
+
     payload = decode_token(token)
-    
     role = payload.get("role")
-    if role != "employee":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="This endpoint requires employee role",
-        )
-    
-    employee_id: str = payload.get("sub")
-    if employee_id is None:
+    sub = payload.get("sub")
+    if role not in PRINCIPAL_STMTS:
+        return role, None
+    # parsed once per token; cache hits reuse the UUID object
+    try:
+        user_id = UUID(sub)
+    except (TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
         )
 
-    employee = db.get(Employee, UUID(employee_id))
-    if employee is None or not employee.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Employee not found or inactive",
-        )
-    return employee
+    # never outlive the token itself; one without an exp claim isn't cached
+    exp = payload.get("exp")
+    if exp is not None:
+        if len(_token_cache) >= TOKEN_CACHE_MAX:
+            _token_cache.clear()
+        _token_cache[token] = (now + min(TOKEN_CACHE_TTL, exp - time.time()), role, user_id)
+    return role, await _load_principal(db, role, user_id)
 
 
-def get_current_manager(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> Manager:
-    """Get the current authenticated manager from JWT token."""
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    role = payload.get("role")
-    if role != "manager":
+def forget_principal(user_id: UUID) -> None:
+    """Drop the cached principal for a user whose password, status or profile changed."""
+    for role in PRINCIPAL_STMTS:
+        _principal_cache.pop((role, user_id), None)
+
+
+async def _require_principal(
+    request: Request, credentials: HTTPAuthorizationCredentials, db: AsyncSession, role: str, label: str
+):
+    # resolved at most once per request, whichever get_current_* runs first
+    cached = getattr(request.state, "principal", None)
+    if cached is not None and cached[0] == role:
+        return cached[1]
+
+    token_role, principal = await resolve_token(credentials.credentials, db)
+    if token_role != role:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="This endpoint requires manager role",
+            detail=f"This endpoint requires {label} role",
         )
-    
-    manager_id: str = payload.get("sub")
-    if manager_id is None:
+    if principal is None or not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
+            detail=f"{label.capitalize()} not found or inactive",
         )
+    request.state.principal = (role, principal)
+    return principal
 
-    manager = db.get(Manager, UUID(manager_id))
-    if manager is None or not manager.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Manager not found or inactive",
-        )
-    return manager
+
+async def get_current_employee(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> Row:
+    """Get the current authenticated employee from JWT token."""
+    return await _require_principal(request, credentials, db, "employee", "employee")
 
 
-def get_current_system_admin(
+async def get_current_manager(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> SystemAdmin:
-    """Get the current authenticated system admin from JWT token."""
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    role = payload.get("role")
-    if role != "system_admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="This endpoint requires system admin role",
-        )
-    
-    admin_id: str = payload.get("sub")
-    if admin_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-        )
+    db: AsyncSession = Depends(get_async_db),
+) -> Row:
+    """Get the current authenticated manager from JWT token."""
+    return await _require_principal(request, credentials, db, "manager", "manager")
 
-    admin = db.get(SystemAdmin, UUID(admin_id))
-    if admin is None or not admin.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="System admin not found or inactive",
-        )
-    return admin
+
+async def get_current_system_admin(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> Row:
+    """Get the current authenticated system admin from JWT token."""
+    return await _require_principal(request, credentials, db, "system_admin", "system admin")
 
 
 class LoginRequest(BaseModel):
-    email: EmailStr
+    email: LowerEmailStr
     password: str
 
 
@@ -167,18 +350,45 @@ class LoginResponse(BaseModel):
     company_id: Optional[str] = None  # Only for employees and managers
 
 
+# Login lookups, built once at import: only the columns login needs, with the
+# email as a bind parameter so every call reuses one compiled-cache entry.
+EMPLOYEE_LOGIN_STMT = select(
+    Employee.employee_id,
+    Employee.is_active,
+    Employee.password_hash,
+    Employee.name,
+    Employee.email,
+    Employee.company_id,
+).where(Employee.email == bindparam("email"))
+
+MANAGER_LOGIN_STMT = select(
+    Manager.manager_id,
+    Manager.is_active,
+    Manager.password_hash,
+    Manager.name,
+    Manager.email,
+    Manager.company_id,
+).where(Manager.email == bindparam("email"))
+
+SYSTEM_ADMIN_LOGIN_STMT = select(
+    SystemAdmin.admin_id,
+    SystemAdmin.is_active,
+    SystemAdmin.password_hash,
+    SystemAdmin.name,
+    SystemAdmin.email,
+).where(SystemAdmin.email == bindparam("email"))
+
+
 @router.post("/login/employee")
-def login_employee(req: LoginRequest, db: Session = Depends(get_db)):
+async def login_employee(req: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Login endpoint for employees."""
-    # Find employee by email
-    stmt = select(Employee).where(Employee.email == req.email.lower())
-    employee = db.execute(stmt).scalar_one_or_none()
+    _check_login_rate(request, req.email)
+
+    # Find employee by email (emails are stored lowercased)
+    employee = (await db.execute(EMPLOYEE_LOGIN_STMT, {"email": req.email})).first()
 
     if not employee:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password",
-        )
+        await _reject_unknown_user(req.password)
 
     if not employee.is_active:
         raise HTTPException(
@@ -193,8 +403,8 @@ def login_employee(req: LoginRequest, db: Session = Depends(get_db)):
             detail="Password not set. Please contact your administrator.",
         )
 
-    # Verify password
-    if not verify_password(req.password, employee.password_hash):
+    # Verify password (and upgrade legacy bcrypt hashes)
+    if not await _verify_login_password(db, Employee.employee_id, employee.employee_id, employee.password_hash, req.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -217,17 +427,15 @@ def login_employee(req: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login/manager")
-def login_manager(req: LoginRequest, db: Session = Depends(get_db)):
+async def login_manager(req: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Login endpoint for managers."""
+    _check_login_rate(request, req.email)
+
     # Find manager by email
-    stmt = select(Manager).where(Manager.email == req.email.lower())
-    manager = db.execute(stmt).scalar_one_or_none()
+    manager = (await db.execute(MANAGER_LOGIN_STMT, {"email": req.email})).first()
 
     if not manager:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password",
-        )
+        await _reject_unknown_user(req.password)
 
     if not manager.is_active:
         raise HTTPException(
@@ -242,8 +450,8 @@ def login_manager(req: LoginRequest, db: Session = Depends(get_db)):
             detail="Password not set. Please contact your administrator.",
         )
 
-    # Verify password
-    if not verify_password(req.password, manager.password_hash):
+    # Verify password (and upgrade legacy bcrypt hashes)
+    if not await _verify_login_password(db, Manager.manager_id, manager.manager_id, manager.password_hash, req.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -266,17 +474,15 @@ def login_manager(req: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login/system-admin")
-def login_system_admin(req: LoginRequest, db: Session = Depends(get_db)):
+async def login_system_admin(req: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Login endpoint for system admins."""
+    _check_login_rate(request, req.email)
+
     # Find system admin by email
-    stmt = select(SystemAdmin).where(SystemAdmin.email == req.email.lower())
-    admin = db.execute(stmt).scalar_one_or_none()
+    admin = (await db.execute(SYSTEM_ADMIN_LOGIN_STMT, {"email": req.email})).first()
 
     if not admin:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password",
-        )
+        await _reject_unknown_user(req.password)
 
     if not admin.is_active:
         raise HTTPException(
@@ -284,8 +490,8 @@ def login_system_admin(req: LoginRequest, db: Session = Depends(get_db)):
             detail="System admin account is inactive",
         )
 
-    # Verify password
-    if not verify_password(req.password, admin.password_hash):
+    # Verify password (and upgrade legacy bcrypt hashes)
+    if not await _verify_login_password(db, SystemAdmin.admin_id, admin.admin_id, admin.password_hash, req.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -308,19 +514,15 @@ def login_system_admin(req: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/me")
-def get_current_user_info(
+async def get_current_user_info(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get current authenticated user info (works for any role)."""
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    role = payload.get("role")
-    user_id = payload.get("sub")
-    
+    role, principal = await resolve_token(credentials.credentials, db)
+
     if role == "employee":
-        employee = db.get(Employee, UUID(user_id))
+        employee = principal
         if not employee:
             raise HTTPException(status_code=404, detail="Employee not found")
         return {
@@ -331,7 +533,7 @@ def get_current_user_info(
             "company_id": str(employee.company_id),
         }
     elif role == "manager":
-        manager = db.get(Manager, UUID(user_id))
+        manager = principal
         if not manager:
             raise HTTPException(status_code=404, detail="Manager not found")
         return {
@@ -342,7 +544,7 @@ def get_current_user_info(
             "company_id": str(manager.company_id),
         }
     elif role == "system_admin":
-        admin = db.get(SystemAdmin, UUID(user_id))
+        admin = principal
         if not admin:
             raise HTTPException(status_code=404, detail="System admin not found")
         return {
@@ -357,17 +559,18 @@ def get_current_user_info(
 
 
 @router.post("/set-password")
-def set_employee_password(
+async def set_employee_password(
     employee_id: UUID,
     password: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Set password for an employee (admin function)."""
-    employee = db.get(Employee, employee_id)
+    employee = await db.get(Employee, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
 
-    employee.password_hash = get_password_hash(password)
-    db.commit()
+    employee.password_hash = await hash_password(password)
+    await db.commit()
+    forget_principal(employee_id)
     return {"message": "Password set successfully"}
 
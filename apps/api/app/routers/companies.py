@@ -1,23 +1,20 @@
-from datetime import datetime, timedelta, timezone
 from typing import Optional, Literal
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import select, text
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from uuid import UUID
 from pydantic import BaseModel
 
 from app.core.database import get_db
 from app.models.company import Company
 from app.models.employee import Employee
-from app.schemas.employees import EmployeeCreate, EmployeeOut
+from app.schemas.employees import FORM_BASE_URL, EmployeeCreate, EmployeeOut
 
 router = APIRouter()
 
-# For now, this is where the mobile/web app runs in dev.
-# Later you’ll switch to your real domain.
-FORM_BASE_URL = "http://localhost:8081"
-
 # Staleness policy for admin chips
 STALE_AFTER_DAYS = 14
 
@@ -35,11 +32,13 @@ class StudioOut(BaseModel):
     name: str
 
 
-@router.get("", response_model=list[CompanyOut])
-@router.get("/", response_model=list[CompanyOut])
+@router.get("", response_model=None, responses={200: {"model": list[CompanyOut]}})
+@router.get("/", response_model=None, responses={200: {"model": list[CompanyOut]}})
 def list_companies(db: Session = Depends(get_db)):
-    companies = db.execute(select(Company).order_by(Company.name.asc())).scalars().all()
-    return [{"company_id": str(c.company_id), "name": c.name} for c in companies]
+    # plain dicts straight to orjson (UUIDs serialize natively); the schema is
+    # still documented through `responses`
+    rows = db.execute(select(Company.company_id, Company.name).order_by(Company.name.asc())).mappings().all()
+    return ORJSONResponse([dict(r) for r in rows])
 
 
 @router.get("/{company_id}/studios", response_model=list[StudioOut])
@@ -72,37 +71,43 @@ def create_employee(company_id: UUID, payload: EmployeeCreate, db: Session = Dep
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
 
-    emp = Employee(
-        company_id=company_id,
-        name=payload.name,
-        email=str(payload.email),
-        phone=payload.phone,
-        hire_date=payload.hire_date,
-        is_active=payload.is_active,
-    )
-    db.add(emp)
+    # INSERT ... RETURNING: server-generated columns come back with the insert,
+    # so no refresh SELECT after commit; a duplicate email in the company hits
+    # uq_employees_company_email and returns no row
+    emp = db.execute(
+        pg_insert(Employee)
+        .values(
+            company_id=company_id,
+            name=payload.name,
+            email=payload.email,
+            phone=payload.phone,
+            hire_date=payload.hire_date,
+            is_active=payload.is_active,
+        )
+        .on_conflict_do_nothing(index_elements=[Employee.company_id, func.lower(Employee.email)])
+        .returning(Employee)
+    ).scalar_one_or_none()
+    if emp is None:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Employee with this email already exists")
     db.commit()
-    db.refresh(emp)
-
-    form_url = f"{FORM_BASE_URL}/form/{emp.employee_id}"
 
     # NOTE: these new fields must exist on EmployeeOut (or be Optional in schema)
     return EmployeeOut(
-        employee_id=str(emp.employee_id),
-        company_id=str(emp.company_id),
+        employee_id=emp.employee_id,
+        company_id=emp.company_id,
         name=emp.name,
         email=emp.email,
         phone=emp.phone,
         hire_date=emp.hire_date,
         is_active=emp.is_active,
-        form_url=form_url,
         last_availability_submit_at=None,
         availability_status="missing",
         availability_status_reason="no_submission",
     )
 
 
-@router.get("/{company_id}/employees", response_model=list[EmployeeOut])
+@router.get("/{company_id}/employees", response_model=None, responses={200: {"model": list[EmployeeOut]}})
 def list_company_employees(company_id: UUID, db: Session = Depends(get_db)):
     # Ensure company exists (keeps errors friendly)
     company = db.get(Company, company_id)
@@ -120,49 +125,35 @@ def list_company_employees(company_id: UUID, db: Session = Depends(get_db)):
               e.phone,
               e.is_active,
               e.hire_date,
-              e.created_at,
-              s.last_submit_at AS last_availability_submit_at
+              s.last_submit_at AS last_availability_submit_at,
+              CASE
+                WHEN s.last_submit_at IS NULL THEN 'missing'
+                WHEN s.last_submit_at < now() - make_interval(days => :stale_days) THEN 'stale'
+                ELSE 'ok'
+              END AS availability_status,
+              CASE
+                WHEN s.last_submit_at IS NULL THEN 'no_submission'
+                WHEN s.last_submit_at < now() - make_interval(days => :stale_days) THEN 'older_than_14_days'
+              END AS availability_status_reason
             FROM employees e
-            LEFT JOIN (
-              SELECT employee_id, MAX(submitted_at) AS last_submit_at
+            -- latest submission per employee: one backward probe of
+            -- (employee_id, submitted_at DESC) instead of aggregating the whole table
+            LEFT JOIN LATERAL (
+              SELECT submitted_at AS last_submit_at
               FROM employee_availability_submissions
-              GROUP BY employee_id
-            ) s ON s.employee_id = e.employee_id
+              WHERE employee_id = e.employee_id
+              ORDER BY submitted_at DESC
+              LIMIT 1
+            ) s ON true
             WHERE e.company_id = :company_id
             ORDER BY e.created_at DESC
             """
         ),
-        {"company_id": company_id},  # ✅ pass UUID, not str
+        {"company_id": company_id, "stale_days": STALE_AFTER_DAYS},  # ✅ pass UUID, not str
     ).mappings().all()
 
-    now = datetime.now(timezone.utc)
-    stale_cutoff = now - timedelta(days=14)
-
-    out: list[EmployeeOut] = []
-    for r in rows:
-        last = r["last_availability_submit_at"]
-
-        if last is None:
-            status = "missing"
-            reason = "no_submission"
-        else:
-            status = "stale" if last < stale_cutoff else "ok"
-            reason = "older_than_14_days" if status == "stale" else None
-
-        out.append(
-            EmployeeOut(
-                employee_id=str(r["employee_id"]),
-                company_id=str(r["company_id"]),
-                name=r["name"],
-                email=r["email"],
-                phone=r["phone"],
-                hire_date=r["hire_date"],
-                is_active=r["is_active"],
-                form_url=f"{FORM_BASE_URL}/form/{r['employee_id']}",
-                last_availability_submit_at=last,
-                availability_status=status,
-                availability_status_reason=reason,
-            )
-        )
-
-    return out
+    # Trusted DB rows go straight to orjson (UUID/date/datetime are native),
+    # skipping per-row EmployeeOut validation; only form_url is added here.
+    return ORJSONResponse(
+        [{**r, "form_url": f"{FORM_BASE_URL}/form/{r['employee_id']}"} for r in rows]
+    )
@@ -1,16 +1,13 @@
 from datetime import date
 from uuid import UUID
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
-import os
-from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlalchemy import delete, text
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import bulk_insert, get_async_db, get_db
 from app.models.availability import AvailabilityType, EmployeeAvailability
 from app.models.company import Company
 from app.models.employee import Employee
@@ -23,6 +20,7 @@ from app.schemas.availability import (
     TimeOffCreate,
     UnavailabilityBlockCreate,
 )
+from app.services.logos import company_logo_response
 from app.services.validators import validate_time_range
 
 from app.models.pto import EmployeePTO
@@ -30,9 +28,6 @@ from app.schemas.pto import PTOCreate
 
 router = APIRouter()
 
-# ✅ Point this to your repo’s mobile assets folder
-MOBILE_LOGO_DIR = Path("/Users/nathanponder/Documents/otf_scheduler/apps/mobile/assets/logos")
-
 
 def _require_employee(db: Session, employee_id: UUID) -> Employee:
     emp = db.get(Employee, employee_id)
@@ -41,105 +36,117 @@ def _require_employee(db: Session, employee_id: UUID) -> Employee:
     return emp
 
 
-def _is_http_url(s: str) -> bool:
-    s = (s or "").strip().lower()
-    return s.startswith("http://") or s.startswith("https://")
-
-
-def _read_local_logo_bytes(file_name: str) -> tuple[bytes, str]:
-    safe_name = os.path.basename(file_name.strip())
-    if not safe_name:
-        raise HTTPException(status_code=404, detail="Company logo not set")
-
-    path = (MOBILE_LOGO_DIR / safe_name).resolve()
-
-    if not str(path).startswith(str(MOBILE_LOGO_DIR.resolve())):
-        raise HTTPException(status_code=400, detail="Invalid logo filename")
-
-    if not path.exists() or not path.is_file():
-        raise HTTPException(status_code=404, detail=f"Logo file not found: {safe_name}")
-
-    ext = path.suffix.lower()
-    ct = "image/png"
-    if ext in [".jpg", ".jpeg"]:
-        ct = "image/jpeg"
-    elif ext == ".webp":
-        ct = "image/webp"
-    elif ext == ".gif":
-        ct = "image/gif"
-
-    return path.read_bytes(), ct
-
-
-def _fetch_remote_logo_bytes(url: str) -> tuple[bytes, str]:
-    try:
-        req = Request(url, headers={"User-Agent": "otf-scheduler/1.0"})
-        with urlopen(req, timeout=10) as resp:
-            content = resp.read()
-            content_type = resp.headers.get("Content-Type") or "image/png"
-            return content, content_type
-    except HTTPError as e:
-        raise HTTPException(status_code=502, detail=f"Logo fetch failed: HTTP {e.code}")
-    except URLError as e:
-        raise HTTPException(status_code=502, detail=f"Logo fetch failed: {e.reason}")
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Logo fetch failed: {e}")
-
-
-def _log_submission(db: Session, employee_id: UUID, company_id: UUID, source: str = "mobile", note: Optional[str] = None):
-    # avoids requiring a new SQLAlchemy model right now
-    db.execute(
-        text(
-            """
-            INSERT INTO employee_availability_submissions (employee_id, company_id, source, note)
-            VALUES (:employee_id, :company_id, :source, :note)
-            """
-        ),
-        {"employee_id": str(employee_id), "company_id": str(company_id), "source": source, "note": note},
-    )
+def _availability_rows(employee_id: UUID, company_id: UUID, blocks: list[AvailabilityBlockCreate]) -> list[dict]:
+    for b in blocks:
+        validate_time_range(b.start_time, b.end_time)
+    return [
+        {
+            "employee_id": employee_id,
+            "company_id": company_id,
+            "day_of_week": b.day_of_week,
+            "start_time": b.start_time,
+            "end_time": b.end_time,
+            "type": AvailabilityType(b.type),
+        }
+        for b in blocks
+    ]
+
+
+def _unavailability_rows(employee_id: UUID, company_id: UUID, blocks: list[UnavailabilityBlockCreate]) -> list[dict]:
+    for b in blocks:
+        validate_time_range(b.start_time, b.end_time)
+    return [
+        {
+            "employee_id": employee_id,
+            "company_id": company_id,
+            "day_of_week": b.day_of_week,
+            "start_time": b.start_time,
+            "end_time": b.end_time,
+            "reason": b.reason,
+        }
+        for b in blocks
+    ]
+
+
+def _date_range_rows(employee_id: UUID, company_id: UUID, blocks: list, error_detail: str) -> list[dict]:
+    """Rows for time off / PTO blocks (same shape)."""
+    for b in blocks:
+        if b.end_date < b.start_date:
+            raise HTTPException(status_code=400, detail=error_detail)
+    return [
+        {
+            "employee_id": employee_id,
+            "company_id": company_id,
+            "start_date": b.start_date,
+            "end_date": b.end_date,
+            "note": b.note,
+        }
+        for b in blocks
+    ]
+
+
+def _rule_rows(employee_id: UUID, rules: list[RuleUpsert]) -> list[dict]:
+    return [
+        {
+            "employee_id": employee_id,
+            "rule_type": r.rule_type,
+            "value_json": r.value_json,
+            "effective_start": date.fromisoformat(r.effective_start) if r.effective_start else None,
+            "effective_end": date.fromisoformat(r.effective_end) if r.effective_end else None,
+        }
+        for r in rules
+    ]
 
 
 @router.get("/{employee_id}/meta")
 def get_employee_meta(employee_id: UUID, db: Session = Depends(get_db)):
-    emp = db.get(Employee, employee_id)
-    if not emp:
+    # employee + company in one round trip
+    row = db.execute(
+        select(
+            Employee.employee_id,
+            Employee.name.label("employee_name"),
+            Company.company_id,
+            Company.name.label("company_name"),
+            Company.timezone,
+            Company.logo_url,
+        )
+        .outerjoin(Company, Company.company_id == Employee.company_id)
+        .where(Employee.employee_id == employee_id)
+    ).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Employee not found")
-
-    company = db.get(Company, emp.company_id)
-    if not company:
+    if row.company_id is None:
         raise HTTPException(status_code=404, detail="Company not found")
 
     return {
-        "employee_id": str(emp.employee_id),
-        "employee_name": emp.name,
-        "company_id": str(company.company_id),
-        "company_name": company.name,
-        "company_timezone": company.timezone,
-        "company_logo_url": company.logo_url,
+        "employee_id": str(row.employee_id),
+        "employee_name": row.employee_name,
+        "company_id": str(row.company_id),
+        "company_name": row.company_name,
+        "company_timezone": row.timezone,
+        "company_logo_url": row.logo_url,
     }
 
 
 @router.get("/{employee_id}/logo")
-def get_employee_company_logo(employee_id: UUID, db: Session = Depends(get_db)):
-    emp = db.get(Employee, employee_id)
-    if not emp:
+async def get_employee_company_logo(employee_id: UUID, request: Request, db: AsyncSession = Depends(get_async_db)):
+    # one query for "employee -> company -> logo_url"; ETag/304 and the
+    # remote-logo caches are handled by the shared logo service
+    row = (
+        await db.execute(
+            select(Employee.employee_id, Company.company_id, Company.logo_url)
+            .outerjoin(Company, Company.company_id == Employee.company_id)
+            .where(Employee.employee_id == employee_id)
+        )
+    ).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Employee not found")
-
-    company = db.get(Company, emp.company_id)
-    if not company:
+    if row.company_id is None:
         raise HTTPException(status_code=404, detail="Company not found")
-
-    if not company.logo_url:
+    if not row.logo_url:
         raise HTTPException(status_code=404, detail="Company logo not set")
 
-    raw = company.logo_url.strip()
-
-    if _is_http_url(raw):
-        content, content_type = _fetch_remote_logo_bytes(raw)
-    else:
-        content, content_type = _read_local_logo_bytes(raw)
-
-    return Response(content=content, media_type=content_type)
+    return await company_logo_response(request, row.logo_url)
 
 
 # -------------------------
@@ -166,60 +173,52 @@ def submit_employee_form(
 ):
     emp = _require_employee(db, employee_id)
 
-    # One transaction: replace everything
-    db.execute(delete(EmployeeAvailability).where(EmployeeAvailability.employee_id == employee_id))
-    db.execute(delete(EmployeeUnavailability).where(EmployeeUnavailability.employee_id == employee_id))
-    db.execute(delete(EmployeeTimeOff).where(EmployeeTimeOff.employee_id == employee_id))
-    db.execute(delete(EmployeePTO).where(EmployeePTO.employee_id == employee_id))
-    db.execute(delete(EmployeeRule).where(EmployeeRule.employee_id == employee_id))
+    # validate and build every row before touching the existing data
+    availability = _availability_rows(employee_id, emp.company_id, payload.availability)
+    unavailability = _unavailability_rows(employee_id, emp.company_id, payload.unavailability)
+    timeoff = _date_range_rows(employee_id, emp.company_id, payload.timeoff, "timeoff.end_date must be >= start_date")
+    pto = _date_range_rows(employee_id, emp.company_id, payload.pto, "pto.end_date must be >= start_date")
+    rules = _rule_rows(employee_id, payload.rules)
 
-    for b in payload.availability:
-        validate_time_range(b.start_time, b.end_time)
-        db.add(
-            EmployeeAvailability(
-                employee_id=employee_id,
-                day_of_week=b.day_of_week,
-                start_time=b.start_time,
-                end_time=b.end_time,
-                type=AvailabilityType(b.type),
-            )
-        )
-
-    for b in payload.unavailability:
-        validate_time_range(b.start_time, b.end_time)
-        db.add(
-            EmployeeUnavailability(
-                employee_id=employee_id,
-                day_of_week=b.day_of_week,
-                start_time=b.start_time,
-                end_time=b.end_time,
-                reason=b.reason,
-            )
-        )
-
-    for b in payload.timeoff:
-        if b.end_date < b.start_date:
-            raise HTTPException(status_code=400, detail="timeoff.end_date must be >= start_date")
-        db.add(EmployeeTimeOff(employee_id=employee_id, start_date=b.start_date, end_date=b.end_date, note=b.note))
-
-    for b in payload.pto:
-        if b.end_date < b.start_date:
-            raise HTTPException(status_code=400, detail="pto.end_date must be >= start_date")
-        db.add(EmployeePTO(employee_id=employee_id, start_date=b.start_date, end_date=b.end_date, note=b.note))
-
-    for r in payload.rules:
-        db.add(
-            EmployeeRule(
-                employee_id=employee_id,
-                rule_type=r.rule_type,
-                value_json=r.value_json,
-                effective_start=date.fromisoformat(r.effective_start) if r.effective_start else None,
-                effective_end=date.fromisoformat(r.effective_end) if r.effective_end else None,
+    # One transaction: replace everything. The five DELETEs and the
+    # submission log row go out as one statement (data-modifying CTEs).
+    # The log row is the "truth" marker for the admin staleness chips.
+    db.execute(
+        text(
+            """
+            WITH d_availability AS (
+                DELETE FROM employee_availability WHERE employee_id = :employee_id
+            ),
+            d_unavailability AS (
+                DELETE FROM employee_unavailability WHERE employee_id = :employee_id
+            ),
+            d_time_off AS (
+                DELETE FROM employee_time_off WHERE employee_id = :employee_id
+            ),
+            d_pto AS (
+                DELETE FROM employee_pto WHERE employee_id = :employee_id
+            ),
+            d_rules AS (
+                DELETE FROM employee_rules WHERE employee_id = :employee_id
             )
-        )
+            INSERT INTO employee_availability_submissions (employee_id, company_id, source, note)
+            VALUES (:employee_id, :company_id, :source, :note)
+            """
+        ),
+        {
+            "employee_id": str(employee_id),
+            "company_id": str(emp.company_id),
+            "source": payload.source,
+            "note": payload.note,
+        },
+    )
 
-    # ✅ This is the “truth” marker
-    _log_submission(db, employee_id=employee_id, company_id=emp.company_id, source=payload.source, note=payload.note)
+    # one multi-row INSERT per table instead of per-row ORM flushes
+    bulk_insert(db, EmployeeAvailability, availability)
+    bulk_insert(db, EmployeeUnavailability, unavailability)
+    bulk_insert(db, EmployeeTimeOff, timeoff)
+    bulk_insert(db, EmployeePTO, pto)
+    bulk_insert(db, EmployeeRule, rules)
 
     db.commit()
     return {"status": "ok"}
@@ -233,62 +232,40 @@ def submit_employee_form(
 
 @router.post("/{employee_id}/availability/replace")
 def replace_availability(employee_id: UUID, blocks: list[AvailabilityBlockCreate], db: Session = Depends(get_db)):
-    _require_employee(db, employee_id)
+    emp = _require_employee(db, employee_id)
+    rows = _availability_rows(employee_id, emp.company_id, blocks)
     db.execute(delete(EmployeeAvailability).where(EmployeeAvailability.employee_id == employee_id))
-    for b in blocks:
-        validate_time_range(b.start_time, b.end_time)
-        db.add(
-            EmployeeAvailability(
-                employee_id=employee_id,
-                day_of_week=b.day_of_week,
-                start_time=b.start_time,
-                end_time=b.end_time,
-                type=AvailabilityType(b.type),
-            )
-        )
+    bulk_insert(db, EmployeeAvailability, rows)
     db.commit()
     return {"status": "ok", "count": len(blocks)}
 
 
 @router.post("/{employee_id}/unavailability/replace")
 def replace_unavailability(employee_id: UUID, blocks: list[UnavailabilityBlockCreate], db: Session = Depends(get_db)):
-    _require_employee(db, employee_id)
+    emp = _require_employee(db, employee_id)
+    rows = _unavailability_rows(employee_id, emp.company_id, blocks)
     db.execute(delete(EmployeeUnavailability).where(EmployeeUnavailability.employee_id == employee_id))
-    for b in blocks:
-        validate_time_range(b.start_time, b.end_time)
-        db.add(
-            EmployeeUnavailability(
-                employee_id=employee_id,
-                day_of_week=b.day_of_week,
-                start_time=b.start_time,
-                end_time=b.end_time,
-                reason=b.reason,
-            )
-        )
+    bulk_insert(db, EmployeeUnavailability, rows)
     db.commit()
     return {"status": "ok", "count": len(blocks)}
 
 
 @router.post("/{employee_id}/timeoff/replace")
 def replace_time_off(employee_id: UUID, blocks: list[TimeOffCreate], db: Session = Depends(get_db)):
-    _require_employee(db, employee_id)
+    emp = _require_employee(db, employee_id)
+    rows = _date_range_rows(employee_id, emp.company_id, blocks, "end_date must be >= start_date")
     db.execute(delete(EmployeeTimeOff).where(EmployeeTimeOff.employee_id == employee_id))
-    for b in blocks:
-        if b.end_date < b.start_date:
-            raise HTTPException(status_code=400, detail="end_date must be >= start_date")
-        db.add(EmployeeTimeOff(employee_id=employee_id, start_date=b.start_date, end_date=b.end_date, note=b.note))
+    bulk_insert(db, EmployeeTimeOff, rows)
     db.commit()
     return {"status": "ok", "count": len(blocks)}
 
 
 @router.post("/{employee_id}/pto/replace")
 def replace_pto(employee_id: UUID, blocks: list[PTOCreate], db: Session = Depends(get_db)):
-    _require_employee(db, employee_id)
+    emp = _require_employee(db, employee_id)
+    rows = _date_range_rows(employee_id, emp.company_id, blocks, "end_date must be >= start_date")
     db.execute(delete(EmployeePTO).where(EmployeePTO.employee_id == employee_id))
-    for b in blocks:
-        if b.end_date < b.start_date:
-            raise HTTPException(status_code=400, detail="end_date must be >= start_date")
-        db.add(EmployeePTO(employee_id=employee_id, start_date=b.start_date, end_date=b.end_date, note=b.note))
+    bulk_insert(db, EmployeePTO, rows)
     db.commit()
     return {"status": "ok", "count": len(blocks)}
 
@@ -296,16 +273,8 @@ def replace_pto(employee_id: UUID, blocks: list[PTOCreate], db: Session = Depend
 @router.put("/{employee_id}/rules")
 def upsert_rules(employee_id: UUID, rules: list[RuleUpsert], db: Session = Depends(get_db)):
     _require_employee(db, employee_id)
+    rows = _rule_rows(employee_id, rules)
     db.execute(delete(EmployeeRule).where(EmployeeRule.employee_id == employee_id))
-    for r in rules:
-        db.add(
-            EmployeeRule(
-                employee_id=employee_id,
-                rule_type=r.rule_type,
-                value_json=r.value_json,
-                effective_start=date.fromisoformat(r.effective_start) if r.effective_start else None,
-                effective_end=date.fromisoformat(r.effective_end) if r.effective_end else None,
-            )
-        )
+    bulk_insert(db, EmployeeRule, rows)
     db.commit()
     return {"status": "ok", "count": len(rules)}
@@ -1,169 +1,208 @@
+from calendar import monthrange
 from datetime import date
 from uuid import UUID
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import text, select
-from typing import List, Optional
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Boolean, Date, bindparam, text, select
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from typing import Literal, Optional
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.employee import Employee
 from app.routers.auth import get_current_employee
+from app.services import response_cache
 
 router = APIRouter()
 
 
+MY_SCHEDULE_STMT = text(
+    """
+    SELECT
+        ss.scheduled_shift_id,
+        ss.shift_date,
+        ss.label,
+        ss.start_time,
+        ss.end_time,
+        sr.month_start,
+        sr.month_end
+    FROM scheduled_shifts ss
+    JOIN schedule_runs sr ON ss.schedule_run_id = sr.schedule_run_id
+    WHERE ss.employee_id = :employee_id
+        AND ss.shift_date BETWEEN :month_start AND :month_end
+    ORDER BY ss.shift_date, ss.start_time
+    """
+).bindparams(
+    bindparam("employee_id", type_=PG_UUID),
+    bindparam("month_start", type_=Date),
+    bindparam("month_end", type_=Date),
+)
+
+# Latest schedule run for this company in the date range with its team
+# shifts already encoded as JSON by Postgres: shifts_by_date (date -> list)
+# and/or all_shifts, per the :grouped / :flat flags. row_to_json + string_agg
+# give compact output in column order. One row if a run exists, none otherwise.
+TEAM_SCHEDULE_STMT = text(
+    """
+    WITH latest_run AS (
+        SELECT schedule_run_id
+        FROM schedule_runs
+        WHERE company_id = :company_id
+            AND month_start <= :month_end
+            AND month_end >= :month_start
+        ORDER BY created_at DESC
+        LIMIT 1
+    ),
+    shifts AS (
+        SELECT ss.shift_date, ss.start_time, e.name, row_to_json(s)::text AS shift
+        FROM latest_run lr
+        JOIN scheduled_shifts ss
+            ON ss.schedule_run_id = lr.schedule_run_id
+            AND ss.shift_date BETWEEN :month_start AND :month_end
+        JOIN employees e
+            ON e.employee_id = ss.employee_id
+            AND e.company_id = :company_id
+            AND e.is_active = true
+        CROSS JOIN LATERAL (
+            SELECT
+                ss.scheduled_shift_id,
+                ss.shift_date,
+                ss.label,
+                ss.start_time,
+                ss.end_time,
+                ss.employee_id,
+                e.name AS employee_name,
+                e.email AS employee_email
+        ) s
+    )
+    SELECT
+        lr.schedule_run_id,
+        CASE WHEN :grouped THEN (
+            SELECT COALESCE('{' || string_agg('"' || d.shift_date || '":' || d.shifts, ',' ORDER BY d.shift_date) || '}', '{}')
+            FROM (
+                SELECT shift_date, '[' || string_agg(shift, ',' ORDER BY start_time, name) || ']' AS shifts
+                FROM shifts
+                GROUP BY shift_date
+            ) d
+        ) END AS shifts_by_date,
+        CASE WHEN :flat THEN (
+            SELECT COALESCE('[' || string_agg(shift, ',' ORDER BY shift_date, start_time, name) || ']', '[]')
+            FROM shifts
+        ) END AS all_shifts
+    FROM latest_run lr
+    """
+).bindparams(
+    bindparam("company_id", type_=PG_UUID),
+    bindparam("month_end", type_=Date),
+    bindparam("month_start", type_=Date),
+    bindparam("grouped", type_=Boolean),
+    bindparam("flat", type_=Boolean),
+)
+
+
+def _month_bounds(month_start: Optional[date], month_end: Optional[date]) -> tuple[date, date]:
+    """Default month_start to the 1st of this month and month_end to the last day of month_start's month."""
+    if month_start is None:
+        today = date.today()
+        month_start = date(today.year, today.month, 1)
+    if month_end is None:
+        month_end = month_start.replace(day=monthrange(month_start.year, month_start.month)[1])
+    return month_start, month_end
+
+
 @router.get("/my-schedule")
-def get_my_schedule(
+async def get_my_schedule(
     month_start: Optional[date] = Query(None),
     month_end: Optional[date] = Query(None),
     current_employee: Employee = Depends(get_current_employee),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get the current employee's assigned shifts for a date range.
     If no dates provided, returns current month.
     """
-    if not month_start:
-        today = date.today()
-        month_start = date(today.year, today.month, 1)
-    if not month_end:
-        # Last day of month
-        from datetime import timedelta
-        if month_start.month == 12:
-            month_end = date(month_start.year + 1, 1, 1) - timedelta(days=1)
-        else:
-            month_end = date(month_start.year, month_start.month + 1, 1) - timedelta(days=1)
-
-    shifts = db.execute(
-        text(
-            """
-            SELECT
-                ss.scheduled_shift_id,
-                ss.shift_date,
-                ss.label,
-                ss.start_time,
-                ss.end_time,
-                sr.month_start,
-                sr.month_end
-            FROM scheduled_shifts ss
-            JOIN schedule_runs sr ON ss.schedule_run_id = sr.schedule_run_id
-            WHERE ss.employee_id = :employee_id
-                AND ss.shift_date BETWEEN :month_start AND :month_end
-            ORDER BY ss.shift_date, ss.start_time
-            """
-        ),
+    month_start, month_end = _month_bounds(month_start, month_end)
+
+    shifts = (await db.execute(
+        MY_SCHEDULE_STMT,
         {
             "employee_id": str(current_employee.employee_id),
             "month_start": month_start,
             "month_end": month_end,
         },
-    ).mappings().all()
+    )).mappings().all()
 
-    return {
-        "employee_id": str(current_employee.employee_id),
+    # Returned directly so orjson encodes the UUID/date/time values in C
+    # instead of going through jsonable_encoder
+    return ORJSONResponse({
+        "employee_id": current_employee.employee_id,
         "employee_name": current_employee.name,
         "month_start": month_start,
         "month_end": month_end,
         "shifts": [dict(s) for s in shifts],
-    }
+    })
 
 
 @router.get("/team-schedule")
-def get_team_schedule(
+async def get_team_schedule(
     month_start: Optional[date] = Query(None),
     month_end: Optional[date] = Query(None),
+    view: Literal["both", "grouped", "flat"] = Query("both"),
     current_employee: Employee = Depends(get_current_employee),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get the team's schedule (all employees in same company) for a date range.
     Read-only view - no edit capabilities.
     If no dates provided, returns current month.
+    `view` picks which shift lists to return: "grouped" (shifts_by_date),
+    "flat" (all_shifts) or "both" (default, kept for older clients).
     """
-    if not month_start:
-        today = date.today()
-        month_start = date(today.year, today.month, 1)
-    if not month_end:
-        # Last day of month
-        from datetime import timedelta
-        if month_start.month == 12:
-            month_end = date(month_start.year + 1, 1, 1) - timedelta(days=1)
-        else:
-            month_end = date(month_start.year, month_start.month + 1, 1) - timedelta(days=1)
-
-    # Get the latest schedule run for this company in the date range
-    run = db.execute(
-        text(
-            """
-            SELECT schedule_run_id, company_id, studio_id, month_start, month_end
-            FROM schedule_runs
-            WHERE company_id = :company_id
-                AND month_start <= :month_end
-                AND month_end >= :month_start
-            ORDER BY created_at DESC
-            LIMIT 1
-            """
-        ),
+    month_start, month_end = _month_bounds(month_start, month_end)
+
+    # Cached as encoded JSON; a new run changes the version and so the key
+    company_id = current_employee.company_id
+    version = await response_cache.schedule_version(db, company_id)
+    key = f"team_sched:{company_id}:{month_start}:{month_end}:{view}:{version}"
+
+    async def load() -> bytes:
+        return ORJSONResponse(await _team_schedule_payload(db, company_id, month_start, month_end, view)).body
+
+    content = await response_cache.get_or_set(key, load)
+    return Response(content=content, media_type="application/json")
+
+
+async def _team_schedule_payload(db: AsyncSession, company_id: UUID, month_start: date, month_end: date, view: str) -> dict:
+    row = (await db.execute(
+        TEAM_SCHEDULE_STMT,
         {
-            "company_id": str(current_employee.company_id),
+            "company_id": str(company_id),
             "month_start": month_start,
             "month_end": month_end,
+            "grouped": view != "flat",
+            "flat": view != "grouped",
         },
-    ).mappings().first()
+    )).mappings().first()
 
-    if not run:
+    if not row:
         return {
-            "company_id": str(current_employee.company_id),
+            "company_id": company_id,
             "month_start": month_start,
             "month_end": month_end,
             "shifts": [],
             "message": "No schedule found for this period",
         }
 
-    # Get all shifts for the team
-    shifts = db.execute(
-        text(
-            """
-            SELECT
-                ss.scheduled_shift_id,
-                ss.shift_date,
-                ss.label,
-                ss.start_time,
-                ss.end_time,
-                ss.employee_id,
-                e.name AS employee_name,
-                e.email AS employee_email
-            FROM scheduled_shifts ss
-            JOIN employees e ON e.employee_id = ss.employee_id
-            WHERE ss.schedule_run_id = :run_id
-                AND ss.shift_date BETWEEN :month_start AND :month_end
-                AND e.company_id = :company_id
-                AND e.is_active = true
-            ORDER BY ss.shift_date, ss.start_time, e.name
-            """
-        ),
-        {
-            "run_id": str(run["schedule_run_id"]),
-            "company_id": str(current_employee.company_id),
-            "month_start": month_start,
-            "month_end": month_end,
-        },
-    ).mappings().all()
-
-    # Group by date for easier display
-    by_date: dict[str, List[dict]] = {}
-    for shift in shifts:
-        date_key = str(shift["shift_date"])
-        if date_key not in by_date:
-            by_date[date_key] = []
-        by_date[date_key].append(dict(shift))
-
-    return {
-        "company_id": str(current_employee.company_id),
+    result = {
+        "company_id": company_id,
         "month_start": month_start,
         "month_end": month_end,
-        "schedule_run_id": str(run["schedule_run_id"]),
-        "shifts_by_date": by_date,
-        "all_shifts": [dict(s) for s in shifts],
+        "schedule_run_id": row["schedule_run_id"],
     }
-
+    # Postgres already encoded the shift lists; Fragment embeds them as-is
+    if row["shifts_by_date"] is not None:
+        result["shifts_by_date"] = orjson.Fragment(row["shifts_by_date"])
+    if row["all_shifts"] is not None:
+        result["all_shifts"] = orjson.Fragment(row["all_shifts"])
+    return result
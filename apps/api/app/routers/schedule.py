@@ -1,16 +1,32 @@
-from datetime import date, time
+import base64
+import re
+from datetime import date, datetime, time
+from typing import Optional
 from uuid import UUID
 
+import orjson
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import text, delete, select
+from sqlalchemy import Date, DateTime, Integer, Time, bindparam, text, delete, select
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import async_engine, get_async_db, get_db
 from app.models.scheduled_shifts import ScheduledShift
+from app.services import response_cache
+from app.services.shift_partitions import ensure_partitions
 
 router = APIRouter()
 
+# HH:MM with optional :SS, the forms the shift editors send
+_HHMM = re.compile(r"([01]\d|2[0-3]):([0-5]\d)(?::([0-5]\d))?")
+
+# rows fetched per round trip when streaming coverage
+COVERAGE_STREAM_BATCH = 500
+
 
 class ScheduleGenerateRequest(BaseModel):
     company_id: UUID
@@ -19,6 +35,7 @@ class ScheduleGenerateRequest(BaseModel):
     month_end: date
     overwrite: bool = False
     generator_version: str = "v1"  # "v1" for original, "v2" for new enhanced generator
+    verbose_audit: bool = False  # also write candidate audit rows for rejected employees
 
 
 class ShiftUpdateRequest(BaseModel):
@@ -34,6 +51,250 @@ class ShiftCreateRequest(BaseModel):
     end_time: str  # HH:MM
 
 
+SCHEDULE_RUN_STMT = text(
+    """
+    SELECT schedule_run_id, company_id, studio_id, month_start, month_end, created_at
+    FROM schedule_runs
+    WHERE schedule_run_id = :run_id
+    """
+).bindparams(
+    bindparam("run_id", type_=PG_UUID),
+)
+
+RUN_SHIFTS_STMT = text(
+    """
+    SELECT
+      ss.scheduled_shift_id,
+      ss.shift_date,
+      ss.day_of_week,
+      ss.label,
+      ss.start_time,
+      ss.end_time,
+      ss.employee_id,
+      e.name AS employee_name
+    FROM scheduled_shifts ss
+    JOIN employees e ON e.employee_id = ss.employee_id
+    WHERE ss.schedule_run_id = :run_id
+    ORDER BY ss.shift_date, ss.start_time, e.name
+    """
+).bindparams(
+    bindparam("run_id", type_=PG_UUID),
+)
+
+COVERAGE_RUN_STMT = text(
+    """
+    SELECT schedule_run_id, company_id, studio_id, month_start, month_end
+    FROM schedule_runs
+    WHERE schedule_run_id = :run_id
+    """
+).bindparams(
+    bindparam("run_id", type_=PG_UUID),
+)
+
+COVERAGE_STMT = text(
+    """
+    WITH base AS (
+      SELECT
+        si.shift_date,
+        si.label,
+        si.start_time,
+        si.end_time,
+        si.required_count,
+        COUNT(ss.scheduled_shift_id) AS scheduled_count,
+        (si.required_count - COUNT(ss.scheduled_shift_id)) AS missing_count,
+        COALESCE(
+          JSON_AGG(
+            JSON_BUILD_OBJECT(
+              'employee_id', ss.employee_id,
+              'name', e.name
+            )
+            ORDER BY e.name
+          ) FILTER (WHERE ss.employee_id IS NOT NULL),
+          '[]'::json
+        ) AS assigned
+      FROM shift_instances si
+      LEFT JOIN scheduled_shifts ss
+        ON ss.schedule_run_id = :run_id
+       AND ss.shift_date = si.shift_date
+       AND ss.label = si.label
+       AND ss.start_time = si.start_time
+       AND ss.end_time = si.end_time
+      LEFT JOIN employees e
+        ON e.employee_id = ss.employee_id
+      WHERE si.company_id = :company_id
+        AND si.studio_id  = :studio_id
+        AND si.shift_date BETWEEN :month_start AND :month_end
+      GROUP BY si.shift_date, si.label, si.start_time, si.end_time, si.required_count
+    )
+    SELECT
+      b.*,
+      COALESCE(a.candidate_count, 0) AS candidate_count,
+      COALESCE(a.rejection_summary, '{}'::jsonb) AS rejection_summary
+    FROM base b
+    LEFT JOIN schedule_audit_shift a
+      ON a.schedule_run_id = :run_id
+     AND a.shift_date = b.shift_date
+     AND a.label = b.label
+     AND a.start_time = b.start_time
+     AND a.end_time = b.end_time
+    ORDER BY b.shift_date, b.start_time
+    """
+).bindparams(
+    bindparam("run_id", type_=PG_UUID),
+    bindparam("company_id", type_=PG_UUID),
+    bindparam("studio_id", type_=PG_UUID),
+    bindparam("month_start", type_=Date),
+    bindparam("month_end", type_=Date),
+)
+
+RUN_EXISTS_STMT = text("SELECT 1 FROM schedule_runs WHERE schedule_run_id = :run_id").bindparams(
+    bindparam("run_id", type_=PG_UUID),
+)
+
+# IMPORTANT: use CAST(:start_time AS time) (NOT :start_time::time) with SQLAlchemy text() binds
+SHIFT_AUDIT_STMT = text(
+    """
+    SELECT
+      sac.employee_id,
+      e.name,
+      sac.eligible,
+      sac.rejection_reason,
+      sac.details
+    FROM schedule_audit_candidate sac
+    JOIN employees e ON e.employee_id = sac.employee_id
+    WHERE sac.schedule_run_id = :run_id
+      AND sac.shift_date = :shift_date
+      AND sac.label = :label
+      AND sac.start_time = CAST(:start_time AS time)
+      AND sac.end_time = CAST(:end_time AS time)
+    ORDER BY sac.eligible DESC, e.name
+    """
+).bindparams(
+    bindparam("run_id", type_=PG_UUID),
+    bindparam("shift_date", type_=Date),
+)
+
+EMPLOYEE_RUN_SHIFTS_STMT = text(
+    """
+    SELECT
+      ss.shift_date,
+      ss.day_of_week,
+      ss.label,
+      ss.start_time,
+      ss.end_time
+    FROM scheduled_shifts ss
+    WHERE ss.schedule_run_id = :run_id
+      AND ss.employee_id = :employee_id
+    ORDER BY ss.shift_date, ss.start_time
+    """
+).bindparams(
+    bindparam("run_id", type_=PG_UUID),
+    bindparam("employee_id", type_=PG_UUID),
+)
+
+# Keyset page of a company's runs, newest first; :cursor_ts/:cursor_id are the
+# last row of the previous page (NULL for the first page). shift_count is a
+# per-run index-only count on ix_scheduled_shifts_run_date_start, so a page
+# costs O(limit) instead of aggregating the company's whole history.
+SCHEDULE_RUNS_STMT = text(
+    """
+    SELECT
+      sr.schedule_run_id,
+      sr.company_id,
+      sr.studio_id,
+      s.name AS studio_name,
+      sr.month_start,
+      sr.month_end,
+      sr.created_at,
+      (
+        SELECT count(*)
+        FROM scheduled_shifts ss
+        WHERE ss.schedule_run_id = sr.schedule_run_id
+      ) AS shift_count
+    FROM schedule_runs sr
+    LEFT JOIN studios s ON s.studio_id = sr.studio_id
+    WHERE sr.company_id = :company_id
+      AND (
+        :cursor_ts IS NULL
+        OR (sr.created_at, sr.schedule_run_id) < (:cursor_ts, :cursor_id)
+      )
+    ORDER BY sr.created_at DESC, sr.schedule_run_id DESC
+    LIMIT :limit
+    """
+).bindparams(
+    bindparam("company_id", type_=PG_UUID),
+    bindparam("cursor_ts", type_=DateTime(timezone=True)),
+    bindparam("cursor_id", type_=PG_UUID),
+    bindparam("limit", type_=Integer),
+)
+
+UPDATE_SHIFT_STMT = text(
+    """
+    WITH emp AS (
+        SELECT is_active FROM employees WHERE employee_id = :employee_id
+    ),
+    upd AS (
+        UPDATE scheduled_shifts
+        SET employee_id = :employee_id
+        WHERE scheduled_shift_id = :shift_id
+          AND (SELECT is_active FROM emp)
+        RETURNING 1
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM scheduled_shifts WHERE scheduled_shift_id = :shift_id) AS shift_exists,
+        (SELECT is_active FROM emp) AS employee_active
+    """
+).bindparams(
+    bindparam("employee_id", type_=PG_UUID),
+    bindparam("shift_id", type_=PG_UUID),
+)
+
+CREATE_SHIFT_CONTEXT_STMT = text(
+    """
+    SELECT
+      sr.schedule_run_id IS NOT NULL AS run_found,
+      sr.company_id AS run_company_id,
+      sr.studio_id,
+      sr.month_start,
+      sr.month_end,
+      e.employee_id IS NOT NULL AS employee_found,
+      e.is_active,
+      e.company_id AS employee_company_id
+    FROM (SELECT 1) AS one
+    LEFT JOIN schedule_runs sr ON sr.schedule_run_id = :run_id
+    LEFT JOIN employees e ON e.employee_id = :employee_id
+    """
+).bindparams(
+    bindparam("run_id", type_=PG_UUID),
+    bindparam("employee_id", type_=PG_UUID),
+)
+
+
+# Inserts only if the run exists, the date is in its month range and the
+# employee is active and in the run's company; otherwise no row comes back.
+CREATE_SHIFT_STMT = text(
+    """
+    INSERT INTO scheduled_shifts
+      (schedule_run_id, employee_id, studio_id, shift_date, day_of_week, label, start_time, end_time)
+    SELECT sr.schedule_run_id, e.employee_id, sr.studio_id, :shift_date, :day_of_week, :label, :start_time, :end_time
+    FROM schedule_runs sr
+    JOIN employees e
+      ON e.employee_id = :employee_id
+     AND e.company_id = sr.company_id
+     AND e.is_active
+    WHERE sr.schedule_run_id = :run_id
+      AND :shift_date BETWEEN sr.month_start AND sr.month_end
+    RETURNING scheduled_shift_id
+    """
+).bindparams(
+    bindparam("shift_date", type_=Date),
+    bindparam("start_time", type_=Time),
+    bindparam("end_time", type_=Time),
+    bindparam("employee_id", type_=PG_UUID),
+    bindparam("run_id", type_=PG_UUID),
+)
+
+
 @router.post("/generate")
 def generate_schedule(req: ScheduleGenerateRequest, db: Session = Depends(get_db)):
     if req.month_end < req.month_start:
@@ -52,6 +313,7 @@ def generate_schedule(req: ScheduleGenerateRequest, db: Session = Depends(get_db
         month_start=req.month_start,
         month_end=req.month_end,
         overwrite=req.overwrite,
+        verbose_audit=req.verbose_audit,
     )
     return {
         "schedule_run_id": str(run_id),
@@ -62,13 +324,7 @@ def generate_schedule(req: ScheduleGenerateRequest, db: Session = Depends(get_db
 @router.get("/{run_id}")
 def get_schedule(run_id: UUID, db: Session = Depends(get_db)):
     run = db.execute(
-        text(
-            """
-            SELECT schedule_run_id, company_id, studio_id, month_start, month_end, created_at
-            FROM schedule_runs
-            WHERE schedule_run_id = :run_id
-            """
-        ),
+        SCHEDULE_RUN_STMT,
         {"run_id": str(run_id)},
     ).mappings().first()
 
@@ -76,110 +332,53 @@ def get_schedule(run_id: UUID, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Schedule run not found")
 
     shifts = db.execute(
-        text(
-            """
-            SELECT
-              ss.scheduled_shift_id,
-              ss.shift_date,
-              ss.day_of_week,
-              ss.label,
-              ss.start_time,
-              ss.end_time,
-              ss.employee_id,
-              e.name AS employee_name
-            FROM scheduled_shifts ss
-            JOIN employees e ON e.employee_id = ss.employee_id
-            WHERE ss.schedule_run_id = :run_id
-            ORDER BY ss.shift_date, ss.start_time, e.name
-            """
-        ),
+        RUN_SHIFTS_STMT,
         {"run_id": str(run_id)},
     ).mappings().all()
 
-    return {"run": dict(run), "shifts": [dict(r) for r in shifts]}
+    return ORJSONResponse({"run": dict(run), "shifts": [dict(r) for r in shifts]})
 
 
 @router.get("/{run_id}/coverage")
-def get_schedule_coverage(run_id: UUID, db: Session = Depends(get_db)):
+async def get_schedule_coverage(run_id: UUID, db: AsyncSession = Depends(get_async_db)):
     """
     For each shift_instance in the run's month/studio/company, return:
       required vs scheduled + assigned list
       + audit stats from schedule_audit_shift
     """
-    run = db.execute(
-        text(
-            """
-            SELECT schedule_run_id, company_id, studio_id, month_start, month_end
-            FROM schedule_runs
-            WHERE schedule_run_id = :run_id
-            """
-        ),
+    run = (await db.execute(
+        COVERAGE_RUN_STMT,
         {"run_id": str(run_id)},
-    ).mappings().first()
+    )).mappings().first()
 
     if not run:
         raise HTTPException(status_code=404, detail="Schedule run not found")
 
-    rows = db.execute(
-        text(
-            """
-            WITH base AS (
-              SELECT
-                si.shift_date,
-                si.label,
-                si.start_time,
-                si.end_time,
-                si.required_count,
-                COUNT(ss.scheduled_shift_id) AS scheduled_count,
-                (si.required_count - COUNT(ss.scheduled_shift_id)) AS missing_count,
-                COALESCE(
-                  JSON_AGG(
-                    JSON_BUILD_OBJECT(
-                      'employee_id', ss.employee_id,
-                      'name', e.name
-                    )
-                    ORDER BY e.name
-                  ) FILTER (WHERE ss.employee_id IS NOT NULL),
-                  '[]'::json
-                ) AS assigned
-              FROM shift_instances si
-              LEFT JOIN scheduled_shifts ss
-                ON ss.schedule_run_id = :run_id
-               AND ss.shift_date = si.shift_date
-               AND ss.label = si.label
-               AND ss.start_time = si.start_time
-               AND ss.end_time = si.end_time
-              LEFT JOIN employees e
-                ON e.employee_id = ss.employee_id
-              WHERE si.company_id = :company_id
-                AND si.studio_id  = :studio_id
-                AND si.shift_date BETWEEN :month_start AND :month_end
-              GROUP BY si.shift_date, si.label, si.start_time, si.end_time, si.required_count
-            )
-            SELECT
-              b.*,
-              COALESCE(a.candidate_count, 0) AS candidate_count,
-              COALESCE(a.rejection_summary, '{}'::jsonb) AS rejection_summary
-            FROM base b
-            LEFT JOIN schedule_audit_shift a
-              ON a.schedule_run_id = :run_id
-             AND a.shift_date = b.shift_date
-             AND a.label = b.label
-             AND a.start_time = b.start_time
-             AND a.end_time = b.end_time
-            ORDER BY b.shift_date, b.start_time
-            """
-        ),
-        {
-            "run_id": str(run_id),
-            "company_id": str(run["company_id"]),
-            "studio_id": str(run["studio_id"]),
-            "month_start": run["month_start"],
-            "month_end": run["month_end"],
-        },
-    ).mappings().all()
-
-    return {"run": dict(run), "coverage": [dict(r) for r in rows]}
+    params = {
+        "run_id": str(run_id),
+        "company_id": str(run["company_id"]),
+        "studio_id": str(run["studio_id"]),
+        "month_start": run["month_start"],
+        "month_end": run["month_end"],
+    }
+    # Hand the session's connection back now: the dependency only closes it
+    # after the response has streamed, and body() checks out its own.
+    await db.close()
+
+    async def body():
+        # Server-side cursor, COVERAGE_STREAM_BATCH rows at a time, so a big
+        # month is never fully buffered. Opens its own connection: the request's
+        # session isn't guaranteed to outlive the handler while streaming.
+        yield b'{"run":' + orjson.dumps(dict(run)) + b',"coverage":['
+        sep = b""
+        async with async_engine.connect() as conn:
+            result = await conn.stream(COVERAGE_STMT, params, execution_options={"yield_per": COVERAGE_STREAM_BATCH})
+            async for batch in result.mappings().partitions():
+                yield sep + b",".join(orjson.dumps(dict(r)) for r in batch)
+                sep = b","
+        yield b"]}"
+
+    return StreamingResponse(body(), media_type="application/json")
 
 
 @router.get("/{run_id}/audit/shift")
@@ -196,32 +395,14 @@ def get_shift_audit(
     (We include start/end because label alone is not guaranteed unique.)
     """
     exists = db.execute(
-        text("SELECT 1 FROM schedule_runs WHERE schedule_run_id = :run_id"),
+        RUN_EXISTS_STMT,
         {"run_id": str(run_id)},
     ).first()
     if not exists:
         raise HTTPException(status_code=404, detail="Schedule run not found")
 
-    # IMPORTANT: use CAST(:start_time AS time) (NOT :start_time::time) with SQLAlchemy text() binds
     rows = db.execute(
-        text(
-            """
-            SELECT
-              sac.employee_id,
-              e.name,
-              sac.eligible,
-              sac.rejection_reason,
-              sac.details
-            FROM schedule_audit_candidate sac
-            JOIN employees e ON e.employee_id = sac.employee_id
-            WHERE sac.schedule_run_id = :run_id
-              AND sac.shift_date = :shift_date
-              AND sac.label = :label
-              AND sac.start_time = CAST(:start_time AS time)
-              AND sac.end_time = CAST(:end_time AS time)
-            ORDER BY sac.eligible DESC, e.name
-            """
-        ),
+        SHIFT_AUDIT_STMT,
         {
             "run_id": str(run_id),
             "shift_date": shift_date,
@@ -231,171 +412,183 @@ def get_shift_audit(
         },
     ).mappings().all()
 
-    return {
-        "run_id": str(run_id),
-        "shift_date": str(shift_date),
+    return ORJSONResponse({
+        "run_id": run_id,
+        "shift_date": shift_date,
         "label": label,
         "start_time": start_time,
         "end_time": end_time,
         "candidates": [dict(r) for r in rows],
-    }
+    })
 
 
 @router.get("/{run_id}/employee/{employee_id}")
 def get_schedule_for_employee(run_id: UUID, employee_id: UUID, db: Session = Depends(get_db)):
     exists = db.execute(
-        text("SELECT 1 FROM schedule_runs WHERE schedule_run_id = :run_id"),
+        RUN_EXISTS_STMT,
         {"run_id": str(run_id)},
     ).first()
     if not exists:
         raise HTTPException(status_code=404, detail="Schedule run not found")
 
     rows = db.execute(
-        text(
-            """
-            SELECT
-              ss.shift_date,
-              ss.day_of_week,
-              ss.label,
-              ss.start_time,
-              ss.end_time
-            FROM scheduled_shifts ss
-            WHERE ss.schedule_run_id = :run_id
-              AND ss.employee_id = :employee_id
-            ORDER BY ss.shift_date, ss.start_time
-            """
-        ),
+        EMPLOYEE_RUN_SHIFTS_STMT,
         {"run_id": str(run_id), "employee_id": str(employee_id)},
     ).mappings().all()
 
-    return {
-        "schedule_run_id": str(run_id),
-        "employee_id": str(employee_id),
+    return ORJSONResponse({
+        "schedule_run_id": run_id,
+        "employee_id": employee_id,
         "shifts": [dict(r) for r in rows],
-    }
+    })
 
 
-@router.get("/company/{company_id}/runs")
-def list_schedule_runs(company_id: UUID, db: Session = Depends(get_db)):
-    """List all schedule runs for a company, ordered by most recent first."""
-    runs = db.execute(
-        text(
-            """
-            SELECT 
-              sr.schedule_run_id,
-              sr.company_id,
-              sr.studio_id,
-              s.name AS studio_name,
-              sr.month_start,
-              sr.month_end,
-              sr.created_at,
-              COUNT(ss.scheduled_shift_id) AS shift_count
-            FROM schedule_runs sr
-            LEFT JOIN studios s ON s.studio_id = sr.studio_id
-            LEFT JOIN scheduled_shifts ss ON ss.schedule_run_id = sr.schedule_run_id
-            WHERE sr.company_id = :company_id
-            GROUP BY sr.schedule_run_id, sr.company_id, sr.studio_id, s.name, sr.month_start, sr.month_end, sr.created_at
-            ORDER BY sr.created_at DESC
-            """
-        ),
-        {"company_id": str(company_id)},
-    ).mappings().all()
+def _encode_runs_cursor(created_at: datetime, run_id: UUID) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{run_id}".encode()).decode()
+
+
+def _decode_runs_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, run_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(run_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    return {"runs": [dict(r) for r in runs]}
+
+@router.get("/company/{company_id}/runs")
+async def list_schedule_runs(
+    company_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List a company's schedule runs, most recent first, one page at a time.
+    Pass the returned next_cursor to get the following page; it is null on
+    the last page.
+    """
+    cursor_ts, cursor_id = _decode_runs_cursor(cursor) if cursor else (None, None)
+
+    async def load() -> bytes:
+        # one extra row tells us whether another page exists
+        runs = (await db.execute(
+            SCHEDULE_RUNS_STMT,
+            {
+                "company_id": str(company_id),
+                "cursor_ts": cursor_ts,
+                "cursor_id": cursor_id,
+                "limit": limit + 1,
+            },
+        )).mappings().all()
+        next_cursor = None
+        if len(runs) > limit:
+            runs = runs[:limit]
+            next_cursor = _encode_runs_cursor(runs[-1]["created_at"], runs[-1]["schedule_run_id"])
+        # orjson encodes the UUID/date/datetime values directly
+        return ORJSONResponse({"runs": [dict(r) for r in runs], "next_cursor": next_cursor}).body
+
+    # Cached as encoded JSON; a new run changes the version and so the key
+    version = await response_cache.schedule_version(db, company_id)
+    content = await response_cache.get_or_set(f"runs:{company_id}:{limit}:{cursor}:{version}", load)
+    return Response(content=content, media_type="application/json")
 
 
 @router.put("/shifts/{shift_id}")
 def update_shift(shift_id: UUID, req: ShiftUpdateRequest, db: Session = Depends(get_db)):
     """Update the employee assigned to a scheduled shift."""
-    shift = db.get(ScheduledShift, shift_id)
-    if not shift:
+    # One round trip: the employee check and the UPDATE run together; the
+    # flags say which (if any) precondition failed.
+    row = db.execute(
+        UPDATE_SHIFT_STMT,
+        {"shift_id": str(shift_id), "employee_id": str(req.employee_id)},
+    ).mappings().one()
+
+    if not row["shift_exists"]:
         raise HTTPException(status_code=404, detail="Scheduled shift not found")
-
-    # Verify employee exists and is active
-    employee = db.execute(
-        text("SELECT employee_id, is_active FROM employees WHERE employee_id = :employee_id"),
-        {"employee_id": str(req.employee_id)},
-    ).mappings().first()
-
-    if not employee:
+    if row["employee_active"] is None:
         raise HTTPException(status_code=404, detail="Employee not found")
-    if not employee["is_active"]:
+    if not row["employee_active"]:
         raise HTTPException(status_code=400, detail="Employee is not active")
 
-    shift.employee_id = req.employee_id
     db.commit()
-    db.refresh(shift)
+    response_cache.forget_schedules()
 
-    return {"scheduled_shift_id": str(shift.scheduled_shift_id), "employee_id": str(shift.employee_id)}
+    return {"scheduled_shift_id": str(shift_id), "employee_id": str(req.employee_id)}
 
 
 @router.delete("/shifts/{shift_id}")
 def delete_shift(shift_id: UUID, db: Session = Depends(get_db)):
     """Delete a scheduled shift."""
-    shift = db.get(ScheduledShift, shift_id)
-    if not shift:
+    # One DELETE ... RETURNING; no row back means it didn't exist
+    deleted_id = db.execute(
+        delete(ScheduledShift)
+        .where(ScheduledShift.scheduled_shift_id == shift_id)
+        .returning(ScheduledShift.scheduled_shift_id)
+    ).scalar()
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Scheduled shift not found")
 
-    shift_id_str = str(shift.scheduled_shift_id)
-    db.delete(shift)
     db.commit()
+    response_cache.forget_schedules()
+
+    return {"deleted": True, "scheduled_shift_id": str(deleted_id)}
+
 
-    return {"deleted": True, "scheduled_shift_id": shift_id_str}
+def _parse_hhmm(value: str) -> time:
+    m = _HHMM.fullmatch(value)
+    if m is None:
+        raise HTTPException(status_code=400, detail="Invalid time format. Use HH:MM")
+    return time(int(m[1]), int(m[2]), int(m[3] or 0))
 
 
 @router.post("/shifts")
 def create_shift(req: ShiftCreateRequest, db: Session = Depends(get_db)):
     """Create a new scheduled shift."""
-    # Verify schedule run exists
-    run = db.execute(
-        text("SELECT schedule_run_id, company_id, studio_id FROM schedule_runs WHERE schedule_run_id = :run_id"),
-        {"run_id": str(req.schedule_run_id)},
-    ).mappings().first()
-
-    if not run:
-        raise HTTPException(status_code=404, detail="Schedule run not found")
+    start_time_obj = _parse_hhmm(req.start_time)
+    end_time_obj = _parse_hhmm(req.end_time)
 
-    # Verify employee exists and is active
-    employee = db.execute(
-        text("SELECT employee_id, is_active, company_id FROM employees WHERE employee_id = :employee_id"),
-        {"employee_id": str(req.employee_id)},
-    ).mappings().first()
+    # Validate before ensure_partitions, so a bad request can't create tables
+    ctx = db.execute(
+        CREATE_SHIFT_CONTEXT_STMT,
+        {"run_id": str(req.schedule_run_id), "employee_id": str(req.employee_id)},
+    ).mappings().one()
 
-    if not employee:
+    if not ctx["run_found"]:
+        raise HTTPException(status_code=404, detail="Schedule run not found")
+    if not ctx["employee_found"]:
         raise HTTPException(status_code=404, detail="Employee not found")
-    if not employee["is_active"]:
+    if not ctx["is_active"]:
         raise HTTPException(status_code=400, detail="Employee is not active")
-    if str(employee["company_id"]) != str(run["company_id"]):
+    if ctx["employee_company_id"] != ctx["run_company_id"]:
         raise HTTPException(status_code=400, detail="Employee does not belong to this company")
+    if not ctx["month_start"] <= req.shift_date <= ctx["month_end"]:
+        raise HTTPException(status_code=400, detail="shift_date is outside the schedule run's month")
 
-    # Parse times
-    try:
-        start_time_obj = time.fromisoformat(req.start_time)
-        end_time_obj = time.fromisoformat(req.end_time)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid time format. Use HH:MM")
+    ensure_partitions([req.shift_date])
 
-    # Get day of week
-    day_of_week = req.shift_date.weekday()
-
-    # Create shift
-    shift = ScheduledShift(
-        schedule_run_id=req.schedule_run_id,
-        employee_id=req.employee_id,
-        studio_id=run["studio_id"],
-        shift_date=req.shift_date,
-        day_of_week=day_of_week,
-        label=req.label,
-        start_time=start_time_obj,
-        end_time=end_time_obj,
-    )
+    # RETURNING hands back the generated id
+    shift_id = db.execute(
+        CREATE_SHIFT_STMT,
+        {
+            "run_id": str(req.schedule_run_id),
+            "employee_id": str(req.employee_id),
+            "shift_date": req.shift_date,
+            "day_of_week": req.shift_date.weekday(),
+            "label": req.label,
+            "start_time": start_time_obj,
+            "end_time": end_time_obj,
+        },
+    ).scalar()
+
+    if shift_id is None:
+        # run/employee changed between the two statements
+        raise HTTPException(status_code=409, detail="Shift could not be created, please retry")
 
-    db.add(shift)
     db.commit()
-    db.refresh(shift)
+    response_cache.forget_schedules()
 
     return {
-        "scheduled_shift_id": str(shift.scheduled_shift_id),
-        "schedule_run_id": str(shift.schedule_run_id),
-        "employee_id": str(shift.employee_id),
+        "scheduled_shift_id": str(shift_id),
+        "schedule_run_id": str(req.schedule_run_id),
+        "employee_id": str(req.employee_id),
     }
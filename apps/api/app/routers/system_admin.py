@@ -1,18 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from uuid import UUID
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel
 from datetime import date
 from typing import Optional
 
-from app.core.database import get_db
-from app.routers.auth import get_current_system_admin, get_password_hash
+from app.core.database import get_async_db
+from app.routers.auth import forget_principal, get_current_system_admin, hash_password
+from app.services.company_scope import company_fk_404, require_company
 from app.models.company import Company
 from app.models.manager import Manager
 from app.models.employee import Employee
 from app.models.system_admin import SystemAdmin
 from app.schemas.admin import CompanyCreate, EmployeeCreate
+from app.schemas.common import LowerEmailStr
 
 router = APIRouter()
 
@@ -20,19 +25,19 @@ router = APIRouter()
 class ManagerCreate(BaseModel):
     company_id: UUID
     name: str
-    email: EmailStr
+    email: LowerEmailStr
     password: str
 
 
 class SystemAdminCreate(BaseModel):
     name: str
-    email: EmailStr
+    email: LowerEmailStr
     password: str
 
 
 class EmployeeUpdate(BaseModel):
     name: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[LowerEmailStr] = None
     phone: Optional[str] = None
     hire_date: Optional[date] = None
     is_active: Optional[bool] = None
@@ -40,56 +45,55 @@ class EmployeeUpdate(BaseModel):
 
 # --- Companies ---
 @router.post("/companies")
-def create_company(
+async def create_company(
     payload: CompanyCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """Create a new company (system admin only)."""
     c = Company(name=payload.name, timezone=payload.timezone)
     db.add(c)
-    db.commit()
-    db.refresh(c)
+    await db.commit()
+    await db.refresh(c)
     return c
 
 
 @router.get("/companies")
-def list_companies(
-    db: Session = Depends(get_db),
+async def list_companies(
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """List all companies (system admin only)."""
-    return db.execute(select(Company)).scalars().all()
+    return (await db.execute(select(Company))).scalars().all()
 
 
 # --- Managers ---
 @router.post("/managers")
-def create_manager(
+async def create_manager(
     payload: ManagerCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """Create a new manager for a company (system admin only)."""
-    # Verify company exists
-    company = db.get(Company, payload.company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-
-    # Check if email already exists
-    existing = db.execute(select(Manager).where(Manager.email == payload.email.lower())).scalar_one_or_none()
-    if existing:
-        raise HTTPException(status_code=400, detail="Manager with this email already exists")
-
-    manager = Manager(
-        company_id=payload.company_id,
-        name=payload.name,
-        email=payload.email.lower(),
-        password_hash=get_password_hash(payload.password),
-        is_active=True,
-    )
-    db.add(manager)
-    db.commit()
-    db.refresh(manager)
+    # One statement: the unique email index rejects duplicates (no row comes
+    # back) and a missing company surfaces as the company_id FK violation
+    async with company_fk_404(db):
+        manager = (await db.execute(
+            pg_insert(Manager)
+            .values(
+                company_id=payload.company_id,
+                name=payload.name,
+                email=payload.email,
+                password_hash=await hash_password(payload.password),
+                is_active=True,
+            )
+            .on_conflict_do_nothing(index_elements=[Manager.email])
+            .returning(Manager)
+        )).scalar_one_or_none()
+        if manager is None:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Manager with this email already exists")
+        await db.commit()
     return {
         "manager_id": str(manager.manager_id),
         "company_id": str(manager.company_id),
@@ -100,54 +104,57 @@ def create_manager(
 
 
 @router.get("/companies/{company_id}/managers")
-def list_managers(
+async def list_managers(
     company_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """List all managers for a company (system admin only)."""
-    company = db.get(Company, company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-
-    managers = db.execute(select(Manager).where(Manager.company_id == company_id)).scalars().all()
-    return [
-        {
-            "manager_id": str(m.manager_id),
-            "company_id": str(m.company_id),
-            "name": m.name,
-            "email": m.email,
-            "is_active": m.is_active,
-            "created_at": m.created_at.isoformat() if m.created_at else None,
-        }
-        for m in managers
-    ]
+    rows = (await db.execute(
+        select(
+            Manager.manager_id,
+            Manager.company_id,
+            Manager.name,
+            Manager.email,
+            Manager.is_active,
+            Manager.created_at,
+        ).where(Manager.company_id == company_id)
+    )).mappings().all()
+    if not rows:
+        await require_company(db, company_id)
+    return ORJSONResponse([dict(r) for r in rows])
 
 
 # --- Employees ---
 @router.post("/companies/{company_id}/employees")
-def create_employee(
+async def create_employee(
     company_id: UUID,
     payload: EmployeeCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """Create a new employee for a company (system admin only)."""
-    company = db.get(Company, company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-
-    employee = Employee(
-        company_id=company_id,
-        name=payload.name,
-        phone=payload.phone,
-        email=payload.email.lower(),
-        hire_date=payload.hire_date,
-        is_active=True,
-    )
-    db.add(employee)
-    db.commit()
-    db.refresh(employee)
+    # RETURNING hands back the generated id in the insert round trip (no refresh);
+    # a duplicate email in the company returns no row, and a missing company
+    # surfaces as the company_id FK violation
+    async with company_fk_404(db):
+        employee = (await db.execute(
+            pg_insert(Employee)
+            .values(
+                company_id=company_id,
+                name=payload.name,
+                phone=payload.phone,
+                email=payload.email,
+                hire_date=payload.hire_date,
+                is_active=True,
+            )
+            .on_conflict_do_nothing(index_elements=[Employee.company_id, func.lower(Employee.email)])
+            .returning(Employee)
+        )).scalar_one_or_none()
+        if employee is None:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Employee with this email already exists")
+        await db.commit()
     return {
         "employee_id": str(employee.employee_id),
         "company_id": str(employee.company_id),
@@ -160,61 +167,64 @@ def create_employee(
 
 
 @router.get("/companies/{company_id}/employees")
-def list_employees(
+async def list_employees(
     company_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """List all employees for a company (system admin only)."""
-    company = db.get(Company, company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-
-    employees = db.execute(select(Employee).where(Employee.company_id == company_id)).scalars().all()
-    return [
-        {
-            "employee_id": str(e.employee_id),
-            "company_id": str(e.company_id),
-            "name": e.name,
-            "email": e.email,
-            "phone": e.phone,
-            "hire_date": e.hire_date.isoformat() if e.hire_date else None,
-            "is_active": e.is_active,
-        }
-        for e in employees
-    ]
+    rows = (await db.execute(
+        select(
+            Employee.employee_id,
+            Employee.company_id,
+            Employee.name,
+            Employee.email,
+            Employee.phone,
+            Employee.hire_date,
+            Employee.is_active,
+        ).where(Employee.company_id == company_id)
+    )).mappings().all()
+    if not rows:
+        await require_company(db, company_id)
+    return ORJSONResponse([dict(r) for r in rows])
 
 
 @router.put("/employees/{employee_id}")
-def update_employee(
+async def update_employee(
     employee_id: UUID,
     payload: EmployeeUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """Update an employee (system admin only)."""
-    employee = db.get(Employee, employee_id)
+    # Only fields that were provided are updated
+    values = payload.model_dump(exclude_none=True)
+    if not values:
+        employee = await db.get(Employee, employee_id)
+    else:
+        # The email uniqueness check rides along in the UPDATE's WHERE, so the
+        # happy path is one round trip
+        stmt = update(Employee).where(Employee.employee_id == employee_id)
+        if "email" in values:
+            other = aliased(Employee)
+            stmt = stmt.where(
+                ~select(other.employee_id)
+                .where(other.email == values["email"], other.employee_id != employee_id)
+                .exists()
+            )
+        employee = (await db.execute(
+            stmt.values(**values).returning(Employee),
+            execution_options={"synchronize_session": False},
+        )).scalar_one_or_none()
+
+        if employee is None and await db.get(Employee, employee_id) is not None:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Email already in use by another employee")
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
 
-    # Update fields if provided
-    if payload.name is not None:
-        employee.name = payload.name
-    if payload.email is not None:
-        # Check if email is already taken by another employee
-        existing = db.execute(select(Employee).where(Employee.email == payload.email.lower(), Employee.employee_id != employee_id)).scalar_one_or_none()
-        if existing:
-            raise HTTPException(status_code=400, detail="Email already in use by another employee")
-        employee.email = payload.email.lower()
-    if payload.phone is not None:
-        employee.phone = payload.phone
-    if payload.hire_date is not None:
-        employee.hire_date = payload.hire_date
-    if payload.is_active is not None:
-        employee.is_active = payload.is_active
-
-    db.commit()
-    db.refresh(employee)
+    await db.commit()
+    forget_principal(employee_id)
     return {
         "employee_id": str(employee.employee_id),
         "company_id": str(employee.company_id),
@@ -227,43 +237,48 @@ def update_employee(
 
 
 @router.delete("/employees/{employee_id}")
-def delete_employee(
+async def delete_employee(
     employee_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """Delete an employee (system admin only)."""
-    employee = db.get(Employee, employee_id)
-    if not employee:
+    # Dependent rows go with it via their ON DELETE CASCADE foreign keys
+    deleted_id = (await db.execute(
+        delete(Employee).where(Employee.employee_id == employee_id).returning(Employee.employee_id)
+    )).scalar()
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Employee not found")
 
-    db.delete(employee)
-    db.commit()
+    await db.commit()
+    forget_principal(employee_id)
     return {"message": "Employee deleted successfully"}
 
 
 # --- System Admins ---
 @router.post("/system-admins")
-def create_system_admin(
+async def create_system_admin(
     payload: SystemAdminCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """Create a new system admin (system admin only)."""
-    # Check if email already exists
-    existing = db.execute(select(SystemAdmin).where(SystemAdmin.email == payload.email.lower())).scalar_one_or_none()
-    if existing:
+    # The unique email index rejects duplicates: no row comes back
+    admin = (await db.execute(
+        pg_insert(SystemAdmin)
+        .values(
+            name=payload.name,
+            email=payload.email,
+            password_hash=await hash_password(payload.password),
+            is_active=True,
+        )
+        .on_conflict_do_nothing(index_elements=[SystemAdmin.email])
+        .returning(SystemAdmin)
+    )).scalar_one_or_none()
+    if admin is None:
+        await db.rollback()
         raise HTTPException(status_code=400, detail="System admin with this email already exists")
-
-    admin = SystemAdmin(
-        name=payload.name,
-        email=payload.email.lower(),
-        password_hash=get_password_hash(payload.password),
-        is_active=True,
-    )
-    db.add(admin)
-    db.commit()
-    db.refresh(admin)
+    await db.commit()
     return {
         "admin_id": str(admin.admin_id),
         "name": admin.name,
@@ -273,19 +288,18 @@ def create_system_admin(
 
 
 @router.get("/system-admins")
-def list_system_admins(
-    db: Session = Depends(get_db),
+async def list_system_admins(
+    db: AsyncSession = Depends(get_async_db),
     current_admin: SystemAdmin = Depends(get_current_system_admin),
 ):
     """List all system admins (system admin only)."""
-    admins = db.execute(select(SystemAdmin)).scalars().all()
-    return [
-        {
-            "admin_id": str(a.admin_id),
-            "name": a.name,
-            "email": a.email,
-            "is_active": a.is_active,
-            "created_at": a.created_at.isoformat() if a.created_at else None,
-        }
-        for a in admins
-    ]
+    rows = (await db.execute(
+        select(
+            SystemAdmin.admin_id,
+            SystemAdmin.name,
+            SystemAdmin.email,
+            SystemAdmin.is_active,
+            SystemAdmin.created_at,
+        )
+    )).mappings().all()
+    return ORJSONResponse([dict(r) for r in rows])
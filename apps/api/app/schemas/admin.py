@@ -1,8 +1,10 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, Field
 from datetime import date
 from typing import Optional
 from uuid import UUID
 
+from app.schemas.common import LowerEmailStr
+
 class CompanyCreate(BaseModel):
     name: str
     timezone: str = "America/Detroit"
@@ -12,7 +14,7 @@ class RoleCreate(BaseModel):
 
 class EmployeeCreate(BaseModel):
     name: str
-    email: EmailStr
+    email: LowerEmailStr
     phone: str | None = None
     hire_date: date | None = None
 
@@ -0,0 +1,7 @@
+from typing import Annotated
+
+from pydantic import AfterValidator, EmailStr
+
+# Emails are stored lowercased (see the *_email_lower check constraints);
+# normalizing here means routers can use payload.email as-is.
+LowerEmailStr = Annotated[EmailStr, AfterValidator(str.lower)]
@@ -1,23 +1,37 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, computed_field
 from datetime import date, datetime
 from typing import Optional, Literal
+from uuid import UUID
+
+from app.schemas.common import LowerEmailStr
+
+# For now, this is where the mobile/web app runs in dev.
+# Later you’ll switch to your real domain.
+FORM_BASE_URL = "http://localhost:8081"
 
 class EmployeeCreate(BaseModel):
     name: str
-    email: EmailStr
+    email: LowerEmailStr
     phone: Optional[str] = None
     hire_date: Optional[date] = None
     is_active: bool = True
 
 class EmployeeOut(BaseModel):
-    employee_id: str
-    company_id: str
+    # built straight from Employee rows / ORM objects by response_model
+    model_config = ConfigDict(from_attributes=True)
+
+    employee_id: UUID
+    company_id: UUID
     name: str
     email: str
     phone: Optional[str] = None
     hire_date: Optional[date] = None
     is_active: bool
-    form_url: str
     last_availability_submit_at: Optional[datetime] = None
     availability_status: Literal["ok", "missing", "stale"] = "missing"
     availability_status_reason: Optional[Literal["no_submission", "older_than_14_days"]] = None
+
+    @computed_field
+    @property
+    def form_url(self) -> str:
+        return f"{FORM_BASE_URL}/form/{self.employee_id}"
@@ -0,0 +1,32 @@
+"""
+Company checks shared by the admin and system-admin routers.
+"""
+from contextlib import asynccontextmanager
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company
+
+
+async def require_company(db: AsyncSession, company_id: UUID) -> None:
+    # only used when a company-scoped read came back empty, to tell
+    # "no rows yet" apart from "no such company"
+    found = (await db.execute(select(Company.company_id).where(Company.company_id == company_id))).first()
+    if found is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+
+
+@asynccontextmanager
+async def company_fk_404(db: AsyncSession):
+    """Wrap a company-scoped insert; a company_id FK violation means 404."""
+    try:
+        yield
+    except IntegrityError as e:
+        await db.rollback()
+        if getattr(e.orig, "sqlstate", None) == "23503":  # foreign_key_violation
+            raise HTTPException(status_code=404, detail="Company not found")
+        raise
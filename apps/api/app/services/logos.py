@@ -0,0 +1,277 @@
+"""
+Serving company logos: local files with ETag/304, remote URLs behind an
+in-process LRU plus an on-disk cache. Shared by the admin and employee routes.
+"""
+import hashlib
+import mimetypes
+import os
+import stat
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import anyio
+import httpx
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+# ✅ apps/api/app/services/logos.py -> parents[3] == apps/
+# so this points to: apps/mobile/assets/logos
+LOGOS_DIR = (Path(__file__).resolve().parents[3] / "mobile" / "assets" / "logos").resolve()
+
+
+# remote logo_url -> (expires_at, bytes, content_type), LRU order
+REMOTE_LOGO_TTL = 300  # seconds
+REMOTE_LOGO_CACHE_SIZE = 128
+REMOTE_LOGO_CACHE_MAX_BYTES = 256 * 1024
+_remote_logo_cache: OrderedDict[str, tuple[float, bytes, str]] = OrderedDict()
+
+# second tier on local disk: shared by every worker on the host and survives
+# restarts. <key>.bin holds the body, <key>.meta its content type. All of its
+# file I/O runs in worker threads (anyio.to_thread), never on the event loop.
+REMOTE_LOGO_DISK_DIR = Path(tempfile.gettempdir()) / "otf_logo_cache"
+REMOTE_LOGO_DISK_TTL = 3600  # seconds
+REMOTE_LOGO_DISK_PRUNE_INTERVAL = 600  # seconds between sweeps for expired files
+_disk_pruned_at = 0.0  # time.monotonic() of this process's last sweep
+
+LOGO_MEDIA_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".svg": "image/svg+xml",
+    ".gif": "image/gif",
+}
+
+
+def make_http_client() -> httpx.AsyncClient:
+    """One pooled client per app, opened/closed by the lifespan; keeps upstream connections alive."""
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=10,
+        limits=httpx.Limits(max_connections=100),
+        headers={"User-Agent": "otf-scheduler/1.0"},
+    )
+
+
+def _remote_logo_disk_path(url: str) -> Path:
+    key = hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+    return REMOTE_LOGO_DISK_DIR / f"{key}.bin"
+
+
+def _disk_logo_content_type(path: Path) -> Optional[str]:
+    """Content type of a fresh on-disk copy, or None on a miss."""
+    try:
+        if time.time() - path.stat().st_mtime >= REMOTE_LOGO_DISK_TTL:
+            return None
+        return path.with_suffix(".meta").read_text()
+    except OSError:
+        return None
+
+
+def _prune_disk_logos() -> None:
+    """
+    Delete expired entries (and temp files abandoned by a crashed writer).
+    Expired files are never read again but would otherwise stay forever, so
+    this runs from the write path at most once per prune interval.
+    """
+    global _disk_pruned_at
+    now = time.monotonic()
+    if now - _disk_pruned_at < REMOTE_LOGO_DISK_PRUNE_INTERVAL:
+        return
+    _disk_pruned_at = now
+
+    cutoff = time.time() - REMOTE_LOGO_DISK_TTL
+    try:
+        entries = list(os.scandir(REMOTE_LOGO_DISK_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        if not entry.name.endswith((".bin", ".meta", ".tmp")):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            # already removed by another worker, or not ours to remove
+            pass
+
+
+def _open_disk_logo_tmp():
+    """Temp file in the cache dir, or None if the disk cache is unusable."""
+    try:
+        REMOTE_LOGO_DISK_DIR.mkdir(parents=True, exist_ok=True)
+        _prune_disk_logos()
+        return tempfile.NamedTemporaryFile(dir=REMOTE_LOGO_DISK_DIR, suffix=".tmp", delete=False)
+    except OSError:
+        return None
+
+
+def _write_disk_logo(tmp, data: bytes):
+    """Append to a temp file; returns None (temp file discarded) on failure."""
+    try:
+        tmp.write(data)
+    except OSError:
+        _discard_disk_logo(tmp)
+        return None
+    return tmp
+
+
+def _store_disk_logo(path: Path, content: bytes, content_type: str) -> None:
+    """Write a fully buffered body to the disk cache in one go."""
+    tmp = _open_disk_logo_tmp()
+    if tmp is not None and _write_disk_logo(tmp, content) is not None:
+        _commit_disk_logo(tmp, path, content_type)
+
+
+def _commit_disk_logo(tmp, path: Path, content_type: str) -> None:
+    """Atomically publish a fully written temp file; readers never see a partial body."""
+    try:
+        tmp.close()
+        path.with_suffix(".meta").write_text(content_type)
+        os.replace(tmp.name, path)
+    except OSError:
+        _discard_disk_logo(tmp)
+
+
+def _discard_disk_logo(tmp) -> None:
+    tmp.close()
+    try:
+        os.unlink(tmp.name)
+    except OSError:
+        pass
+
+
+def logo_file_response(request: Request, logo_path: Path, shown_name: str) -> Response:
+    """
+    Serve a logo file with a validator so repeat hits can be answered with
+    304 without touching the file body. FileResponse itself uses the
+    zero-copy pathsend extension when the server advertises it.
+    """
+    # one stat() answers exists / is_file / ETag / Content-Length
+    try:
+        st = logo_path.stat()
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail=f"Logo file not found: {shown_name}")
+
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+
+    media = (
+        LOGO_MEDIA_TYPES.get(logo_path.suffix.lower())
+        or mimetypes.guess_type(logo_path.name)[0]
+        or "application/octet-stream"
+    )
+    return FileResponse(str(logo_path), media_type=media, headers=headers, stat_result=st)
+
+
+async def company_logo_response(request: Request, logo_url: str) -> Response:
+    """
+    Response for a company's logo_url.
+
+    Preferred DB value:
+      logo_url = "otf.png"   (a filename inside apps/mobile/assets/logos)
+
+    Optional:
+      logo_url = "https://..." (ONLY if it returns an image content-type)
+    """
+    val = logo_url.strip()
+
+    # --- Case A: Local filename in apps/mobile/assets/logos ---
+    if not val.startswith("http://") and not val.startswith("https://") and not val.startswith("/"):
+        # prevent path traversal: only allow plain filenames. With no separator
+        # and no "."/".." the join can't leave LOGOS_DIR (resolved once at
+        # import), so there's no per-request realpath().
+        if "/" in val or "\\" in val or val in (".", ".."):
+            raise HTTPException(status_code=400, detail="Invalid logo filename")
+
+        return logo_file_response(request, LOGOS_DIR / val, val)
+
+    # --- Case B: Absolute local file path (works locally; not ideal long-term) ---
+    if val.startswith("/"):
+        logo_path = Path(val).resolve()
+        return logo_file_response(request, logo_path, str(logo_path))
+
+    # --- Case C: Remote URL (only if it actually returns an image) ---
+    cached = _remote_logo_cache.get(val)
+    if cached is not None and cached[0] > time.monotonic():
+        _remote_logo_cache.move_to_end(val)
+        return Response(content=cached[1], media_type=cached[2])
+
+    disk_path = _remote_logo_disk_path(val)
+    disk_type = await anyio.to_thread.run_sync(_disk_logo_content_type, disk_path)
+    if disk_type is not None:
+        return FileResponse(disk_path, media_type=disk_type)
+
+    # pooled client from the app lifespan (see make_http_client)
+    client: httpx.AsyncClient = request.app.state.http
+    try:
+        r = await client.send(client.build_request("GET", val), stream=True)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to fetch logo: {e}")
+
+    async def close_upstream() -> None:
+        await r.aclose()
+
+    if r.status_code != 200:
+        await close_upstream()
+        raise HTTPException(status_code=502, detail=f"Logo fetch failed with status {r.status_code}")
+
+    content_type = (r.headers.get("content-type") or "").lower()
+
+    # ✅ if we got HTML, that's not a logo — reject it
+    if "image/" not in content_type:
+        await close_upstream()
+        raise HTTPException(
+            status_code=502,
+            detail=f"Remote logo_url did not return an image (content-type={content_type})",
+        )
+
+    # Small logos: read once and keep in the LRU. Anything larger (or of
+    # unknown size) is piped through in chunks instead of buffered.
+    length = r.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) <= REMOTE_LOGO_CACHE_MAX_BYTES:
+        try:
+            content = await r.aread()
+        finally:
+            await close_upstream()
+        _remote_logo_cache[val] = (time.monotonic() + REMOTE_LOGO_TTL, content, content_type)
+        _remote_logo_cache.move_to_end(val)
+        while len(_remote_logo_cache) > REMOTE_LOGO_CACHE_SIZE:
+            _remote_logo_cache.popitem(last=False)
+        await anyio.to_thread.run_sync(_store_disk_logo, disk_path, content, content_type)
+        return Response(content=content, media_type=content_type)
+
+    async def body():
+        # tee into the disk cache as we go; only a complete body is published
+        tmp = await anyio.to_thread.run_sync(_open_disk_logo_tmp)
+        complete = False
+        # finally also runs if the client disconnects mid-stream; shielded so
+        # the cleanup awaits still run when the task is being cancelled
+        try:
+            async for chunk in r.aiter_bytes(64 * 1024):
+                if tmp is not None:
+                    tmp = await anyio.to_thread.run_sync(_write_disk_logo, tmp, chunk)
+                yield chunk
+            complete = True
+        finally:
+            with anyio.CancelScope(shield=True):
+                await close_upstream()
+                if tmp is not None:
+                    if complete:
+                        await anyio.to_thread.run_sync(_commit_disk_logo, tmp, disk_path, content_type)
+                    else:
+                        await anyio.to_thread.run_sync(_discard_disk_logo, tmp)
+
+    return StreamingResponse(body(), media_type=content_type)
@@ -0,0 +1,68 @@
+"""
+In-process cache of encoded JSON responses for hot read endpoints.
+
+Callers put a data version stamp in the key, so new data gets new keys. The
+TTL bounds how long another worker can serve an edit this one didn't see.
+"""
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+RESPONSE_CACHE_TTL = 60  # seconds
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+
+# key -> (expires_at, body), LRU order
+_response_cache: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+
+async def get_or_set(key: str, loader: Callable[[], Awaitable[bytes]], ttl: float = RESPONSE_CACHE_TTL) -> bytes:
+    """Cached body for key, or await loader() stored under it."""
+    now = time.monotonic()
+    hit = _response_cache.get(key)
+    if hit is not None and hit[0] > now:
+        _response_cache.move_to_end(key)
+        return hit[1]
+
+    body = await loader()
+    _response_cache[key] = (time.monotonic() + ttl, body)
+    _response_cache.move_to_end(key)
+    while len(_response_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+        _response_cache.popitem(last=False)
+    return body
+
+
+def invalidate(prefix: str = "") -> None:
+    """Drop every entry whose key starts with prefix (all of them by default)."""
+    for key in [k for k in _response_cache if k.startswith(prefix)]:
+        _response_cache.pop(key, None)
+
+
+SCHEDULE_VERSION_STMT = text(
+    """
+    SELECT EXTRACT(EPOCH FROM max(created_at)), count(*)
+    FROM schedule_runs
+    WHERE company_id = :company_id
+    """
+).bindparams(
+    bindparam("company_id", type_=PG_UUID),
+)
+
+
+async def schedule_version(db: AsyncSession, company_id: UUID) -> str:
+    """Version stamp for a company's schedule runs (index-only on ix_schedule_runs_company_created)."""
+    latest, runs = (await db.execute(
+        SCHEDULE_VERSION_STMT,
+        {"company_id": str(company_id)},
+    )).one()
+    return f"{latest}:{runs}"
+
+
+def forget_schedules() -> None:
+    """Shift edits don't move the run version stamp, so they drop cached schedules outright."""
+    invalidate("team_sched:")
+    invalidate("runs:")
@@ -1,23 +1,22 @@
 from __future__ import annotations
 
+import heapq
 import json
 from collections import Counter
-from datetime import date, timedelta
-from typing import Dict, List, Tuple
+from datetime import date
+from typing import Dict, Tuple
 from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy import and_, delete, select, text
 from sqlalchemy.orm import Session
 
-from app.models.availability import EmployeeAvailability
-from app.models.employee import Employee
-from app.models.pto import EmployeePTO
+from app.core.database import bulk_insert
 from app.models.schedule_runs import ScheduleRun
 from app.models.scheduled_shifts import ScheduledShift
 from app.models.shift_instances import ShiftInstance
-from app.models.time_off import EmployeeTimeOff
-from app.models.unavailability import EmployeeUnavailability
+from app.services.schedule_inputs import NO_WINDOWS, covers, day_bit, load_employee_inputs, overlaps
+from app.services.shift_partitions import ensure_partitions
 
 
 # ---------- helpers ----------
@@ -29,15 +28,43 @@ def _to_minutes(t) -> int:
     return int(hh) * 60 + int(mm)
 
 
-def _overlaps(a_start_m: int, a_end_m: int, b_start_m: int, b_end_m: int) -> bool:
-    return a_start_m < b_end_m and b_start_m < a_end_m
-
+# Audit upserts, each run as one executemany per generation
+CANDIDATE_AUDIT_UPSERT_STMT = text(
+    """
+    INSERT INTO schedule_audit_candidate
+      (schedule_run_id, shift_date, label, start_time, end_time,
+       employee_id, eligible, rejection_reason, details)
+    VALUES
+      (:run_id, :shift_date, :label, :start_time, :end_time,
+       :employee_id, :eligible, :rejection_reason, CAST(:details AS jsonb))
+    ON CONFLICT (schedule_run_id, shift_date, label, start_time, end_time, employee_id)
+    DO UPDATE SET
+      eligible = EXCLUDED.eligible,
+      rejection_reason = EXCLUDED.rejection_reason,
+      details = EXCLUDED.details,
+      created_at = now()
+    """
+)
 
-def _daterange(start: date, end: date):
-    cur = start
-    while cur <= end:
-        yield cur
-        cur += timedelta(days=1)
+SHIFT_AUDIT_UPSERT_STMT = text(
+    """
+    INSERT INTO schedule_audit_shift
+      (schedule_run_id, shift_date, label, start_time, end_time,
+       required_count, assigned_count, candidate_count, missing_count, rejection_summary)
+    VALUES
+      (:run_id, :shift_date, :label, :start_time, :end_time,
+       :required_count, :assigned_count, :candidate_count, :missing_count,
+       CAST(:rejection_summary AS jsonb))
+    ON CONFLICT (schedule_run_id, shift_date, label, start_time, end_time)
+    DO UPDATE SET
+      required_count = EXCLUDED.required_count,
+      assigned_count = EXCLUDED.assigned_count,
+      candidate_count = EXCLUDED.candidate_count,
+      missing_count = EXCLUDED.missing_count,
+      rejection_summary = EXCLUDED.rejection_summary,
+      created_at = now()
+    """
+)
 
 
 # ---------- core ----------
@@ -48,19 +75,55 @@ def generate_month_schedule(
     month_start: date,
     month_end: date,
     overwrite: bool = False,
+    verbose_audit: bool = False,
 ) -> UUID:
     """
     MVP schedule generator + audit:
 
     Writes:
       - scheduled_shifts
-      - schedule_audit_candidate (one row per employee considered per shift)
+      - schedule_audit_candidate (one row per eligible employee per shift; with
+        verbose_audit, one per employee considered, rejected ones included)
       - schedule_audit_shift (one row per shift with summary stats)
     """
 
     if month_end < month_start:
         raise HTTPException(status_code=400, detail="month_end must be >= month_start")
 
+    # Load demand shifts (instances)
+    demand = db.execute(
+        select(
+            ShiftInstance.shift_date,
+            ShiftInstance.day_of_week,
+            ShiftInstance.label,
+            ShiftInstance.start_time,
+            ShiftInstance.end_time,
+            ShiftInstance.required_count,
+        )
+        .where(
+            and_(
+                ShiftInstance.company_id == company_id,
+                ShiftInstance.studio_id == studio_id,
+                ShiftInstance.shift_date >= month_start,
+                ShiftInstance.shift_date <= month_end,
+            )
+        )
+        .order_by(ShiftInstance.shift_date, ShiftInstance.start_time)
+    ).all()
+
+    if not demand:
+        raise HTTPException(status_code=400, detail="No shift_instances found for that company/studio/month.")
+
+    # Shift times in minutes, converted once here instead of on every pass over demand
+    demand = [
+        (shift_date, day_of_week, label, start_time, end_time, required_count, _to_minutes(start_time), _to_minutes(end_time))
+        for shift_date, day_of_week, label, start_time, end_time, required_count in demand
+    ]
+
+    # Partitions for the months with demand, before this session touches
+    # scheduled_shifts or schedule_runs (see shift_partitions)
+    ensure_partitions(shift_date for shift_date, *_ in demand)
+
     # Create schedule run
     run = ScheduleRun(
         company_id=company_id,
@@ -91,139 +154,61 @@ def generate_month_schedule(
             )
         )
 
-    # Load demand shifts (instances)
-    demand = db.execute(
-        select(
-            ShiftInstance.shift_date,
-            ShiftInstance.day_of_week,
-            ShiftInstance.label,
-            ShiftInstance.start_time,
-            ShiftInstance.end_time,
-            ShiftInstance.required_count,
-        )
-        .where(
-            and_(
-                ShiftInstance.company_id == company_id,
-                ShiftInstance.studio_id == studio_id,
-                ShiftInstance.shift_date >= month_start,
-                ShiftInstance.shift_date <= month_end,
-            )
-        )
-        .order_by(ShiftInstance.shift_date, ShiftInstance.start_time)
-    ).all()
-
-    if not demand:
-        raise HTTPException(status_code=400, detail="No shift_instances found for that company/studio/month.")
-
-    # Load employees for that company
-    employees = (
-        db.execute(
-            select(Employee).where(
-                and_(
-                    Employee.company_id == company_id,
-                    Employee.is_active == True,  # noqa: E712
-                )
-            )
-        )
-        .scalars()
-        .all()
-    )
+    # Load active employees with their availability, time off and PTO (one query)
+    (
+        employees,
+        avail_by_emp_dow,
+        unavail_by_emp_dow,
+        off_days_by_emp,
+        pto_days_by_emp,
+    ) = load_employee_inputs(db, company_id, month_start, month_end)
 
     if not employees:
         raise HTTPException(status_code=400, detail="No active employees found for that company.")
 
     emp_ids = [e.employee_id for e in employees]
 
-    # Load weekly availability/unavailability
-    avail_rows = (
-        db.execute(select(EmployeeAvailability).where(EmployeeAvailability.employee_id.in_(emp_ids)))
-        .scalars()
-        .all()
-    )
-    unavail_rows = (
-        db.execute(select(EmployeeUnavailability).where(EmployeeUnavailability.employee_id.in_(emp_ids)))
-        .scalars()
-        .all()
-    )
-
-    # Load date-range time off + PTO in month window
-    time_off_rows = (
-        db.execute(
-            select(EmployeeTimeOff).where(
-                and_(
-                    EmployeeTimeOff.employee_id.in_(emp_ids),
-                    EmployeeTimeOff.end_date >= month_start,
-                    EmployeeTimeOff.start_date <= month_end,
-                )
-            )
-        )
-        .scalars()
-        .all()
-    )
-    pto_rows = (
-        db.execute(
-            select(EmployeePTO).where(
-                and_(
-                    EmployeePTO.employee_id.in_(emp_ids),
-                    EmployeePTO.end_date >= month_start,
-                    EmployeePTO.start_date <= month_end,
-                )
-            )
-        )
-        .scalars()
-        .all()
-    )
+    assigned_by_emp_day: set[Tuple[UUID, date]] = set()
+    minutes_by_emp: Dict[UUID, int] = {eid: 0 for eid in emp_ids}
 
-    # Index availability/unavailability by employee + dow
-    avail_by_emp_dow: Dict[UUID, Dict[int, List[Tuple[int, int]]]] = {}
-    for r in avail_rows:
-        avail_by_emp_dow.setdefault(r.employee_id, {}).setdefault(int(r.day_of_week), []).append(
-            (_to_minutes(r.start_time), _to_minutes(r.end_time))
-        )
+    # Weekly availability/unavailability only depend on (dow, start, end), so
+    # they're evaluated once per shift shape for everyone, not once per date
+    weekly_reasons_by_shape: Dict[Tuple[int, int, int], Dict[UUID, Tuple[str, ...]]] = {}
 
-    unavail_by_emp_dow: Dict[UUID, Dict[int, List[Tuple[int, int]]]] = {}
-    for r in unavail_rows:
-        unavail_by_emp_dow.setdefault(r.employee_id, {}).setdefault(int(r.day_of_week), []).append(
-            (_to_minutes(r.start_time), _to_minutes(r.end_time))
-        )
+    def weekly_reasons(dow: int, s_m: int, e_m: int) -> Dict[UUID, Tuple[str, ...]]:
+        by_emp = weekly_reasons_by_shape.get((dow, s_m, e_m))
+        if by_emp is None:
+            by_emp = {}
+            for eid in emp_ids:
+                reasons: list[str] = []
 
-    # Date-range blocks: expand to sets for quick lookup
-    off_dates_by_emp: Dict[UUID, set[date]] = {eid: set() for eid in emp_ids}
-    for r in time_off_rows:
-        for d in _daterange(r.start_date, r.end_date):
-            off_dates_by_emp.setdefault(r.employee_id, set()).add(d)
+                if not covers(avail_by_emp_dow.get((eid, dow), NO_WINDOWS), s_m, e_m):
+                    reasons.append("no_availability_coverage")
 
-    pto_dates_by_emp: Dict[UUID, set[date]] = {eid: set() for eid in emp_ids}
-    for r in pto_rows:
-        for d in _daterange(r.start_date, r.end_date):
-            pto_dates_by_emp.setdefault(r.employee_id, set()).add(d)
+                if overlaps(unavail_by_emp_dow.get((eid, dow), NO_WINDOWS), s_m, e_m):
+                    reasons.append("weekly_unavailable_overlap")
 
-    assigned_by_emp_day: set[Tuple[UUID, date]] = set()
-    minutes_by_emp: Dict[UUID, int] = {eid: 0 for eid in emp_ids}
+                by_emp[eid] = tuple(reasons)
+            weekly_reasons_by_shape[(dow, s_m, e_m)] = by_emp
+        return by_emp
 
-    def eligibility(eid: UUID, d: date, dow: int, s_m: int, e_m: int) -> tuple[bool, list[str]]:
+    def eligibility(eid: UUID, d: date, d_bit: int, weekly: Tuple[str, ...]) -> tuple[bool, list[str]]:
         reasons: list[str] = []
 
         if (eid, d) in assigned_by_emp_day:
             reasons.append("already_assigned_that_day")
 
-        if d in off_dates_by_emp.get(eid, set()):
+        if off_days_by_emp[eid] & d_bit:
             reasons.append("time_off")
 
-        if d in pto_dates_by_emp.get(eid, set()):
+        if pto_days_by_emp[eid] & d_bit:
             reasons.append("pto")
 
-        av = avail_by_emp_dow.get(eid, {}).get(dow, [])
-        if not any(a_s <= s_m and a_e >= e_m for (a_s, a_e) in av):
-            reasons.append("no_availability_coverage")
-
-        un = unavail_by_emp_dow.get(eid, {}).get(dow, [])
-        if any(_overlaps(s_m, e_m, u_s, u_e) for (u_s, u_e) in un):
-            reasons.append("weekly_unavailable_overlap")
+        reasons.extend(weekly)
 
         return (len(reasons) == 0, reasons)
 
-    def upsert_candidate_audit(
+    def candidate_audit_row(
         run_id: UUID,
         shift_date: date,
         label: str,
@@ -234,7 +219,7 @@ def generate_month_schedule(
         reasons: list[str],
         selected: bool,
         minutes_so_far: int,
-    ) -> None:
+    ) -> dict:
         rejection_reason = None if eligible else (reasons[0] if reasons else "unknown")
 
         details = {
@@ -243,37 +228,19 @@ def generate_month_schedule(
             "reasons": reasons,
         }
 
-        db.execute(
-            text(
-                """
-                INSERT INTO schedule_audit_candidate
-                  (schedule_run_id, shift_date, label, start_time, end_time,
-                   employee_id, eligible, rejection_reason, details)
-                VALUES
-                  (:run_id, :shift_date, :label, :start_time, :end_time,
-                   :employee_id, :eligible, :rejection_reason, CAST(:details AS jsonb))
-                ON CONFLICT (schedule_run_id, shift_date, label, start_time, end_time, employee_id)
-                DO UPDATE SET
-                  eligible = EXCLUDED.eligible,
-                  rejection_reason = EXCLUDED.rejection_reason,
-                  details = EXCLUDED.details,
-                  created_at = now()
-                """
-            ),
-            {
-                "run_id": str(run_id),
-                "shift_date": shift_date,
-                "label": label,
-                "start_time": start_time,
-                "end_time": end_time,
-                "employee_id": str(employee_id),
-                "eligible": eligible,
-                "rejection_reason": rejection_reason,
-                "details": json.dumps(details),
-            },
-        )
+        return {
+            "run_id": str(run_id),
+            "shift_date": shift_date,
+            "label": label,
+            "start_time": start_time,
+            "end_time": end_time,
+            "employee_id": str(employee_id),
+            "eligible": eligible,
+            "rejection_reason": rejection_reason,
+            "details": json.dumps(details),
+        }
 
-    def upsert_shift_audit(
+    def shift_audit_row(
         run_id: UUID,
         shift_date: date,
         label: str,
@@ -284,54 +251,37 @@ def generate_month_schedule(
         candidate_count: int,
         missing_count: int,
         rejection_summary: dict,
-    ) -> None:
-        db.execute(
-            text(
-                """
-                INSERT INTO schedule_audit_shift
-                  (schedule_run_id, shift_date, label, start_time, end_time,
-                   required_count, assigned_count, candidate_count, missing_count, rejection_summary)
-                VALUES
-                  (:run_id, :shift_date, :label, :start_time, :end_time,
-                   :required_count, :assigned_count, :candidate_count, :missing_count,
-                   CAST(:rejection_summary AS jsonb))
-                ON CONFLICT (schedule_run_id, shift_date, label, start_time, end_time)
-                DO UPDATE SET
-                  required_count = EXCLUDED.required_count,
-                  assigned_count = EXCLUDED.assigned_count,
-                  candidate_count = EXCLUDED.candidate_count,
-                  missing_count = EXCLUDED.missing_count,
-                  rejection_summary = EXCLUDED.rejection_summary,
-                  created_at = now()
-                """
-            ),
-            {
-                "run_id": str(run_id),
-                "shift_date": shift_date,
-                "label": label,
-                "start_time": start_time,
-                "end_time": end_time,
-                "required_count": int(required_count),
-                "assigned_count": int(assigned_count),
-                "candidate_count": int(candidate_count),
-                "missing_count": int(missing_count),
-                "rejection_summary": json.dumps(rejection_summary),
-            },
-        )
+    ) -> dict:
+        return {
+            "run_id": str(run_id),
+            "shift_date": shift_date,
+            "label": label,
+            "start_time": start_time,
+            "end_time": end_time,
+            "required_count": int(required_count),
+            "assigned_count": int(assigned_count),
+            "candidate_count": int(candidate_count),
+            "missing_count": int(missing_count),
+            "rejection_summary": json.dumps(rejection_summary),
+        }
+
+    scheduled_rows: list[dict] = []
+    candidate_audit_rows: list[dict] = []
+    shift_audit_rows: list[dict] = []
 
     # ---------- main loop ----------
-    for shift_date, day_of_week, label, start_time, end_time, required_count in demand:
-        s_m = _to_minutes(start_time)
-        e_m = _to_minutes(end_time)
+    for shift_date, day_of_week, label, start_time, end_time, required_count, s_m, e_m in demand:
         dow = int(day_of_week)
 
         eligible_ids: list[UUID] = []
         rejection_counter = Counter()
         cache: dict[UUID, tuple[bool, list[str]]] = {}
+        weekly = weekly_reasons(dow, s_m, e_m)
+        d_bit = day_bit(shift_date, month_start)
 
         # Evaluate everyone once
         for e in employees:
-            ok, reasons = eligibility(e.employee_id, shift_date, dow, s_m, e_m)
+            ok, reasons = eligibility(e.employee_id, shift_date, d_bit, weekly[e.employee_id])
             cache[e.employee_id] = (ok, reasons)
             if ok:
                 eligible_ids.append(e.employee_id)
@@ -339,17 +289,19 @@ def generate_month_schedule(
                 for r in reasons:
                     rejection_counter[r] += 1
 
-        # Fairness sort (least minutes first)
-        eligible_ids.sort(key=lambda eid: minutes_by_emp.get(eid, 0))
-
+        # Fairness: the `need` eligible employees with the fewest minutes so far
+        # (nsmallest keeps sorted()'s tie order without sorting everyone)
         need = int(required_count)
-        picked = eligible_ids[:need]
+        picked = heapq.nsmallest(need, eligible_ids, key=lambda eid: minutes_by_emp.get(eid, 0))
         picked_set = set(picked)
 
-        # Candidate audit rows (all employees, not just eligible)
+        # Candidate audit rows (rejections are already counted in the shift
+        # audit's rejection_summary; per-employee rows only when verbose)
         for e in employees:
             ok, reasons = cache[e.employee_id]
-            upsert_candidate_audit(
+            if not (verbose_audit or ok or e.employee_id in picked_set):
+                continue
+            candidate_audit_rows.append(candidate_audit_row(
                 run_id=run.schedule_run_id,
                 shift_date=shift_date,
                 label=label,
@@ -360,21 +312,21 @@ def generate_month_schedule(
                 reasons=reasons,
                 selected=(e.employee_id in picked_set),
                 minutes_so_far=minutes_by_emp.get(e.employee_id, 0),
-            )
+            ))
 
         # Scheduled shifts
         for eid in picked:
-            db.add(
-                ScheduledShift(
-                    schedule_run_id=run.schedule_run_id,
-                    employee_id=eid,
-                    studio_id=studio_id,
-                    shift_date=shift_date,
-                    day_of_week=dow,
-                    label=label,
-                    start_time=start_time,
-                    end_time=end_time,
-                )
+            scheduled_rows.append(
+                {
+                    "schedule_run_id": run.schedule_run_id,
+                    "employee_id": eid,
+                    "studio_id": studio_id,
+                    "shift_date": shift_date,
+                    "day_of_week": dow,
+                    "label": label,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                }
             )
             assigned_by_emp_day.add((eid, shift_date))
             minutes_by_emp[eid] = minutes_by_emp.get(eid, 0) + (e_m - s_m)
@@ -383,7 +335,7 @@ def generate_month_schedule(
         candidate_count = len(eligible_ids)
         missing_count = max(0, need - assigned_count)
 
-        upsert_shift_audit(
+        shift_audit_rows.append(shift_audit_row(
             run_id=run.schedule_run_id,
             shift_date=shift_date,
             label=label,
@@ -394,7 +346,16 @@ def generate_month_schedule(
             candidate_count=candidate_count,
             missing_count=missing_count,
             rejection_summary=dict(rejection_counter),
-        )
+        ))
+
+    # Audit rows: one executemany each instead of a round trip per row
+    if candidate_audit_rows:
+        db.execute(CANDIDATE_AUDIT_UPSERT_STMT, candidate_audit_rows)
+    if shift_audit_rows:
+        db.execute(SHIFT_AUDIT_UPSERT_STMT, shift_audit_rows)
+
+    # Scheduled shifts: one batched insert instead of a flush per row
+    bulk_insert(db, ScheduledShift, scheduled_rows)
 
     db.commit()
     return run.schedule_run_id
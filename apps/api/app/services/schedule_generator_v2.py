@@ -7,26 +7,25 @@ Phase B: Optimize with swaps (soft constraints)
 
 from __future__ import annotations
 
+import heapq
 import json
 import random
 from collections import Counter, defaultdict
 from datetime import date, timedelta, datetime
-from typing import Dict, List, Tuple, Optional, Set
+from typing import Dict, List, Tuple, Optional
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import and_, delete, select, text
+from sqlalchemy import and_, case, delete, select, text
 from sqlalchemy.orm import Session
 
-from app.models.availability import EmployeeAvailability
-from app.models.employee import Employee
-from app.models.pto import EmployeePTO
+from app.core.database import bulk_insert
 from app.models.rules import EmployeeRule
 from app.models.schedule_runs import ScheduleRun
 from app.models.scheduled_shifts import ScheduledShift
 from app.models.shift_instances import ShiftInstance
-from app.models.time_off import EmployeeTimeOff
-from app.models.unavailability import EmployeeUnavailability
+from app.services.schedule_inputs import NO_WINDOWS, covers, day_bit, load_employee_inputs, overlaps
+from app.services.shift_partitions import ensure_partitions
 
 
 # ========== Configuration Constants ==========
@@ -51,6 +50,14 @@ WEIGHT_FT_HOURS_OVER = -4  # Per hour over target
 WEIGHT_PT_HOURS_TOWARD_IDEAL = 5  # Per hour toward ideal
 WEIGHT_PT_HOURS_OVER_IDEAL = -15  # Increased penalty - per hour over ideal
 
+# rule_type -> the single value_json key the generator reads for it
+RULE_VALUE_KEYS = {
+    "EMPLOYMENT_TYPE": "type",
+    "WEEKEND_PREFERENCE": "preference",
+    "IDEAL_HOURS_WEEKLY": "hours",
+    "HARD_NO_CONSTRAINTS": "note",
+}
+
 
 # ========== Helper Functions ==========
 def _to_minutes(t) -> int:
@@ -62,19 +69,6 @@ def _to_minutes(t) -> int:
     return int(hh) * 60 + int(mm)
 
 
-def _overlaps(a_start_m: int, a_end_m: int, b_start_m: int, b_end_m: int) -> bool:
-    """Check if two time ranges overlap."""
-    return a_start_m < b_end_m and b_start_m < a_end_m
-
-
-def _daterange(start: date, end: date):
-    """Generate date range."""
-    cur = start
-    while cur <= end:
-        yield cur
-        cur += timedelta(days=1)
-
-
 def _minutes_to_hours(minutes: int) -> float:
     """Convert minutes to hours."""
     return minutes / 60.0
@@ -197,46 +191,21 @@ def generate_month_schedule(
     month_start: date,
     month_end: date,
     overwrite: bool = False,
+    verbose_audit: bool = False,
 ) -> UUID:
     """
     Enhanced schedule generator with hard/soft constraints and two-phase optimization.
     
     Phase A: Build valid schedule (hard constraints only)
     Phase B: Optimize with swaps (soft constraints)
+    
+    Candidate audit rows are written for eligible employees only unless
+    verbose_audit is set; rejections are still counted per shift.
     """
     
     if month_end < month_start:
         raise HTTPException(status_code=400, detail="month_end must be >= month_start")
     
-    # Create schedule run
-    run = ScheduleRun(
-        company_id=company_id,
-        studio_id=studio_id,
-        month_start=month_start,
-        month_end=month_end,
-    )
-    db.add(run)
-    db.flush()
-    try:
-        db.refresh(run)
-    except Exception:
-        pass
-    
-    if not run.schedule_run_id:
-        raise HTTPException(status_code=500, detail="Failed to create schedule run (missing schedule_run_id).")
-    
-    # Optional overwrite
-    if overwrite:
-        db.execute(
-            delete(ScheduledShift).where(
-                and_(
-                    ScheduledShift.studio_id == studio_id,
-                    ScheduledShift.shift_date >= month_start,
-                    ScheduledShift.shift_date <= month_end,
-                )
-            )
-        )
-    
     # Load demand shifts
     demand = db.execute(
         select(
@@ -261,19 +230,53 @@ def generate_month_schedule(
     if not demand:
         raise HTTPException(status_code=400, detail="No shift_instances found for that company/studio/month.")
     
-    # Load employees
-    employees = (
+    # Shift times in minutes, converted once here instead of on every pass over demand
+    demand = [
+        (shift_date, day_of_week, label, start_time, end_time, required_count, _to_minutes(start_time), _to_minutes(end_time))
+        for shift_date, day_of_week, label, start_time, end_time, required_count in demand
+    ]
+    
+    # Partitions for the months with demand, before this session touches
+    # scheduled_shifts or schedule_runs (see shift_partitions)
+    ensure_partitions(shift_date for shift_date, *_ in demand)
+    
+    # Create schedule run
+    run = ScheduleRun(
+        company_id=company_id,
+        studio_id=studio_id,
+        month_start=month_start,
+        month_end=month_end,
+    )
+    db.add(run)
+    db.flush()
+    try:
+        db.refresh(run)
+    except Exception:
+        pass
+    
+    if not run.schedule_run_id:
+        raise HTTPException(status_code=500, detail="Failed to create schedule run (missing schedule_run_id).")
+    
+    # Optional overwrite
+    if overwrite:
         db.execute(
-            select(Employee).where(
+            delete(ScheduledShift).where(
                 and_(
-                    Employee.company_id == company_id,
-                    Employee.is_active == True,  # noqa: E712
+                    ScheduledShift.studio_id == studio_id,
+                    ScheduledShift.shift_date >= month_start,
+                    ScheduledShift.shift_date <= month_end,
                 )
             )
         )
-        .scalars()
-        .all()
-    )
+    
+    # Load active employees with their availability, time off and PTO (one query)
+    (
+        employees,
+        avail_by_emp_dow,
+        unavail_by_emp_dow,
+        off_days_by_emp,
+        pto_days_by_emp,
+    ) = load_employee_inputs(db, company_id, month_start, month_end)
     
     if not employees:
         raise HTTPException(status_code=400, detail="No active employees found for that company.")
@@ -281,96 +284,42 @@ def generate_month_schedule(
     emp_ids = [e.employee_id for e in employees]
     
     # Load employee rules (preferences)
-    rules_rows = (
-        db.execute(select(EmployeeRule).where(EmployeeRule.employee_id.in_(emp_ids)))
-        .scalars()
-        .all()
+    # Extract just the scalar each rule_type needs (value_json->>key) in SQL
+    # instead of hydrating and deserializing every JSONB blob client-side.
+    rule_value = case(
+        *[
+            (EmployeeRule.rule_type == rule_type, EmployeeRule.value_json[key].astext)
+            for rule_type, key in RULE_VALUE_KEYS.items()
+        ],
+        else_=None,
     )
+    rules_rows = db.execute(
+        select(EmployeeRule.employee_id, EmployeeRule.rule_type, rule_value).where(
+            and_(
+                EmployeeRule.employee_id.in_(emp_ids),
+                EmployeeRule.rule_type.in_(list(RULE_VALUE_KEYS)),
+            )
+        )
+    ).all()
     
     # Build employee profiles
     profiles: Dict[UUID, EmployeeProfile] = {}
     for e in employees:
         profiles[e.employee_id] = EmployeeProfile(e.employee_id)
     
-    for rule in rules_rows:
-        profile = profiles.get(rule.employee_id)
+    for employee_id, rule_type, value in rules_rows:
+        profile = profiles.get(employee_id)
         if not profile:
             continue
         
-        value = rule.value_json
-        if rule.rule_type == "EMPLOYMENT_TYPE":
-            profile.employment_type = value.get("type")
-        elif rule.rule_type == "WEEKEND_PREFERENCE":
-            profile.weekend_preference = value.get("preference")
-        elif rule.rule_type == "IDEAL_HOURS_WEEKLY":
-            hours = value.get("hours")
-            profile.ideal_hours_weekly = float(hours) if hours is not None else None
-        elif rule.rule_type == "HARD_NO_CONSTRAINTS":
-            profile.hard_no_note = value.get("note", "")
-    
-    # Load availability/unavailability
-    avail_rows = (
-        db.execute(select(EmployeeAvailability).where(EmployeeAvailability.employee_id.in_(emp_ids)))
-        .scalars()
-        .all()
-    )
-    unavail_rows = (
-        db.execute(select(EmployeeUnavailability).where(EmployeeUnavailability.employee_id.in_(emp_ids)))
-        .scalars()
-        .all()
-    )
-    
-    # Load time off + PTO
-    time_off_rows = (
-        db.execute(
-            select(EmployeeTimeOff).where(
-                and_(
-                    EmployeeTimeOff.employee_id.in_(emp_ids),
-                    EmployeeTimeOff.end_date >= month_start,
-                    EmployeeTimeOff.start_date <= month_end,
-                )
-            )
-        )
-        .scalars()
-        .all()
-    )
-    pto_rows = (
-        db.execute(
-            select(EmployeePTO).where(
-                and_(
-                    EmployeePTO.employee_id.in_(emp_ids),
-                    EmployeePTO.end_date >= month_start,
-                    EmployeePTO.start_date <= month_end,
-                )
-            )
-        )
-        .scalars()
-        .all()
-    )
-    
-    # Index availability/unavailability by employee + dow
-    avail_by_emp_dow: Dict[UUID, Dict[int, List[Tuple[int, int]]]] = {}
-    for r in avail_rows:
-        avail_by_emp_dow.setdefault(r.employee_id, {}).setdefault(int(r.day_of_week), []).append(
-            (_to_minutes(r.start_time), _to_minutes(r.end_time))
-        )
-    
-    unavail_by_emp_dow: Dict[UUID, Dict[int, List[Tuple[int, int]]]] = {}
-    for r in unavail_rows:
-        unavail_by_emp_dow.setdefault(r.employee_id, {}).setdefault(int(r.day_of_week), []).append(
-            (_to_minutes(r.start_time), _to_minutes(r.end_time))
-        )
-    
-    # Date-range blocks
-    off_dates_by_emp: Dict[UUID, Set[date]] = {eid: set() for eid in emp_ids}
-    for r in time_off_rows:
-        for d in _daterange(r.start_date, r.end_date):
-            off_dates_by_emp.setdefault(r.employee_id, set()).add(d)
-    
-    pto_dates_by_emp: Dict[UUID, Set[date]] = {eid: set() for eid in emp_ids}
-    for r in pto_rows:
-        for d in _daterange(r.start_date, r.end_date):
-            pto_dates_by_emp.setdefault(r.employee_id, set()).add(d)
+        if rule_type == "EMPLOYMENT_TYPE":
+            profile.employment_type = value
+        elif rule_type == "WEEKEND_PREFERENCE":
+            profile.weekend_preference = value
+        elif rule_type == "IDEAL_HOURS_WEEKLY":
+            profile.ideal_hours_weekly = float(value) if value is not None else None
+        elif rule_type == "HARD_NO_CONSTRAINTS":
+            profile.hard_no_note = value or ""
     
     # Track assigned shifts (for overlap detection)
     assigned_shifts_by_emp: Dict[UUID, List[AssignedShift]] = {eid: [] for eid in emp_ids}
@@ -382,6 +331,30 @@ def generate_month_schedule(
     weekend_day_by_emp_week: Dict[UUID, Dict[int, int]] = defaultdict(dict)  # {eid: {week_id: dow}}
     
     # ========== PHASE A: Hard Constraints Eligibility ==========
+    # Weekly availability/unavailability only depend on (dow, start, end), and
+    # check_hard_constraints runs several times per (shift, employee), so they're
+    # evaluated once per shift shape for everyone
+    weekly_reasons_by_shape: Dict[Tuple[int, int, int], Dict[UUID, Tuple[str, ...]]] = {}
+    
+    def weekly_reasons(dow: int, start_m: int, end_m: int) -> Dict[UUID, Tuple[str, ...]]:
+        by_emp = weekly_reasons_by_shape.get((dow, start_m, end_m))
+        if by_emp is None:
+            by_emp = {}
+            for eid in emp_ids:
+                reasons: List[str] = []
+                
+                # Availability check (shift must be fully within availability window)
+                if not covers(avail_by_emp_dow.get((eid, dow), NO_WINDOWS), start_m, end_m):
+                    reasons.append("no_availability_coverage")
+                
+                # Unavailability overlap check
+                if overlaps(unavail_by_emp_dow.get((eid, dow), NO_WINDOWS), start_m, end_m):
+                    reasons.append("weekly_unavailable_overlap")
+                
+                by_emp[eid] = tuple(reasons)
+            weekly_reasons_by_shape[(dow, start_m, end_m)] = by_emp
+        return by_emp
+    
     def check_hard_constraints(
         eid: UUID,
         shift_date: date,
@@ -393,22 +366,16 @@ def generate_month_schedule(
         reasons: List[str] = []
         
         # PTO check
-        if shift_date in pto_dates_by_emp.get(eid, set()):
+        d_bit = day_bit(shift_date, month_start)
+        if pto_days_by_emp[eid] & d_bit:
             reasons.append("pto")
         
         # Time off check
-        if shift_date in off_dates_by_emp.get(eid, set()):
+        if off_days_by_emp[eid] & d_bit:
             reasons.append("time_off")
         
-        # Availability check (shift must be fully within availability window)
-        av = avail_by_emp_dow.get(eid, {}).get(dow, [])
-        if not any(a_s <= start_m and a_e >= end_m for (a_s, a_e) in av):
-            reasons.append("no_availability_coverage")
-        
-        # Unavailability overlap check
-        un = unavail_by_emp_dow.get(eid, {}).get(dow, [])
-        if any(_overlaps(start_m, end_m, u_s, u_e) for (u_s, u_e) in un):
-            reasons.append("weekly_unavailable_overlap")
+        # Availability / unavailability checks
+        reasons.extend(weekly_reasons(dow, start_m, end_m)[eid])
         
         # Overlap check with existing assigned shifts (across all days)
         for existing_shift in assigned_shifts_by_emp.get(eid, []):
@@ -615,9 +582,7 @@ def generate_month_schedule(
     
     # First, count candidates per shift
     shift_candidate_counts: Dict[Tuple[date, str, int, int], int] = {}
-    for shift_date, day_of_week, label, start_time, end_time, required_count in demand:
-        s_m = _to_minutes(start_time)
-        e_m = _to_minutes(end_time)
+    for shift_date, day_of_week, label, start_time, end_time, required_count, s_m, e_m in demand:
         # Calculate dow from shift_date to ensure consistency
         dow = _date_to_dow(shift_date)
         key = (shift_date, label, s_m, e_m)
@@ -632,15 +597,15 @@ def generate_month_schedule(
     # Sort demand by candidate count (hardest first)
     demand_sorted = sorted(
         demand,
-        key=lambda x: shift_candidate_counts.get((x[0], x[2], _to_minutes(x[3]), _to_minutes(x[4])), 999)
+        key=lambda x: shift_candidate_counts.get((x[0], x[2], x[6], x[7]), 999)
     )
     
     # Main assignment loop
     scheduled_shifts: List[Tuple[UUID, date, int, str, int, int]] = []  # (eid, date, dow, label, start_m, end_m)
+    candidate_audit_rows: List[dict] = []
+    shift_audit_rows: List[dict] = []
     
-    for shift_date, day_of_week, label, start_time, end_time, required_count in demand_sorted:
-        s_m = _to_minutes(start_time)
-        e_m = _to_minutes(end_time)
+    for shift_date, day_of_week, label, start_time, end_time, required_count, s_m, e_m in demand_sorted:
         # Calculate dow from shift_date to ensure consistency (database convention: 0=Sun, 6=Sat)
         # Don't trust day_of_week from ShiftInstance - calculate from actual date
         dow = _date_to_dow(shift_date)
@@ -663,12 +628,11 @@ def generate_month_schedule(
                 for r in hard_reasons:
                     rejection_counter[r] += 1
         
-        # Sort by score (highest first)
-        candidates.sort(key=lambda x: x[1], reverse=True)
-        
-        # Pick top N
+        # Pick the top N by score (highest first); nlargest keeps sorted()'s
+        # tie order without sorting every candidate
         need = int(required_count)
-        picked = candidates[:need]
+        picked = heapq.nlargest(need, candidates, key=lambda x: x[1])
+        picked_ids = {p[0] for p in picked}
         
         # Assign shifts
         for eid, score, reasons in picked:
@@ -698,24 +662,24 @@ def generate_month_schedule(
                     e.employee_id, shift_date, dow, s_m, e_m, label,
                     minutes_by_emp.get(e.employee_id, 0)
                 )
-                selected = e.employee_id in [p[0] for p in picked]
-                _upsert_candidate_audit(
-                    db, run.schedule_run_id, shift_date, label, start_time, end_time,
+                selected = e.employee_id in picked_ids
+                candidate_audit_rows.append(_candidate_audit_row(
+                    run.schedule_run_id, shift_date, label, start_time, end_time,
                     e.employee_id, True, hard_reasons, selected, minutes_by_emp.get(e.employee_id, 0),
                     score, soft_reasons
-                )
-            else:
-                _upsert_candidate_audit(
-                    db, run.schedule_run_id, shift_date, label, start_time, end_time,
+                ))
+            elif verbose_audit:
+                candidate_audit_rows.append(_candidate_audit_row(
+                    run.schedule_run_id, shift_date, label, start_time, end_time,
                     e.employee_id, False, hard_reasons, False, minutes_by_emp.get(e.employee_id, 0),
                     0.0, []
-                )
+                ))
         
         # Shift audit
-        _upsert_shift_audit(
-            db, run.schedule_run_id, shift_date, label, start_time, end_time,
+        shift_audit_rows.append(_shift_audit_row(
+            run.schedule_run_id, shift_date, label, start_time, end_time,
             need, assigned_count, eligible_count, missing_count, dict(rejection_counter)
-        )
+        ))
     
     # ========== PHASE B: Repair Pass (Hour Targets) ==========
     # Identify FT employees under target and PT employees over ideal
@@ -837,9 +801,7 @@ def generate_month_schedule(
         assigned_shifts_map[key] = assigned_shifts_map.get(key, 0) + 1
     
     # Find unassigned shifts from demand
-    for shift_date, day_of_week, label, start_time, end_time, required_count in demand:
-        s_m = _to_minutes(start_time)
-        e_m = _to_minutes(end_time)
+    for shift_date, day_of_week, label, start_time, end_time, required_count, s_m, e_m in demand:
         # Calculate dow from shift_date to ensure consistency
         dow = _date_to_dow(shift_date)
         key = (shift_date, s_m, e_m)
@@ -1095,7 +1057,7 @@ def generate_month_schedule(
     # Step 2: Ensure every employee has exactly one weekend day per pay week
     # Find all pay weeks in the month
     all_week_ids = set()
-    for shift_date, day_of_week, label, start_time, end_time, required_count in demand:
+    for shift_date, day_of_week, label, start_time, end_time, required_count, s_m, e_m in demand:
         dow = _date_to_dow(shift_date)
         if _is_weekend(dow):
             wk = _payweek_id(shift_date, PAYWEEK_ANCHOR)
@@ -1115,7 +1077,7 @@ def generate_month_schedule(
         need_sat = defaultdict(int)  # {shift_date: count}
         need_sun = defaultdict(int)
         
-        for shift_date, day_of_week, label, start_time, end_time, required_count in demand:
+        for shift_date, day_of_week, label, start_time, end_time, required_count, s_m, e_m in demand:
             dow = _date_to_dow(shift_date)
             if not _is_weekend(dow):
                 continue
@@ -1124,9 +1086,6 @@ def generate_month_schedule(
             if wk_demand != wk:
                 continue
             
-            s_m = _to_minutes(start_time)
-            e_m = _to_minutes(end_time)
-            
             # Count how many are already assigned
             assigned_count = sum(1 for eid_check, sd, _, _, sm, em in scheduled_shifts 
                                 if sd == shift_date and sm == s_m and em == e_m)
@@ -1178,7 +1137,7 @@ def generate_month_schedule(
                     break
                 
                 # Find weekend shifts for this pay week matching target_dow
-                for shift_date, day_of_week, label, start_time, end_time, required_count in demand:
+                for shift_date, day_of_week, label, start_time, end_time, required_count, s_m, e_m in demand:
                     if assigned_weekend:
                         break
                     
@@ -1190,9 +1149,6 @@ def generate_month_schedule(
                     if wk_demand != wk:
                         continue
                     
-                    s_m = _to_minutes(start_time)
-                    e_m = _to_minutes(end_time)
-                    
                     # Check how many are already assigned
                     assigned_count = sum(1 for eid_check, sd, _, _, sm, em in scheduled_shifts 
                                         if sd == shift_date and sm == s_m and em == e_m)
@@ -1323,6 +1279,13 @@ def generate_month_schedule(
                 improved_swaps += 1
     
     # ========== Write to Database ==========
+    # Audit rows: one executemany each instead of a round trip per row
+    if candidate_audit_rows:
+        db.execute(CANDIDATE_AUDIT_UPSERT_STMT, candidate_audit_rows)
+    if shift_audit_rows:
+        db.execute(SHIFT_AUDIT_UPSERT_STMT, shift_audit_rows)
+    
+    scheduled_rows: List[dict] = []
     for eid, shift_date, dow, label, s_m, e_m in scheduled_shifts:
         # Convert back to time objects
         start_time_obj = datetime(2000, 1, 1, s_m // 60, s_m % 60).time()
@@ -1331,26 +1294,67 @@ def generate_month_schedule(
         # Calculate day_of_week from shift_date to ensure consistency (database convention: 0=Sun, 6=Sat)
         db_dow = _date_to_dow(shift_date)
         
-        db.add(
-            ScheduledShift(
-                schedule_run_id=run.schedule_run_id,
-                employee_id=eid,
-                studio_id=studio_id,
-                shift_date=shift_date,
-                day_of_week=db_dow,  # Use calculated value from date, not from ShiftInstance
-                label=label,
-                start_time=start_time_obj,
-                end_time=end_time_obj,
-            )
+        scheduled_rows.append(
+            {
+                "schedule_run_id": run.schedule_run_id,
+                "employee_id": eid,
+                "studio_id": studio_id,
+                "shift_date": shift_date,
+                "day_of_week": db_dow,  # Use calculated value from date, not from ShiftInstance
+                "label": label,
+                "start_time": start_time_obj,
+                "end_time": end_time_obj,
+            }
         )
     
+    # Scheduled shifts: one batched insert instead of a flush per row
+    bulk_insert(db, ScheduledShift, scheduled_rows)
+    
     db.commit()
     return run.schedule_run_id
 
 
 # ========== Audit Helper Functions ==========
-def _upsert_candidate_audit(
-    db: Session,
+# Both upserts run as one executemany per generation
+CANDIDATE_AUDIT_UPSERT_STMT = text(
+    """
+    INSERT INTO schedule_audit_candidate
+      (schedule_run_id, shift_date, label, start_time, end_time,
+       employee_id, eligible, rejection_reason, details)
+    VALUES
+      (:run_id, :shift_date, :label, :start_time, :end_time,
+       :employee_id, :eligible, :rejection_reason, CAST(:details AS jsonb))
+    ON CONFLICT (schedule_run_id, shift_date, label, start_time, end_time, employee_id)
+    DO UPDATE SET
+      eligible = EXCLUDED.eligible,
+      rejection_reason = EXCLUDED.rejection_reason,
+      details = EXCLUDED.details,
+      created_at = now()
+    """
+)
+
+SHIFT_AUDIT_UPSERT_STMT = text(
+    """
+    INSERT INTO schedule_audit_shift
+      (schedule_run_id, shift_date, label, start_time, end_time,
+       required_count, assigned_count, candidate_count, missing_count, rejection_summary)
+    VALUES
+      (:run_id, :shift_date, :label, :start_time, :end_time,
+       :required_count, :assigned_count, :candidate_count, :missing_count,
+       CAST(:rejection_summary AS jsonb))
+    ON CONFLICT (schedule_run_id, shift_date, label, start_time, end_time)
+    DO UPDATE SET
+      required_count = EXCLUDED.required_count,
+      assigned_count = EXCLUDED.assigned_count,
+      candidate_count = EXCLUDED.candidate_count,
+      missing_count = EXCLUDED.missing_count,
+      rejection_summary = EXCLUDED.rejection_summary,
+      created_at = now()
+    """
+)
+
+
+def _candidate_audit_row(
     run_id: UUID,
     shift_date: date,
     label: str,
@@ -1363,8 +1367,8 @@ def _upsert_candidate_audit(
     minutes_so_far: int,
     score: float,
     soft_reasons: List[str],
-) -> None:
-    """Upsert candidate audit record."""
+) -> dict:
+    """Parameters for one CANDIDATE_AUDIT_UPSERT_STMT row."""
     rejection_reason = None if eligible else (hard_reasons[0] if hard_reasons else "unknown")
     
     details = {
@@ -1375,39 +1379,20 @@ def _upsert_candidate_audit(
         "soft_reasons": soft_reasons,
     }
     
-    db.execute(
-        text(
-            """
-            INSERT INTO schedule_audit_candidate
-              (schedule_run_id, shift_date, label, start_time, end_time,
-               employee_id, eligible, rejection_reason, details)
-            VALUES
-              (:run_id, :shift_date, :label, :start_time, :end_time,
-               :employee_id, :eligible, :rejection_reason, CAST(:details AS jsonb))
-            ON CONFLICT (schedule_run_id, shift_date, label, start_time, end_time, employee_id)
-            DO UPDATE SET
-              eligible = EXCLUDED.eligible,
-              rejection_reason = EXCLUDED.rejection_reason,
-              details = EXCLUDED.details,
-              created_at = now()
-            """
-        ),
-        {
-            "run_id": str(run_id),
-            "shift_date": shift_date,
-            "label": label,
-            "start_time": start_time,
-            "end_time": end_time,
-            "employee_id": str(employee_id),
-            "eligible": eligible,
-            "rejection_reason": rejection_reason,
-            "details": json.dumps(details),
-        },
-    )
+    return {
+        "run_id": str(run_id),
+        "shift_date": shift_date,
+        "label": label,
+        "start_time": start_time,
+        "end_time": end_time,
+        "employee_id": str(employee_id),
+        "eligible": eligible,
+        "rejection_reason": rejection_reason,
+        "details": json.dumps(details),
+    }
 
 
-def _upsert_shift_audit(
-    db: Session,
+def _shift_audit_row(
     run_id: UUID,
     shift_date: date,
     label: str,
@@ -1418,39 +1403,18 @@ def _upsert_shift_audit(
     candidate_count: int,
     missing_count: int,
     rejection_summary: dict,
-) -> None:
-    """Upsert shift audit record."""
-    db.execute(
-        text(
-            """
-            INSERT INTO schedule_audit_shift
-              (schedule_run_id, shift_date, label, start_time, end_time,
-               required_count, assigned_count, candidate_count, missing_count, rejection_summary)
-            VALUES
-              (:run_id, :shift_date, :label, :start_time, :end_time,
-               :required_count, :assigned_count, :candidate_count, :missing_count,
-               CAST(:rejection_summary AS jsonb))
-            ON CONFLICT (schedule_run_id, shift_date, label, start_time, end_time)
-            DO UPDATE SET
-              required_count = EXCLUDED.required_count,
-              assigned_count = EXCLUDED.assigned_count,
-              candidate_count = EXCLUDED.candidate_count,
-              missing_count = EXCLUDED.missing_count,
-              rejection_summary = EXCLUDED.rejection_summary,
-              created_at = now()
-            """
-        ),
-        {
-            "run_id": str(run_id),
-            "shift_date": shift_date,
-            "label": label,
-            "start_time": start_time,
-            "end_time": end_time,
-            "required_count": int(required_count),
-            "assigned_count": int(assigned_count),
-            "candidate_count": int(candidate_count),
-            "missing_count": int(missing_count),
-            "rejection_summary": json.dumps(rejection_summary),
-        },
-    )
+) -> dict:
+    """Parameters for one SHIFT_AUDIT_UPSERT_STMT row."""
+    return {
+        "run_id": str(run_id),
+        "shift_date": shift_date,
+        "label": label,
+        "start_time": start_time,
+        "end_time": end_time,
+        "required_count": int(required_count),
+        "assigned_count": int(assigned_count),
+        "candidate_count": int(candidate_count),
+        "missing_count": int(missing_count),
+        "rejection_summary": json.dumps(rejection_summary),
+    }
 
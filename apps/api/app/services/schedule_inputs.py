@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, List, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import Date, bindparam, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+
+# Everything the generators need per active employee in one round trip:
+# weekly availability/unavailability as parallel (dow, start minute, end minute)
+# arrays, and time off / PTO as the day offsets from month_start they cover.
+EMPLOYEE_INPUTS_STMT = text(
+    """
+    SELECT
+        e.employee_id,
+        a.dows AS avail_dows, a.starts AS avail_starts, a.ends AS avail_ends,
+        u.dows AS unavail_dows, u.starts AS unavail_starts, u.ends AS unavail_ends,
+        t.days AS off_days,
+        p.days AS pto_days
+    FROM employees e
+    LEFT JOIN LATERAL (
+        SELECT
+            array_agg(day_of_week::int) AS dows,
+            array_agg(extract(hour FROM start_time)::int * 60 + extract(minute FROM start_time)::int) AS starts,
+            array_agg(extract(hour FROM end_time)::int * 60 + extract(minute FROM end_time)::int) AS ends
+        FROM employee_availability
+        WHERE employee_id = e.employee_id
+    ) a ON true
+    LEFT JOIN LATERAL (
+        SELECT
+            array_agg(day_of_week::int) AS dows,
+            array_agg(extract(hour FROM start_time)::int * 60 + extract(minute FROM start_time)::int) AS starts,
+            array_agg(extract(hour FROM end_time)::int * 60 + extract(minute FROM end_time)::int) AS ends
+        FROM employee_unavailability
+        WHERE employee_id = e.employee_id
+    ) u ON true
+    LEFT JOIN LATERAL (
+        SELECT array_agg(DISTINCT d::date - :month_start) AS days
+        FROM employee_time_off o
+        CROSS JOIN generate_series(
+            greatest(o.start_date, :month_start), least(o.end_date, :month_end), interval '1 day'
+        ) d
+        WHERE o.employee_id = e.employee_id
+            AND o.end_date >= :month_start
+            AND o.start_date <= :month_end
+    ) t ON true
+    LEFT JOIN LATERAL (
+        SELECT array_agg(DISTINCT d::date - :month_start) AS days
+        FROM employee_pto o
+        CROSS JOIN generate_series(
+            greatest(o.start_date, :month_start), least(o.end_date, :month_end), interval '1 day'
+        ) d
+        WHERE o.employee_id = e.employee_id
+            AND o.end_date >= :month_start
+            AND o.start_date <= :month_end
+    ) p ON true
+    WHERE e.company_id = :company_id
+        AND e.is_active = true
+    """
+).bindparams(
+    bindparam("company_id", type_=PG_UUID),
+    bindparam("month_start", type_=Date),
+    bindparam("month_end", type_=Date),
+)
+
+
+# Weekly windows for one (employee, dow): starts sorted ascending, and for each
+# position the largest end among the windows up to it. Any "some window starts
+# before X and ends after Y" question is then one bisect plus one lookup.
+Windows = Tuple[Tuple[int, ...], Tuple[int, ...]]
+NO_WINDOWS: Windows = ((), ())
+
+
+def _windows(blocks: List[Tuple[int, int]]) -> Windows:
+    blocks.sort()
+    max_ends: List[int] = []
+    for _, e_m in blocks:
+        max_ends.append(max(e_m, max_ends[-1]) if max_ends else e_m)
+    return tuple(s_m for s_m, _ in blocks), tuple(max_ends)
+
+
+def _windows_by_emp_dow(
+    eid: UUID,
+    dows: Sequence[int] | None,
+    starts: Sequence[int] | None,
+    ends: Sequence[int] | None,
+    out: Dict[Tuple[UUID, int], Windows],
+) -> None:
+    if dows is None:
+        return
+    blocks: Dict[int, List[Tuple[int, int]]] = {}
+    for dow, s_m, e_m in zip(dows, starts, ends):
+        blocks.setdefault(dow, []).append((s_m, e_m))
+    for dow, dow_blocks in blocks.items():
+        out[(eid, dow)] = _windows(dow_blocks)
+
+
+def covers(windows: Windows, start_m: int, end_m: int) -> bool:
+    """True if a single window contains [start_m, end_m]."""
+    starts, max_ends = windows
+    i = bisect_right(starts, start_m)
+    return i > 0 and max_ends[i - 1] >= end_m
+
+
+def overlaps(windows: Windows, start_m: int, end_m: int) -> bool:
+    """True if any window overlaps (start_m, end_m)."""
+    starts, max_ends = windows
+    i = bisect_left(starts, end_m)
+    return i > 0 and max_ends[i - 1] > start_m
+
+
+def _day_mask(days: Sequence[int] | None) -> int:
+    mask = 0
+    for i in days or ():
+        mask |= 1 << i
+    return mask
+
+
+def load_employee_inputs(
+    db: Session,
+    company_id: UUID,
+    month_start: date,
+    month_end: date,
+):
+    """
+    Load the company's active employees and their scheduling constraints.
+
+    Returns (employees, avail_by_emp_dow, unavail_by_emp_dow, off_days_by_emp,
+    pto_days_by_emp): employees are rows with an `employee_id`, the weekly
+    windows are keyed by (employee_id, dow) (query them with covers/overlaps), and
+    the day masks (bit i set = month_start + i days is blocked, see `day_bit`)
+    have an entry for every employee.
+    """
+    employees = db.execute(
+        EMPLOYEE_INPUTS_STMT,
+        {"company_id": str(company_id), "month_start": month_start, "month_end": month_end},
+    ).all()
+
+    avail_by_emp_dow: Dict[Tuple[UUID, int], Windows] = {}
+    unavail_by_emp_dow: Dict[Tuple[UUID, int], Windows] = {}
+    off_days_by_emp: Dict[UUID, int] = {}
+    pto_days_by_emp: Dict[UUID, int] = {}
+    for r in employees:
+        _windows_by_emp_dow(r.employee_id, r.avail_dows, r.avail_starts, r.avail_ends, avail_by_emp_dow)
+        _windows_by_emp_dow(r.employee_id, r.unavail_dows, r.unavail_starts, r.unavail_ends, unavail_by_emp_dow)
+        off_days_by_emp[r.employee_id] = _day_mask(r.off_days)
+        pto_days_by_emp[r.employee_id] = _day_mask(r.pto_days)
+
+    return employees, avail_by_emp_dow, unavail_by_emp_dow, off_days_by_emp, pto_days_by_emp
+
+
+def day_bit(d: date, month_start: date) -> int:
+    """The bit for `d` in the off/PTO day masks from load_employee_inputs."""
+    return 1 << (d - month_start).days
@@ -0,0 +1,52 @@
+"""
+Monthly range partitions of scheduled_shifts (see migration b8d4f1e6a3c0).
+
+There is no DEFAULT partition: rows for a month without a partition would
+otherwise pile up there, and Postgres refuses to create that month's partition
+later. Every path that inserts shifts calls ensure_partitions() for the dates
+it is about to write, once they are validated and before its own session
+touches scheduled_shifts.
+"""
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import text
+
+from app.core.database import engine
+
+# month starts known to have a partition in this process (never dropped at runtime)
+_known_months: set[date] = set()
+
+
+def _add_month(d: date) -> date:
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+
+
+def ensure_partitions(dates: Iterable[date]) -> None:
+    """
+    Create any missing scheduled_shifts partitions for the months of `dates`.
+
+    Only pass dates that are about to be written (already validated): every
+    new month here is a CREATE TABLE. Runs in its own short transaction on a
+    separate connection: CREATE TABLE ... PARTITION OF locks the parent table
+    and the tables its foreign keys reference, which must not wait on (or be
+    held for) the caller's transaction. So call this before the caller's
+    session has read or written scheduled_shifts or written schedule_runs.
+    """
+    missing = sorted({date(d.year, d.month, 1) for d in dates} - _known_months)
+    if not missing:
+        return
+
+    with engine.begin() as conn:
+        # one creator at a time; IF NOT EXISTS alone still races on the catalog
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('scheduled_shifts_partitions'))"))
+        for m in missing:
+            name = f"scheduled_shifts_{m:%Y_%m}"
+            if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+                conn.execute(
+                    text(
+                        f"CREATE TABLE {name} PARTITION OF scheduled_shifts "
+                        f"FOR VALUES FROM ('{m.isoformat()}') TO ('{_add_month(m).isoformat()}')"
+                    )
+                )
+    _known_months.update(missing)
@@ -174,7 +174,7 @@ export default function EmployeeSchedule() {
   async function loadTeamSchedule() {
     setLoading(true);
     try {
-      const data = await apiGet<any>(`/employee/team-schedule?month_start=${monthStart}&month_end=${monthEnd}`);
+      const data = await apiGet<any>(`/employee/team-schedule?month_start=${monthStart}&month_end=${monthEnd}&view=grouped`);
       setTeamSchedule(data);
     } catch (error: any) {
       if (error?.message?.includes("401") || error?.message?.includes("Unauthorized")) {
@@ -541,7 +541,7 @@ export default function EmployeeSchedule() {
           <Text style={{ color: "#e9eaec", fontWeight: "700", fontSize: 18, marginBottom: 12 }}>
             Team Schedule
           </Text>
-          {teamSchedule?.all_shifts?.length === 0 ? (
+          {Object.keys(teamSchedule?.shifts_by_date || {}).length === 0 ? (
             <Text style={{ color: "#9aa4b2", opacity: 0.7 }}>No team schedule found for this month</Text>
           ) : (
             Object.entries(teamSchedule?.shifts_by_date || {}).map(([date, shifts]: [string, any]) => {
@@ -127,7 +127,7 @@ export default function EmployeeSchedule() {
   async function loadTeamSchedule() {
     setLoading(true);
     try {
-      const data = await apiGet<any>(`/employee/team-schedule?month_start=${monthStart}&month_end=${monthEnd}`);
+      const data = await apiGet<any>(`/employee/team-schedule?month_start=${monthStart}&month_end=${monthEnd}&view=grouped`);
       setTeamSchedule(data);
     } catch (error: any) {
       if (error?.message?.includes("Unauthorized")) {
@@ -441,7 +441,7 @@ export default function EmployeeSchedule() {
         ) : (
           <div>
             <div style={{ fontSize: 18, fontWeight: "700", marginBottom: 12 }}>Team Schedule</div>
-            {teamSchedule?.all_shifts?.length === 0 ? (
+            {Object.keys(teamSchedule?.shifts_by_date || {}).length === 0 ? (
               <div style={{ color: "#9aa4b2", opacity: 0.7 }}>No team schedule found for this month</div>
             ) : (
               Object.entries(teamSchedule?.shifts_by_date || {}).map(([date, shifts]: [string, any]) => {